@@ -0,0 +1,359 @@
+"""Benchmark the seeding scripts against a local fake Supabase and compare to a baseline.
+
+    python benchmark.py run --scales small,medium --out results.json
+    python benchmark.py run --baseline baseline.json --threshold 0.2
+    python benchmark.py compare results.json baseline.json
+
+Each (script, scale) scenario runs in its own process so peak RSS is not
+shared between scenarios. The process tags every HTTP request with the
+stage that sent it; the fake server (fake_services.FakeSupabase) tallies
+requests, rows and bytes per stage. SDK integrations are replaced by
+in-process fakes that sleep for --integration-latency per call.
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Tuple
+
+from fake_services import STAGE_HEADER, FakeSupabase
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+RESULT_MARKER = "BENCHMARK_RESULT "
+
+# Named --scale specs for seed_database.py; the other scripts seed fixed data
+SCALES = {
+    "fixtures": None,
+    "small": "firms=1",
+    "medium": "firms=5,users_per_firm=20,cases_per_lawyer=2,messages_per_case=20,"
+              "notes_per_case=10,events_per_case=3",
+    "large": "firms=20,users_per_firm=40,cases_per_lawyer=3,messages_per_case=30,"
+             "notes_per_case=10,events_per_case=5",
+}
+SCRIPTS = ["seed_database", "create_users", "update_practice_areas"]
+
+# Timings below this are too noisy to compare
+MIN_COMPARABLE_SECONDS = 0.25
+
+# metric -> True when a higher value is better
+METRICS = {
+    "rows_per_sec": True,
+    "seconds": False,
+    "requests": False,
+    "bytes": False,
+    "peak_rss_mb": False,
+}
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+# Child process: run one scenario's stages
+
+_current = threading.local()
+
+
+def _tag_http_requests() -> None:
+    """Label every outgoing httpx request with the stage running on this thread."""
+    import httpx
+
+    def stage_name() -> str:
+        return getattr(_current, "stage", None) or threading.current_thread().name
+
+    sync_send, async_send = httpx.Client.send, httpx.AsyncClient.send
+
+    def send(self, request, **kwargs):
+        request.headers[STAGE_HEADER] = stage_name()
+        return sync_send(self, request, **kwargs)
+
+    async def send_async(self, request, **kwargs):
+        request.headers[STAGE_HEADER] = stage_name()
+        return await async_send(self, request, **kwargs)
+
+    httpx.Client.send, httpx.AsyncClient.send = send, send_async
+
+
+class StageRecorder:
+    def __init__(self):
+        self.stages: Dict[str, Dict] = {}
+
+    def wrap(self, name: str, fn: Callable) -> Callable:
+        def run(*args, **kwargs):
+            _current.stage = name
+            started = time.perf_counter()
+            status = "ok"
+            try:
+                result = fn(*args, **kwargs)
+                return result
+            except Exception:
+                status = "error"
+                raise
+            finally:
+                self.stages[name] = {
+                    "seconds": time.perf_counter() - started,
+                    "status": status,
+                    "peak_rss_mb": peak_rss_mb(),
+                }
+                _current.stage = None
+        return run
+
+
+def _run_seed_database(recorder: StageRecorder, scale: str, seed: int, integration_latency: float) -> None:
+    import seed_database
+    from data_generator import ScaleConfig, SeedDataGenerator
+    from fake_services import install_fake_integrations
+    from seed_engine import SeedEngine
+
+    install_fake_integrations(seed_database.integrations, integration_latency)
+    generator = None
+    if scale:
+        generator = SeedDataGenerator(ScaleConfig.parse(scale), seed=seed,
+                                      practice_areas=seed_database.practice_areas)
+    stages = seed_database.build_stages(generator)
+    for stage in stages:
+        stage.fn = recorder.wrap(stage.name, stage.fn)
+    engine = SeedEngine(stages)
+    engine.run()
+    for name, timing in engine.timings.items():
+        if timing.status != "ok":
+            recorder.stages.setdefault(name, {"seconds": 0.0, "peak_rss_mb": peak_rss_mb()})
+            recorder.stages[name]["status"] = timing.status
+
+    def drain():
+        for name in ("notifications", "note_analyzer", "calendar_sync"):
+            client = seed_database.integrations.loaded(name)
+            if client:
+                client.close()
+
+    recorder.wrap("drain_integrations", drain)()
+
+
+def _run_create_users(recorder: StageRecorder, scale: str, seed: int, integration_latency: float) -> None:
+    import create_users
+    from password_hashing import PasswordHasher
+
+    create_users.password_hasher = PasswordHasher(profile="seed")
+    recorder.wrap("create_users", create_users.create_users)()
+
+
+def _run_update_practice_areas(recorder: StageRecorder, scale: str, seed: int,
+                               integration_latency: float) -> None:
+    import update_practice_areas
+
+    recorder.wrap("initial_sync", update_practice_areas.update_practice_areas)()
+    # A second run against unchanged data should cost one read and no writes
+    recorder.wrap("resync", update_practice_areas.update_practice_areas)()
+
+
+RUNNERS = {
+    "seed_database": _run_seed_database,
+    "create_users": _run_create_users,
+    "update_practice_areas": _run_update_practice_areas,
+}
+
+
+def child_main(args) -> None:
+    _tag_http_requests()
+    recorder = StageRecorder()
+    started = time.perf_counter()
+    RUNNERS[args.script](recorder, SCALES[args.scale], args.seed, args.integration_latency)
+    result = {"seconds": time.perf_counter() - started, "peak_rss_mb": peak_rss_mb(),
+              "stages": recorder.stages}
+    sys.stdout.flush()
+    print(RESULT_MARKER + json.dumps(result))
+
+
+# Parent process: run scenarios and compare results
+
+def _child_env(server: FakeSupabase, cache_dir: str) -> Dict[str, str]:
+    env = dict(os.environ)
+    env.update({
+        "SEED_SUPABASE_URL": server.url,
+        "SEED_SUPABASE_KEY": "benchmark.benchmark.benchmark",
+        "NEXT_PUBLIC_SUPABASE_URL": server.url,
+        "NEXT_PUBLIC_SUPABASE_ANON_KEY": "benchmark.benchmark.benchmark",
+        "SEED_CACHE_DIR": cache_dir,
+        "SEED_HASH_PROFILE": "seed",
+        # Notification channels post to the fake server instead of the real APIs
+        "SENDGRID_API_KEY": "benchmark", "SENDGRID_FROM_EMAIL": "bench@example.com",
+        "SENDGRID_API_URL": server.url, "SENDGRID_RATE": "1000",
+        "TWILIO_ACCOUNT_SID": "benchmark", "TWILIO_AUTH_TOKEN": "benchmark",
+        "TWILIO_PHONE_NUMBER": "+15550000000", "TWILIO_API_URL": server.url, "TWILIO_RATE": "1000",
+        "SLACK_BOT_TOKEN": "benchmark", "SLACK_API_URL": server.url, "SLACK_RATE": "1000",
+    })
+    return env
+
+
+def run_scenario(server: FakeSupabase, script: str, scale: str, args) -> Dict:
+    server.reset()
+    server.latency = args.latency
+    with tempfile.TemporaryDirectory(prefix="seed-bench-") as cache_dir:
+        command = [sys.executable, os.path.abspath(__file__), "_child", script, scale,
+                   "--seed", str(args.seed), "--integration-latency", str(args.integration_latency)]
+        proc = subprocess.run(command, cwd=SCRIPTS_DIR, env=_child_env(server, cache_dir),
+                              capture_output=True, text=True)
+    if args.verbose:
+        print(proc.stdout)
+    lines = [line for line in proc.stdout.splitlines() if line.startswith(RESULT_MARKER)]
+    if proc.returncode != 0 or not lines:
+        print(f"Error running {script} at scale {scale} (exit {proc.returncode}):\n{proc.stderr[-2000:]}")
+        return {"error": proc.returncode or "no result"}
+
+    result = json.loads(lines[-1][len(RESULT_MARKER):])
+    traffic = server.stage_stats()
+    for name, stage in result["stages"].items():
+        stage.update(traffic.pop(name, {"requests": 0, "rows": 0, "bytes_in": 0, "bytes_out": 0}))
+    for stage in list(result["stages"].values()) + list(traffic.values()):
+        if "bytes_in" in stage:
+            stage["bytes"] = stage["bytes_in"] + stage["bytes_out"]
+    for stage in result["stages"].values():
+        stage["rows_per_sec"] = stage["rows"] / stage["seconds"] if stage["seconds"] else 0.0
+    # Traffic from background threads, e.g. the notification dispatcher
+    result["background"] = traffic
+    return result
+
+
+def print_results(results: Dict) -> None:
+    for scenario, result in results["scenarios"].items():
+        if "error" in result:
+            print(f"\n{scenario}: failed ({result['error']})")
+            continue
+        print(f"\n{scenario}: {result['seconds']:.2f}s, peak RSS {result['peak_rss_mb']:.0f} MB")
+        print(f"{'stage':<24}{'seconds':>9}{'rows':>9}{'rows/s':>10}{'requests':>10}{'KB':>10}{'RSS MB':>8}  status")
+        for name, stage in result["stages"].items():
+            print(f"{name:<24}{stage['seconds']:>9.2f}{stage['rows']:>9}{stage['rows_per_sec']:>10.0f}"
+                  f"{stage['requests']:>10}{stage['bytes'] / 1024:>10.1f}{stage['peak_rss_mb']:>8.0f}"
+                  f"  {stage['status']}")
+        for name, stage in result["background"].items():
+            print(f"{name + ' (bg)':<24}{'':>9}{stage['rows']:>9}{'':>10}{stage['requests']:>10}"
+                  f"{stage['bytes'] / 1024:>10.1f}")
+
+
+def compare(current: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """Return one message per metric that got worse than the baseline by more than `threshold`."""
+    regressions = []
+    for scenario, base in baseline["scenarios"].items():
+        result = current["scenarios"].get(scenario)
+        if not result or "error" in base:
+            continue
+        if "error" in result:
+            regressions.append(f"{scenario}: failed")
+            continue
+        for name, base_stage in base["stages"].items():
+            stage = result["stages"].get(name)
+            if stage is None:
+                continue
+            for metric, higher_is_better in METRICS.items():
+                if metric in ("seconds", "rows_per_sec") and base_stage["seconds"] < MIN_COMPARABLE_SECONDS:
+                    continue
+                old, new = base_stage.get(metric), stage.get(metric)
+                if not old or new is None:
+                    continue
+                change = (new - old) / old
+                if (-change if higher_is_better else change) > threshold:
+                    regressions.append(f"{scenario}/{name}: {metric} {old:.4g} -> {new:.4g} ({change:+.0%})")
+    return regressions
+
+
+def _load(path: str) -> Dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+def _report_comparison(current: Dict, baseline_path: str, threshold: float) -> int:
+    regressions = compare(current, _load(baseline_path), threshold)
+    if regressions:
+        print(f"\n{len(regressions)} regressions beyond {threshold:.0%} against {baseline_path}:")
+        for regression in regressions:
+            print(f"  {regression}")
+        return 1
+    print(f"\nNo regressions beyond {threshold:.0%} against {baseline_path}")
+    return 0
+
+
+def run_main(args) -> int:
+    scenarios: List[Tuple[str, str]] = []
+    for script in args.scripts.split(","):
+        if script == "seed_database":
+            scenarios += [(script, scale) for scale in args.scales.split(",")]
+        else:
+            scenarios.append((script, "fixtures"))
+
+    server = FakeSupabase().start()
+    results = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "latency": args.latency,
+        "integration_latency": args.integration_latency,
+        "scenarios": {},
+    }
+    try:
+        for script, scale in scenarios:
+            print(f"Running {script} at scale {scale}...")
+            results["scenarios"][f"{script}@{scale}"] = run_scenario(server, script, scale, args)
+    finally:
+        server.stop()
+
+    print_results(results)
+    with open(args.out, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nWrote {args.out}")
+    if args.baseline:
+        return _report_comparison(results, args.baseline, args.threshold)
+    return 0
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="Run the benchmark scenarios")
+    run.add_argument("--scripts", default=",".join(SCRIPTS))
+    run.add_argument("--scales", default="small,medium",
+                     help=f"Comma-separated scales for seed_database: {', '.join(SCALES)}")
+    run.add_argument("--seed", type=int, default=1)
+    run.add_argument("--latency", type=float, default=0.002,
+                     help="Seconds the fake server waits before answering each request")
+    run.add_argument("--integration-latency", type=float, default=0.02,
+                     help="Seconds each fake Graph/Google/Zoom/Azure call takes")
+    run.add_argument("--out", default="benchmark_results.json")
+    run.add_argument("--baseline", help="Results file to compare against")
+    run.add_argument("--threshold", type=float, default=0.2,
+                     help="Allowed fractional regression per metric (default 0.2 = 20%%)")
+    run.add_argument("--verbose", action="store_true", help="Show each script's own output")
+
+    cmp = commands.add_parser("compare", help="Compare two results files")
+    cmp.add_argument("current")
+    cmp.add_argument("baseline")
+    cmp.add_argument("--threshold", type=float, default=0.2)
+
+    child = commands.add_parser("_child")
+    child.add_argument("script", choices=sorted(RUNNERS))
+    child.add_argument("scale", choices=sorted(SCALES))
+    child.add_argument("--seed", type=int, default=1)
+    child.add_argument("--integration-latency", type=float, default=0.0)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if args.command == "_child":
+        child_main(args)
+    elif args.command == "compare":
+        sys.exit(_report_comparison(_load(args.current), args.baseline, args.threshold))
+    else:
+        sys.exit(run_main(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,424 @@
+import json
+import threading
+import time
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+import httpx
+from postgrest.types import ReturnMethod
+
+DEFAULT_CHUNK_SIZE = 500
+DEFAULT_MAX_IN_FLIGHT = 8
+DEFAULT_MAX_CHUNK_SIZE = 5000
+# A request slower than this shrinks the next chunk; one under half of it grows it
+DEFAULT_TARGET_SECONDS = 2.0
+DEFAULT_MAX_PAYLOAD_BYTES = 1_000_000
+DEFAULT_MAX_RETRIES = 3
+RETRY_BACKOFF_SECONDS = 0.5
+
+# Unique columns a retried plain insert can upsert on, so that a request
+# which reached the database before failing does not insert its rows twice
+NATURAL_KEYS = {
+    "users": "email",
+    "cases": "case_number",
+    "invoices": "invoice_number",
+    "law_firms": "name",
+    "practice_areas": "name",
+    "case_participants": "case_id,user_id",
+}
+
+# Postgres SQLSTATEs and PostgREST codes worth retrying as they are
+TRANSIENT_CODES = {"500", "502", "503", "40001", "40P01", "53300", "PGRST000", "PGRST001", "PGRST002", "PGRST003"}
+TIMEOUT_CODES = {"408", "504", "57014"}
+
+KeySpec = Union[str, Sequence[str]]
+
+
+class TableStats:
+    """Running totals for the rows written to one table."""
+
+    def __init__(self, table: str):
+        self.table = table
+        self.rows = 0
+        self.failed = 0
+        self.requests = 0
+        self.invalid = 0
+        self.retries = 0
+        self.splits = 0
+        # Time spent in requests, summed over requests that ran concurrently
+        self.seconds = 0.0
+        # perf_counter() when the first request started and the last one finished
+        self.first_started: Optional[float] = None
+        self.last_finished: Optional[float] = None
+
+    def record(self, started: float, finished: float) -> None:
+        """Count one request that ran from `started` to `finished`."""
+        self.requests += 1
+        self.seconds += finished - started
+        if self.first_started is None or started < self.first_started:
+            self.first_started = started
+        if self.last_finished is None or finished > self.last_finished:
+            self.last_finished = finished
+
+    @property
+    def wall_seconds(self) -> float:
+        if self.first_started is None:
+            return 0.0
+        return self.last_finished - self.first_started
+
+    @property
+    def rows_per_sec(self) -> float:
+        """Throughput over wall time, so chunks written concurrently are not counted twice."""
+        return self.rows / self.wall_seconds if self.wall_seconds else 0.0
+
+
+def _key_columns(key: Optional[KeySpec]) -> Tuple[str, ...]:
+    if not key:
+        return ()
+    if isinstance(key, str):
+        return tuple(column.strip() for column in key.split(","))
+    return tuple(key)
+
+
+def _key_of(row: Dict, columns: Tuple[str, ...]) -> Tuple:
+    return tuple(str(row.get(column)) for column in columns)
+
+
+def classify_error(error: Exception) -> str:
+    """Sort a failed request into "too_large", "timeout", "transient" or "permanent"."""
+    if isinstance(error, httpx.TimeoutException):
+        return "timeout"
+    if isinstance(error, httpx.TransportError):
+        return "transient"
+    code = str(getattr(error, "code", "") or "")
+    if code == "413" or "payload too large" in str(error).lower():
+        return "too_large"
+    if code in TIMEOUT_CODES:
+        return "timeout"
+    if code in TRANSIENT_CODES:
+        return "transient"
+    return "permanent"
+
+
+class ChunkSizer:
+    """The chunk size for one table, adjusted after every request.
+
+    Grows by half while requests finish well inside `target_seconds`,
+    shrinks in proportion when they take longer, halves when a request is
+    rejected as too large or times out, and never exceeds what fits in
+    `max_payload_bytes` at the average row size seen so far.
+    """
+
+    def __init__(self, size: int, max_size: int = DEFAULT_MAX_CHUNK_SIZE,
+                 target_seconds: float = DEFAULT_TARGET_SECONDS,
+                 max_payload_bytes: int = DEFAULT_MAX_PAYLOAD_BYTES):
+        self.size = size
+        self.max_size = max_size
+        self.target_seconds = target_seconds
+        self.max_payload_bytes = max_payload_bytes
+        self.row_bytes = 0.0
+
+    def observe_rows(self, rows: List[Dict]) -> None:
+        # One encoded row per request is enough to track the average row size
+        sample = len(json.dumps(rows[0], default=str))
+        self.row_bytes = sample if not self.row_bytes else 0.8 * self.row_bytes + 0.2 * sample
+
+    def fits(self, rows: int) -> bool:
+        return rows <= 1 or not self.row_bytes or rows * self.row_bytes <= self.max_payload_bytes
+
+    def succeeded(self, rows: int, seconds: float) -> None:
+        if seconds > self.target_seconds:
+            size = int(rows * self.target_seconds / seconds)
+        elif seconds < self.target_seconds / 2 and rows >= self.size:
+            size = int(self.size * 1.5) + 1
+        else:
+            size = self.size
+        if self.row_bytes:
+            size = min(size, int(self.max_payload_bytes / self.row_bytes))
+        self.size = max(1, min(size, self.max_size))
+
+    def rejected(self, rows: int) -> None:
+        self.size = max(1, min(self.size, rows // 2))
+
+
+def iter_chunks(rows: Iterable[Dict], size: int) -> Iterator[List[Dict]]:
+    """Yield lists of at most `size` rows without materialising the input."""
+    iterator = iter(rows)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class BulkWriter:
+    """Send rows to Supabase as multi-row inserts/upserts instead of one request per row.
+
+    The writer is shared by stages running on different threads, so the number
+    of requests on the wire at once is capped by `max_in_flight`. With a
+    `validator` (e.g. validation.split_valid), invalid rows are dropped from
+    each chunk before it is sent.
+
+    Unless a call passes its own `chunk_size`, each table's chunk size starts
+    at `chunk_size` and adapts to latency, payload size and errors (see
+    ChunkSizer). Chunks rejected as too large or timing out are split in
+    half and resent; transient errors are retried up to `max_retries` times.
+    A retry that could repeat rows the database already has is sent as an
+    upsert on the rows' natural key (NATURAL_KEYS, else their client-side
+    id), and rows with neither are not retried.
+    """
+
+    def __init__(self, client, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 max_in_flight: int = DEFAULT_MAX_IN_FLIGHT, index=None,
+                 validator: Optional[Callable[[str, List[Dict]], Tuple[List[Dict], Any]]] = None,
+                 max_chunk_size: int = DEFAULT_MAX_CHUNK_SIZE, target_seconds: float = DEFAULT_TARGET_SECONDS,
+                 max_payload_bytes: int = DEFAULT_MAX_PAYLOAD_BYTES, max_retries: int = DEFAULT_MAX_RETRIES):
+        self.client = client
+        self.chunk_size = chunk_size
+        # Optional LookupIndex kept up to date with every row written
+        self.index = index
+        self.validator = validator
+        self.max_chunk_size = max_chunk_size
+        self.target_seconds = target_seconds
+        self.max_payload_bytes = max_payload_bytes
+        self.max_retries = max_retries
+        # Optional SeedPlan that receives every chunk instead of the database (--plan)
+        self.recorder = None
+        self.stats: Dict[str, TableStats] = {}
+        self.sizers: Dict[str, ChunkSizer] = {}
+        self._in_flight = threading.BoundedSemaphore(max_in_flight)
+        self._stats_lock = threading.Lock()
+
+    def _table_stats(self, table: str) -> TableStats:
+        with self._stats_lock:
+            if table not in self.stats:
+                self.stats[table] = TableStats(table)
+            return self.stats[table]
+
+    def _sizer(self, table: str) -> ChunkSizer:
+        with self._stats_lock:
+            if table not in self.sizers:
+                self.sizers[table] = ChunkSizer(self.chunk_size, self.max_chunk_size, self.target_seconds,
+                                                self.max_payload_bytes)
+            return self.sizers[table]
+
+    def _chunks(self, table: str, rows: Iterable[Dict], chunk_size: Optional[int]) -> Iterator[List[Dict]]:
+        if chunk_size:
+            yield from iter_chunks(rows, chunk_size)
+            return
+        sizer = self._sizer(table)
+        iterator = iter(rows)
+        while True:
+            chunk = list(islice(iterator, sizer.size))
+            if not chunk:
+                return
+            yield chunk
+
+    def failed_rows(self, table: str) -> int:
+        return self._table_stats(table).failed
+
+    def set_max_in_flight(self, max_in_flight: int) -> None:
+        """Change the in-flight request cap; call before any stage starts writing."""
+        self._in_flight = threading.BoundedSemaphore(max_in_flight)
+
+    def _send(self, table: str, chunk: List[Dict], on_conflict: Optional[str],
+              ignore_duplicates: bool, returning: ReturnMethod) -> List[Dict]:
+        if self.recorder is not None:
+            return self.recorder.record_write(table, chunk, on_conflict, ignore_duplicates,
+                                              returning == ReturnMethod.representation)
+        query = self.client.table(table)
+        if on_conflict:
+            request = query.upsert(chunk, on_conflict=on_conflict,
+                                   ignore_duplicates=ignore_duplicates, returning=returning)
+        else:
+            request = query.insert(chunk, returning=returning)
+        return request.execute().data or []
+
+    def _validated(self, table: str, chunk: List[Dict], stats_key: Optional[str] = None) -> List[Dict]:
+        if self.validator is None:
+            return chunk
+        valid, report = self.validator(table, chunk)
+        if report.errors:
+            print(f"Skipping invalid rows, {report.summary()}")
+            stats = self._table_stats(stats_key or table)
+            with self._stats_lock:
+                stats.invalid += report.invalid
+        return valid
+
+    @staticmethod
+    def _retry_key(table: str, rows: List[Dict]) -> Optional[str]:
+        """The conflict target that makes resending `rows` idempotent, if they have one."""
+        for key in (NATURAL_KEYS.get(table), "id"):
+            if key and all(row.get(column) is not None for row in rows for column in key.split(",")):
+                return key
+        return None
+
+    def _attempt(self, table: str, rows: List[Dict], on_conflict: Optional[str], ignore_duplicates: bool,
+                 returning: ReturnMethod, stats_key: Optional[str] = None
+                 ) -> Tuple[Optional[List[Dict]], Optional[Exception], Optional[str]]:
+        """Send one request, retrying transient errors; returns (data, error, on_conflict used last)."""
+        stats = self._table_stats(stats_key or table)
+        sizer = self._sizer(table)
+        for attempt in range(self.max_retries + 1):
+            with self._in_flight:
+                started = time.perf_counter()
+                try:
+                    data, error = self._send(table, rows, on_conflict, ignore_duplicates, returning), None
+                except Exception as e:
+                    data, error = None, e
+                finished = time.perf_counter()
+                elapsed = finished - started
+            with self._stats_lock:
+                stats.record(started, finished)
+            if error is None:
+                with self._stats_lock:
+                    sizer.observe_rows(rows)
+                    sizer.succeeded(len(rows), elapsed)
+                return data, None, on_conflict
+            kind = classify_error(error)
+            if kind in ("permanent", "too_large"):
+                return None, error, on_conflict
+            # The failed request may still have been committed, so resend idempotently
+            on_conflict = on_conflict or self._retry_key(table, rows)
+            # Timed-out chunks are split by the caller; only single rows are retried here
+            if on_conflict is None or (kind == "timeout" and len(rows) > 1) or attempt == self.max_retries:
+                return None, error, on_conflict
+            with self._stats_lock:
+                stats.retries += 1
+            time.sleep(RETRY_BACKOFF_SECONDS * 2 ** attempt)
+
+    def _write_chunk(self, table: str, chunk: List[Dict], on_conflict: Optional[str],
+                     ignore_duplicates: bool, returning: ReturnMethod,
+                     stats_key: Optional[str] = None) -> List[Tuple[List[Dict], Optional[List[Dict]]]]:
+        """Write `chunk` and return it as (rows, data) pieces in input order.
+
+        `data` is None for a piece that could not be written. A piece that is
+        too large or times out is split in half until it is a single row.
+        """
+        stats = self._table_stats(stats_key or table)
+        sizer = self._sizer(table)
+        pending = [chunk]
+        pieces: List[Tuple[List[Dict], Optional[List[Dict]]]] = []
+        while pending:
+            rows = pending.pop(0)
+            if len(rows) > 1 and not sizer.fits(len(rows)):
+                # Split before sending rather than wait for a 413
+                with self._stats_lock:
+                    sizer.rejected(len(rows))
+                pending[:0] = [rows[:len(rows) // 2], rows[len(rows) // 2:]]
+                continue
+            data, error, retry_conflict = self._attempt(table, rows, on_conflict, ignore_duplicates, returning,
+                                                        stats_key)
+            kind = classify_error(error) if error is not None else None
+            if kind in ("too_large", "timeout") and len(rows) > 1:
+                if kind == "timeout" and retry_conflict is None:
+                    print(f"Error writing {len(rows)} rows to {table}: {str(error)} "
+                          f"(not retried: the rows have no natural key)")
+                    with self._stats_lock:
+                        stats.failed += len(rows)
+                    pieces.append((rows, None))
+                    continue
+                # A timed-out request may have been committed, so its halves are sent as upserts
+                on_conflict = retry_conflict
+                with self._stats_lock:
+                    sizer.rejected(len(rows))
+                    stats.splits += 1
+                pending[:0] = [rows[:len(rows) // 2], rows[len(rows) // 2:]]
+                continue
+            if error is not None:
+                data = None
+                print(f"Error writing {len(rows)} rows to {table}: {str(error)}")
+            with self._stats_lock:
+                if data is None:
+                    stats.failed += len(rows)
+                else:
+                    stats.rows += len(rows)
+            if data is not None and self.index is not None:
+                # Minimal returns carry no rows; the input rows hold client-side IDs
+                self.index.observe(table, data or rows)
+            pieces.append((rows, data))
+        return pieces
+
+    def write(self, table: str, rows: Iterable[Dict], on_conflict: Optional[str] = None,
+              ignore_duplicates: bool = False, key: Optional[KeySpec] = None,
+              chunk_size: Optional[int] = None) -> List[Optional[str]]:
+        """Write rows in chunks and return the generated IDs in input order.
+
+        Returned records are matched to input rows by `key` (defaults to the
+        `on_conflict` columns) or by position when no key is given. Rows that
+        failed, or were skipped because of `ignore_duplicates`, map to None.
+        """
+        columns = _key_columns(key or on_conflict)
+        ids: List[Optional[str]] = []
+        for chunk in self._chunks(table, rows, chunk_size):
+            valid = self._validated(table, chunk)
+            pieces = self._write_chunk(table, valid, on_conflict, ignore_duplicates,
+                                       ReturnMethod.representation) if valid else []
+            valid_ids: List[Optional[str]] = []
+            for piece, data in pieces:
+                if data is None:
+                    valid_ids += [None] * len(piece)
+                elif columns:
+                    by_key = {_key_of(record, columns): record.get("id") for record in data}
+                    valid_ids += [by_key.get(_key_of(row, columns)) for row in piece]
+                elif len(data) == len(piece):
+                    valid_ids += [record.get("id") for record in data]
+                else:
+                    print(f"Warning: {table} returned {len(data)} rows for {len(piece)} inserted, "
+                          f"pass key= to map IDs")
+                    valid_ids += [None] * len(piece)
+            if len(valid) == len(chunk):
+                ids.extend(valid_ids)
+            else:
+                # Invalid rows were never sent; they map to None like failed ones
+                by_row = {id(row): row_id for row, row_id in zip(valid, valid_ids)}
+                ids.extend(by_row.get(id(row)) for row in chunk)
+        return ids
+
+    def write_stream(self, table: str, rows: Iterable[Dict], on_conflict: Optional[str] = None,
+                     ignore_duplicates: bool = False, chunk_size: Optional[int] = None,
+                     on_written: Optional[Callable[[List[Dict]], None]] = None,
+                     on_progress: Optional[Callable[[int], None]] = None,
+                     stats_key: Optional[str] = None) -> int:
+        """Write rows in chunks without reading them back; returns the number written.
+
+        `rows` may be a generator: only one chunk is held in memory at a time.
+        `on_written` is called with every chunk that was written successfully.
+        `on_progress` is called with the number of input rows consumed so far,
+        for as long as every chunk up to that point has been written.
+        `stats_key` counts the rows under another name than `table` in the
+        report, e.g. for a second pass over rows that were already inserted.
+        """
+        written = 0
+        consumed = 0
+        contiguous = True
+        for chunk in self._chunks(table, rows, chunk_size):
+            consumed += len(chunk)
+            chunk = self._validated(table, chunk, stats_key)
+            pieces = self._write_chunk(table, chunk, on_conflict, ignore_duplicates,
+                                       ReturnMethod.minimal, stats_key) if chunk else []
+            ok = True
+            for piece, data in pieces:
+                if data is None:
+                    ok = False
+                    continue
+                written += len(piece)
+                if on_written:
+                    on_written(piece)
+            contiguous = contiguous and ok
+            if contiguous and on_progress:
+                on_progress(consumed)
+        return written
+
+    def report(self) -> None:
+        """Print rows/sec per table for everything written so far."""
+        if not self.stats:
+            return
+        print("\nBulk write summary:")
+        print(f"{'table':<24}{'rows':>10}{'failed':>8}{'invalid':>8}{'requests':>10}{'retries':>9}{'splits':>8}"
+              f"{'chunk':>7}{'seconds':>10}{'rows/sec':>12}")
+        for stats in self.stats.values():
+            sizer = self.sizers.get(stats.table)
+            print(f"{stats.table:<24}{stats.rows:>10}{stats.failed:>8}{stats.invalid:>8}{stats.requests:>10}"
+                  f"{stats.retries:>9}{stats.splits:>8}{sizer.size if sizer else '-':>7}"
+                  f"{stats.wall_seconds:>10.2f}{stats.rows_per_sec:>12.1f}")
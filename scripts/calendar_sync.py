@@ -0,0 +1,253 @@
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from local_store import cache_path
+from tracing import tracer
+
+# Requests per Microsoft Graph JSON batch and per Google API batch
+GRAPH_BATCH_SIZE = 20
+GOOGLE_BATCH_SIZE = 50
+
+# Zoom has no batch API, so meetings are created with a few parallel calls
+ZOOM_CONCURRENCY = 4
+
+# Provider name -> calendar_events column holding its ID
+PROVIDER_COLUMNS = {
+    'outlook': 'outlook_id',
+    'google': 'google_calendar_id',
+    'zoom': 'zoom_id',
+}
+
+
+def outlook_event(event_data: Dict) -> Dict:
+    return {
+        'subject': event_data['title'],
+        'body': {
+            'contentType': 'HTML',
+            'content': event_data['description']
+        },
+        'start': {
+            'dateTime': event_data['start_time'],
+            'timeZone': 'UTC'
+        },
+        'end': {
+            'dateTime': event_data['end_time'],
+            'timeZone': 'UTC'
+        },
+        'location': {
+            'displayName': event_data.get('location', '')
+        }
+    }
+
+
+def google_event(event_data: Dict) -> Dict:
+    return {
+        'summary': event_data['title'],
+        'description': event_data['description'],
+        'start': {
+            'dateTime': event_data['start_time'],
+            'timeZone': 'UTC',
+        },
+        'end': {
+            'dateTime': event_data['end_time'],
+            'timeZone': 'UTC',
+        },
+        'location': event_data.get('location', ''),
+    }
+
+
+class CalendarSyncLog:
+    """Local record of which provider succeeded or failed for each event.
+
+    A re-run only calls the providers that have no recorded external ID yet.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or cache_path("calendar_sync.sqlite")
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS provider_sync (
+                event_id TEXT NOT NULL,
+                provider TEXT NOT NULL,
+                external_id TEXT,
+                error TEXT,
+                PRIMARY KEY (event_id, provider)
+            )
+        """)
+        self._conn.commit()
+
+    def external_ids(self, event_ids: List[str]) -> Dict[str, Dict[str, str]]:
+        """Return {event_id: {provider: external_id}} for successful syncs."""
+        found: Dict[str, Dict[str, str]] = {}
+        with self._lock:
+            for start in range(0, len(event_ids), 500):
+                batch = event_ids[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT event_id, provider, external_id FROM provider_sync "
+                    f"WHERE external_id IS NOT NULL AND event_id IN ({placeholders})", batch
+                )
+                for event_id, provider, external_id in rows:
+                    found.setdefault(event_id, {})[provider] = external_id
+        return found
+
+    def record(self, provider: str, successes: Dict[str, str], failures: Dict[str, str]) -> None:
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO provider_sync VALUES (?, ?, ?, NULL)",
+                [(event_id, provider, external_id) for event_id, external_id in successes.items()],
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO provider_sync VALUES (?, ?, NULL, ?)",
+                [(event_id, provider, error) for event_id, error in failures.items()],
+            )
+            self._conn.commit()
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+class ProviderResult:
+    def __init__(self):
+        self.ids: Dict[str, str] = {}
+        self.errors: Dict[str, str] = {}
+
+
+class CalendarSync:
+    """Create events in Outlook, Google Calendar and Zoom concurrently, in batches."""
+
+    def __init__(self, graph_client=None, calendar_service=None, zoom_client=None,
+                 log: Optional[CalendarSyncLog] = None):
+        self.graph_client = graph_client
+        self.calendar_service = calendar_service
+        self.zoom_client = zoom_client
+        self.log = log or CalendarSyncLog()
+        self.created = {provider: 0 for provider in PROVIDER_COLUMNS}
+        self.failed = {provider: 0 for provider in PROVIDER_COLUMNS}
+
+    def _outlook(self, events: List[Dict]) -> ProviderResult:
+        result = ProviderResult()
+        for start in range(0, len(events), GRAPH_BATCH_SIZE):
+            batch = events[start:start + GRAPH_BATCH_SIZE]
+            requests = [
+                {
+                    'id': event['id'],
+                    'method': 'POST',
+                    'url': '/me/events',
+                    'body': outlook_event(event),
+                    'headers': {'Content-Type': 'application/json'},
+                }
+                for event in batch
+            ]
+            try:
+                with tracer.span("graph", "batch", "events", requests=len(requests)):
+                    response = self.graph_client.post('/$batch', json={'requests': requests})
+                for item in response.json().get('responses', []):
+                    if 200 <= item.get('status', 500) < 300:
+                        result.ids[item['id']] = item['body']['id']
+                    else:
+                        result.errors[item['id']] = f"HTTP {item.get('status')}: {item.get('body')}"
+            except Exception as e:
+                for event in batch:
+                    result.errors[event['id']] = str(e)
+        return result
+
+    def _google(self, events: List[Dict]) -> ProviderResult:
+        result = ProviderResult()
+
+        def callback(request_id, response, exception):
+            if exception is not None:
+                result.errors[request_id] = str(exception)
+            else:
+                result.ids[request_id] = response.get('id')
+
+        for start in range(0, len(events), GOOGLE_BATCH_SIZE):
+            batch_events = events[start:start + GOOGLE_BATCH_SIZE]
+            try:
+                batch = self.calendar_service.new_batch_http_request(callback=callback)
+                for event in batch_events:
+                    batch.add(self.calendar_service.events().insert(calendarId='primary',
+                                                                    body=google_event(event)),
+                              request_id=event['id'])
+                with tracer.span("google_calendar", "batch", "events", requests=len(batch_events)):
+                    batch.execute()
+            except Exception as e:
+                for event in batch_events:
+                    result.errors.setdefault(event['id'], str(e))
+        return result
+
+    def _zoom_one(self, event: Dict) -> str:
+        with tracer.span("zoom", "create", "meetings"):
+            meeting = self.zoom_client.meeting.create(
+                user_id='me',
+                topic=event['title'],
+                type=2,  # Scheduled meeting
+                start_time=event['start_time'],
+                duration=60,  # Default 1 hour
+                timezone='UTC'
+            )
+        return meeting['id']
+
+    def _zoom(self, events: List[Dict]) -> ProviderResult:
+        result = ProviderResult()
+        with ThreadPoolExecutor(max_workers=ZOOM_CONCURRENCY) as pool:
+            futures = {event['id']: pool.submit(self._zoom_one, event) for event in events}
+            for event_id, future in futures.items():
+                try:
+                    result.ids[event_id] = str(future.result())
+                except Exception as e:
+                    result.errors[event_id] = str(e)
+        return result
+
+    def sync(self, events: List[Dict]) -> List[Dict]:
+        """Create the events with every configured provider and return rows to write back.
+
+        Each returned row is the input event plus the provider IDs known for
+        it, including ones recorded by earlier runs. Providers with no ID are
+        left out rather than set to None, so the upsert on `id` never clears an
+        ID stored by some other run. Providers that already succeeded for an
+        event are skipped.
+        """
+        if not events:
+            return []
+        known = self.log.external_ids([event['id'] for event in events])
+        calls = {
+            'outlook': (self.graph_client, self._outlook, events),
+            'google': (self.calendar_service, self._google, events),
+            'zoom': (self.zoom_client, self._zoom, [e for e in events if e.get('is_virtual', False)]),
+        }
+
+        with ThreadPoolExecutor(max_workers=len(calls), thread_name_prefix="calendar-sync") as pool:
+            futures = {}
+            for provider, (client, create, candidates) in calls.items():
+                pending = [e for e in candidates if provider not in known.get(e['id'], {})]
+                if client and pending:
+                    futures[provider] = pool.submit(create, pending)
+
+            for provider, future in futures.items():
+                result = future.result()
+                self.log.record(provider, result.ids, result.errors)
+                self.created[provider] += len(result.ids)
+                self.failed[provider] += len(result.errors)
+                for event_id, external_id in result.ids.items():
+                    known.setdefault(event_id, {})[provider] = external_id
+                for event_id, error in result.errors.items():
+                    print(f"Error creating {provider} event for {event_id}: {error}")
+
+        rows = []
+        for event in events:
+            ids = known.get(event['id'])
+            if ids:
+                rows.append({**event, **{PROVIDER_COLUMNS[p]: external_id for p, external_id in ids.items()}})
+        return rows
+
+    def close(self) -> None:
+        self.log.close()
+
+    def report(self) -> None:
+        print("\nCalendar sync: " + ", ".join(
+            f"{provider} {self.created[provider]} created/{self.failed[provider]} failed"
+            for provider in PROVIDER_COLUMNS))
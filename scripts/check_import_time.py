@@ -0,0 +1,85 @@
+"""Fail if importing seed_database.py gets slower than the startup budget.
+
+Runs `python -X importtime -c "import seed_database"` in a fresh interpreter,
+reports the slowest imports and exits non-zero when the cumulative import time
+exceeds the budget or when an integration SDK is imported eagerly.
+
+    python check_import_time.py [--budget-ms 1500]
+"""
+import argparse
+import os
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+DEFAULT_BUDGET_MS = 1500
+
+# These SDKs must only be imported on first use (integrations registry, tracing)
+LAZY_MODULES = [
+    "twilio",
+    "sendgrid",
+    "slack_sdk",
+    "msgraph",
+    "azure.ai.textanalytics",
+    "google_auth_oauthlib",
+    "googleapiclient",
+    "zoomus",
+    "opentelemetry",
+]
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def measure_imports(module: str) -> List[Tuple[str, int, int]]:
+    """Return (module, self_us, cumulative_us) for every import made by `module`."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=SCRIPTS_DIR,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr}")
+
+    timings = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        timings.append((name.strip(), int(self_us), int(cumulative_us)))
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the import-time budget of seed_database.py")
+    parser.add_argument("--module", default="seed_database")
+    parser.add_argument("--budget-ms", type=int,
+                        default=int(os.getenv("SEED_IMPORT_BUDGET_MS", DEFAULT_BUDGET_MS)))
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    timings = measure_imports(args.module)
+    cumulative: Dict[str, int] = {name: total for name, _, total in timings}
+    total_ms = cumulative.get(args.module, 0) / 1000
+
+    print(f"Slowest imports for {args.module}:")
+    for name, _, total in sorted(timings, key=lambda t: t[2], reverse=True)[:args.top]:
+        print(f"  {total / 1000:>9.1f} ms  {name}")
+
+    failures = []
+    eager = sorted(name for name in cumulative
+                   if any(name == lazy or name.startswith(lazy + ".") for lazy in LAZY_MODULES))
+    if eager:
+        failures.append(f"integration SDKs imported eagerly: {', '.join(eager)}")
+    if total_ms > args.budget_ms:
+        failures.append(f"import took {total_ms:.1f} ms, budget is {args.budget_ms} ms")
+
+    if failures:
+        for failure in failures:
+            print(f"FAIL: {failure}")
+        sys.exit(1)
+    print(f"OK: {args.module} imported in {total_ms:.1f} ms (budget {args.budget_ms} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Seed the same scale through PostgREST and through COPY, and compare wall time.
+
+Point it at a local stack (e.g. `supabase start`) so both loaders hit the
+same Postgres: the REST path uses --supabase-url and --supabase-key, the
+COPY path uses --database-url. Both must be local; the comparison writes
+seed data and refuses to run against a hosted project. Each loader gets
+its own seed so both insert fresh rows rather than skipping existing ones.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+from typing import Optional
+from urllib.parse import urlsplit
+
+SEED_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "seed_database.py")
+LOCAL_HOSTS = {"localhost", "127.0.0.1", "::1", "host.docker.internal"}
+
+
+def is_local(url: str) -> bool:
+    return urlsplit(url).hostname in LOCAL_HOSTS
+
+
+def run_loader(loader: str, scale: str, seed: int, supabase_url: str, supabase_key: str,
+               database_url: str) -> Optional[float]:
+    """Seed through `loader` and return the wall time, or None if the seed failed."""
+    command = [sys.executable, SEED_SCRIPT, "--loader", loader, "--scale", scale,
+               "--seed", str(seed), "--no-integrations", "--hash-profile", "seed",
+               "--reuse-identical-hashes"]
+    if loader == "copy":
+        command += ["--database-url", database_url]
+    env = dict(os.environ, SEED_SUPABASE_URL=supabase_url, SEED_SUPABASE_KEY=supabase_key)
+    started = time.perf_counter()
+    result = subprocess.run(command, env=env)
+    elapsed = time.perf_counter() - started
+    if result.returncode != 0:
+        print(f"Error: {loader} loader exited with status {result.returncode}; no comparison made")
+        return None
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", default="firms=5,users_per_firm=20,cases_per_lawyer=4,"
+                                           "messages_per_case=20,notes_per_case=10,events_per_case=5")
+    parser.add_argument("--seed", type=int, default=1000)
+    parser.add_argument("--supabase-url", default=os.getenv('SEED_SUPABASE_URL', ''),
+                        help="local API URL, e.g. http://127.0.0.1:54321 (default: $SEED_SUPABASE_URL)")
+    parser.add_argument("--supabase-key", default=os.getenv('SEED_SUPABASE_KEY', ''),
+                        help="the local stack's service_role key (default: $SEED_SUPABASE_KEY)")
+    parser.add_argument("--database-url", default=os.getenv('SUPABASE_DB_URL', ''))
+    args = parser.parse_args()
+    for option, value in (("--supabase-url", args.supabase_url), ("--supabase-key", args.supabase_key),
+                          ("--database-url", args.database_url)):
+        if not value:
+            parser.error(f"{option} is required")
+    for option, value in (("--supabase-url", args.supabase_url), ("--database-url", args.database_url)):
+        if not is_local(value):
+            parser.error(f"{option} must point at a local stack, not {urlsplit(value).hostname}")
+
+    timings = {}
+    for loader, seed in (("rest", args.seed), ("copy", args.seed + 1)):
+        seconds = run_loader(loader, args.scale, seed, args.supabase_url, args.supabase_key, args.database_url)
+        if seconds is None:
+            sys.exit(1)
+        timings[loader] = seconds
+    print(f"\nLoader comparison ({args.scale}):")
+    for loader, seconds in timings.items():
+        print(f"{loader:<6}{seconds:>10.2f}s")
+    if timings["copy"]:
+        print(f"COPY speedup: {timings['rest'] / timings['copy']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from fake_services import FakeSupabase
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+@pytest.fixture
+def fake_supabase():
+    server = FakeSupabase().start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def supabase_client(fake_supabase):
+    from supabase import create_client
+    return create_client(fake_supabase.url, "test-key")
+
+
+@pytest.fixture
+def run_script(tmp_path):
+    """Run one of the scripts against a fake server, with its own cache directory."""
+    def run(script: str, server: FakeSupabase, *args: str, key: str = "test-key") -> subprocess.CompletedProcess:
+        env = dict(os.environ, SEED_SUPABASE_URL=server.url, SEED_SUPABASE_KEY=key,
+                   SEED_CACHE_DIR=str(tmp_path / "cache"), SEED_HASH_PROFILE="seed")
+        return subprocess.run([sys.executable, script, *args], cwd=SCRIPTS_DIR, env=env,
+                              capture_output=True, text=True, timeout=300)
+    return run
+
+
+@pytest.fixture
+def seed_database(fake_supabase, supabase_client, monkeypatch, tmp_path):
+    """The seed_database module with its clients pointed at a fake server and no integrations loaded."""
+    monkeypatch.setenv("SEED_CACHE_DIR", str(tmp_path / "cache"))
+    import seed_database as sd
+    from bulk_writer import BulkWriter
+    from id_allocator import BlockAllocator
+    from lookup_index import LookupIndex
+    from password_hashing import PasswordHasher
+    from validation import split_valid
+
+    client = supabase_client
+    lookups = LookupIndex(client)
+    monkeypatch.setattr(sd, "SUPABASE_URL", fake_supabase.url)
+    monkeypatch.setattr(sd, "supabase", client)
+    monkeypatch.setattr(sd, "lookups", lookups)
+    monkeypatch.setattr(sd, "bulk_writer", BulkWriter(client, chunk_size=50, index=lookups, validator=split_valid))
+    monkeypatch.setattr(sd, "number_allocator", BlockAllocator(client))
+    monkeypatch.setattr(sd, "password_hasher", PasswordHasher(profile="seed", workers=1))
+    monkeypatch.setattr(sd, "journal", None)
+    monkeypatch.setattr(sd.integrations, "_factories", dict(sd.integrations._factories))
+    monkeypatch.setattr(sd.integrations, "_clients", {})
+    monkeypatch.setattr(sd.integrations, "enabled", True)
+    return sd
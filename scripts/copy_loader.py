@@ -0,0 +1,122 @@
+import time
+from typing import Dict, Iterable, Iterator, Sequence
+
+from bulk_writer import TableStats
+from record_batch import RecordBatch
+from validation import filter_valid, filter_valid_batches, split_valid
+
+try:
+    import psycopg
+except ImportError:  # only needed for --loader=copy
+    psycopg = None
+
+# Tables in foreign-key dependency order; parents are copied before children
+COPY_ORDER = ["law_firms", "users", "cases", "case_participants", "messages", "notes", "calendar_events"]
+
+
+class CopyLoader:
+    """Load generated rows with COPY ... FROM STDIN over a direct Postgres connection.
+
+    Every table is streamed in FK order inside a single transaction, so a
+    failure leaves the database untouched. All IDs come from the generator,
+    so children reference parents without reading anything back.
+    """
+
+    def __init__(self, dsn: str, password_hasher=None):
+        if psycopg is None:
+            raise RuntimeError("--loader=copy needs psycopg: pip install 'psycopg[binary]'")
+        self.dsn = dsn
+        self.password_hasher = password_hasher
+        self.stats: Dict[str, TableStats] = {}
+
+    def _copy(self, cur, table: str, rows: Iterable[Dict]) -> int:
+        rows = iter(rows)
+        first = next(rows, None)
+        if first is None:
+            return 0
+        columns = list(first)
+        return self._copy_tuples(cur, table, columns,
+                                 ([row.get(column) for column in columns] for row in _chain(first, rows)))
+
+    def _copy_batches(self, cur, table: str, batches: Iterable[RecordBatch]) -> int:
+        """COPY straight from the batches' columns; no per-row dicts are built."""
+        batches = iter(batches)
+        first = next(batches, None)
+        if first is None:
+            return 0
+        columns = first.names
+        return self._copy_tuples(cur, table, columns,
+                                 (values for batch in _chain(first, batches) for values in batch.tuples(columns)))
+
+    def _copy_tuples(self, cur, table: str, columns: Sequence[str], rows: Iterable[Sequence]) -> int:
+        stats = self.stats.setdefault(table, TableStats(table))
+        started = time.perf_counter()
+        count = 0
+        with cur.copy(f"COPY {table} ({', '.join(columns)}) FROM STDIN") as copy:
+            for values in rows:
+                copy.write_row(values)
+                count += 1
+        stats.rows += count
+        stats.record(started, time.perf_counter())
+        print(f"Copied {count} rows into {table}")
+        return count
+
+    def _practice_areas(self, cur, names: Sequence[str]) -> Dict[str, str]:
+        cur.execute(
+            "INSERT INTO practice_areas (name, description) "
+            "SELECT name, 'Legal services related to ' || name FROM unnest(%s::text[]) AS name "
+            "ON CONFLICT (name) DO NOTHING",
+            (list(names),),
+        )
+        cur.execute("SELECT name, id FROM practice_areas WHERE name = ANY(%s)", (list(names),))
+        return {name: str(area_id) for name, area_id in cur.fetchall()}
+
+    def _hashed_user_batches(self, generator) -> Iterator[RecordBatch]:
+        """Each firm's valid users, with the password column replaced by its bcrypt hashes."""
+        for firm_index in generator.firm_indexes:
+            users, report = split_valid("users", generator.firm_user_batch(firm_index))
+            if report.errors:
+                print(f"Skipping invalid users, {report.summary()}")
+            columns = {name: values for name, values in users.columns.items() if name != "password"}
+            columns["password_hash"] = self.password_hasher.hash_many(users.column("password"))
+            yield RecordBatch(columns)
+
+    def load(self, generator) -> bool:
+        """Copy every generated entity; returns False (and rolls back) on any error."""
+        try:
+            with psycopg.connect(self.dsn) as conn:
+                with conn.transaction(), conn.cursor() as cur:
+                    area_ids = self._practice_areas(cur, generator.practice_areas)
+                    streams = {
+                        "law_firms": generator.firms(),
+                        "case_participants": generator.case_participants(),
+                    }
+                    batches = {
+                        "users": self._hashed_user_batches(generator),
+                        "cases": generator.case_batches(area_ids),
+                        "messages": generator.message_batches(),
+                        "notes": generator.note_batches(),
+                        "calendar_events": generator.calendar_event_batches(),
+                    }
+                    for table in COPY_ORDER:
+                        if table in batches:
+                            self._copy_batches(cur, table, filter_valid_batches(table, batches[table]))
+                        else:
+                            self._copy(cur, table, filter_valid(table, streams[table]))
+            return True
+        except Exception as e:
+            print(f"Error copying seed data, transaction rolled back: {str(e)}")
+            return False
+
+    def report(self) -> None:
+        print("\nCOPY loader summary:")
+        print(f"{'table':<20}{'rows':>10}{'seconds':>10}{'rows/s':>12}")
+        for table in COPY_ORDER:
+            stats = self.stats.get(table)
+            if stats:
+                print(f"{table:<20}{stats.rows:>10}{stats.wall_seconds:>10.2f}{stats.rows_per_sec:>12.0f}")
+
+
+def _chain(first, rest: Iterator) -> Iterator:
+    yield first
+    yield from rest
@@ -0,0 +1,352 @@
+import random
+import uuid
+from dataclasses import dataclass, fields
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Sequence
+
+from record_batch import Constant, RecordBatch, iter_rows
+
+DEFAULT_SEED = 20240101
+
+# Every generated timestamp is an offset from this instant, so output never
+# depends on when the generator runs.
+BASE_TIME = datetime(2024, 1, 1, 9, 0, 0)
+BASE_TIME_ISO = BASE_TIME.isoformat()
+
+FIRST_NAMES = ["James", "Mary", "Robert", "Patricia", "John", "Jennifer", "Michael", "Linda",
+               "David", "Elizabeth", "William", "Barbara", "Richard", "Susan", "Joseph", "Jessica",
+               "Thomas", "Sarah", "Charles", "Karen", "Daniel", "Nancy", "Matthew", "Lisa"]
+LAST_NAMES = ["Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis",
+              "Rodriguez", "Martinez", "Hernandez", "Lopez", "Gonzalez", "Wilson", "Anderson",
+              "Thomas", "Taylor", "Moore", "Jackson", "Martin", "Lee", "Perez", "Thompson", "White"]
+FIRM_SUFFIXES = ["LLP", "& Associates", "Law Group", "Legal", "& Partners", "PC"]
+CITIES = [("New York", "NY", "10001"), ("Chicago", "IL", "60601"), ("Boston", "MA", "02108"),
+          ("Austin", "TX", "78701"), ("Seattle", "WA", "98101"), ("Denver", "CO", "80202")]
+MATTERS = ["Merger", "Contract Dispute", "Estate", "Patent Filing", "Lease Review",
+           "Employment Claim", "Compliance Audit", "Acquisition", "Settlement", "Appeal"]
+MESSAGE_TYPES = ["text", "file", "system", "notification"]
+EVENT_TYPES = ["meeting", "court_date", "deadline", "reminder"]
+PRIORITIES = ["low", "medium", "high", "urgent"]
+
+
+@dataclass
+class ScaleConfig:
+    """How much data to generate. Defaults match the hand-written fixtures."""
+    firms: int = 1
+    users_per_firm: int = 4
+    cases_per_lawyer: int = 1
+    messages_per_case: int = 10
+    notes_per_case: int = 5
+    events_per_case: int = 3
+
+    @classmethod
+    def parse(cls, spec: str) -> "ScaleConfig":
+        """Parse "firms=10,users_per_firm=50,..." into a config."""
+        known = {field.name for field in fields(cls)}
+        values = {}
+        for part in filter(None, (p.strip() for p in spec.split(","))):
+            name, _, value = part.partition("=")
+            name = name.strip().replace("-", "_")
+            if name not in known:
+                raise ValueError(f"Unknown scale knob {name!r}, expected one of {sorted(known)}")
+            values[name] = int(value)
+        return cls(**values)
+
+    @property
+    def lawyers_per_firm(self) -> int:
+        return max(1, self.users_per_firm // 2)
+
+    @property
+    def cases_per_firm(self) -> int:
+        return self.lawyers_per_firm * self.cases_per_lawyer
+
+
+def _uuid(rng: random.Random) -> str:
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+
+def _timestamp(rng: random.Random, max_days: int) -> str:
+    return (BASE_TIME + timedelta(seconds=rng.randint(0, max_days * 86400))).isoformat()
+
+
+class SeedDataGenerator:
+    """Deterministic, streaming generator for every seeded entity.
+
+    Each firm is generated from its own RNG streams derived from (seed, firm),
+    so any firm can be produced independently and in any order, and two runs
+    with the same seed and scale produce identical rows, including the UUIDs
+    assigned client-side. Every table but law_firms and case_participants is
+    built as one columnar RecordBatch per firm and can be read as batches or
+    as rows; a firm's users and cases are regenerated on demand rather than
+    kept around.
+    """
+
+    def __init__(self, scale: Optional[ScaleConfig] = None, seed: int = DEFAULT_SEED,
+                 practice_areas: Sequence[str] = (), firm_indexes: Optional[Sequence[int]] = None):
+        self.scale = scale or ScaleConfig()
+        self.seed = seed
+        self.practice_areas = list(practice_areas) or ["Corporate Law"]
+        # The whole-dataset streams cover only these firms; the default is every firm
+        self.firm_indexes = list(firm_indexes) if firm_indexes is not None else list(range(self.scale.firms))
+
+    def shard(self, shard: int, shards: int) -> "SeedDataGenerator":
+        """A generator for every `shards`-th firm starting at `shard`; shards never share rows."""
+        return SeedDataGenerator(self.scale, self.seed, self.practice_areas,
+                                 firm_indexes=self.firm_indexes[shard::shards])
+
+    def _rng(self, firm_index: int, stream: str) -> random.Random:
+        return random.Random(f"{self.seed}:{firm_index}:{stream}")
+
+    # Per-firm building blocks
+
+    def firm(self, firm_index: int) -> Dict:
+        rng = self._rng(firm_index, "firm")
+        city, state, zip_code = rng.choice(CITIES)
+        partner = rng.choice(LAST_NAMES)
+        slug = f"{partner.lower()}{firm_index + 1}"
+        return {
+            "id": _uuid(rng),
+            "name": f"{partner} {rng.choice(FIRM_SUFFIXES)} #{firm_index + 1}",
+            "address": f"{rng.randint(1, 999)} Legal Street",
+            "city": city,
+            "state": state,
+            "zip_code": zip_code,
+            "phone_number": f"212-555-{rng.randint(0, 9999):04d}",
+            "email": f"contact@{slug}.example.com",
+            "website": f"https://www.{slug}.example.com",
+        }
+
+    def firm_user_batch(self, firm_index: int) -> RecordBatch:
+        rng = self._rng(firm_index, "users")
+        lawyers = self.scale.lawyers_per_firm
+        paralegals = max(0, (self.scale.users_per_firm - lawyers) // 3)
+        ids, emails, first_names, last_names, roles, phones, passwords, avatars = ([] for _ in range(8))
+        for n in range(max(self.scale.users_per_firm, lawyers + 1)):
+            if n < lawyers:
+                role = "lawyer"
+            elif n < lawyers + paralegals:
+                role = "paralegal"
+            else:
+                role = "client"
+            first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+            ids.append(_uuid(rng))
+            emails.append(f"{first.lower()}.{last.lower()}.{firm_index + 1}.{n + 1}@seed.example.com")
+            first_names.append(first)
+            last_names.append(last)
+            roles.append(role)
+            phones.append(f"212-555-{rng.randint(0, 9999):04d}")
+            passwords.append(f"Seed-{firm_index + 1}-{n + 1}!")
+            avatars.append(f"https://ui-avatars.com/api/?name={first}+{last}&background=random")
+        return RecordBatch({
+            "id": ids,
+            "email": emails,
+            "first_name": first_names,
+            "last_name": last_names,
+            "role": roles,
+            "phone_number": phones,
+            "password": passwords,
+            "avatar_url": avatars,
+        })
+
+    def firm_case_batch(self, firm_index: int, practice_area_ids: Optional[Dict[str, str]] = None) -> RecordBatch:
+        rng = self._rng(firm_index, "cases")
+        firm_id = self.firm(firm_index)["id"]
+        lawyers = [u for u in self.firm_users(firm_index) if u["role"] == "lawyer"]
+        ids, titles, descriptions, statuses, area_ids, assignees, numbers = ([] for _ in range(7))
+        priorities, opened_on, completions, rates = ([] for _ in range(4))
+        for n in range(self.scale.cases_per_firm):
+            lawyer = lawyers[n % len(lawyers)]
+            area = rng.choice(self.practice_areas)
+            opened = BASE_TIME - timedelta(days=rng.randint(30, 720))
+            sequence = firm_index * self.scale.cases_per_firm + n + 1
+            # Drawn in the same order as when cases were built as dicts, so the values are unchanged
+            ids.append(_uuid(rng))
+            titles.append(f"{rng.choice(LAST_NAMES)} {rng.choice(MATTERS)}")
+            descriptions.append(f"{area} matter handled by {lawyer['first_name']} {lawyer['last_name']}")
+            statuses.append(rng.choice(["open", "open", "pending", "closed"]))
+            area_ids.append((practice_area_ids or {}).get(area))
+            assignees.append(lawyer["id"])
+            numbers.append(f"{area[:4].upper()}-{opened.year}-{sequence:03d}")
+            priorities.append(rng.choice(PRIORITIES))
+            opened_on.append(opened.date().isoformat())
+            completions.append((opened + timedelta(days=rng.randint(60, 540))).date().isoformat())
+            rates.append(float(rng.choice([150, 225, 275, 350, 450, 600])))
+        return RecordBatch({
+            "id": ids,
+            "title": titles,
+            "description": descriptions,
+            "status": statuses,
+            "practice_area_id": area_ids,
+            "firm_id": Constant(firm_id),
+            "assigned_to": assignees,
+            "case_number": numbers,
+            "priority": priorities,
+            "open_date": opened_on,
+            "estimated_completion_date": completions,
+            "billing_rate": rates,
+            "created_by": assignees,
+        })
+
+    def firm_users(self, firm_index: int) -> List[Dict]:
+        return list(self.firm_user_batch(firm_index).rows())
+
+    def firm_cases(self, firm_index: int, practice_area_ids: Optional[Dict[str, str]] = None) -> List[Dict]:
+        return list(self.firm_case_batch(firm_index, practice_area_ids).rows())
+
+    def firm_case_participants(self, firm_index: int) -> Iterator[Dict]:
+        rng = self._rng(firm_index, "participants")
+        users = self.firm_users(firm_index)
+        users_by_id = {u["id"]: u for u in users}
+        clients = [u for u in users if u["role"] == "client"]
+        for case in self.firm_cases(firm_index):
+            lawyer = users_by_id[case["assigned_to"]]
+            participants = {lawyer["id"]: lawyer}
+            if clients:
+                client = rng.choice(clients)
+                participants[client["id"]] = client
+            for extra in rng.sample(users, min(len(users), rng.randint(1, 2))):
+                participants.setdefault(extra["id"], extra)
+            for user in participants.values():
+                yield {"case_id": case["id"], "user_id": user["id"], "role": user["role"]}
+
+    def firm_message_batch(self, firm_index: int) -> RecordBatch:
+        rng = self._rng(firm_index, "messages")
+        users = self.firm_users(firm_index)
+        ids, case_ids, sender_ids, recipient_ids, types, contents, read, created = ([] for _ in range(8))
+        for case in self.firm_cases(firm_index):
+            about = f" about {case['title']}"
+            for _ in range(self.scale.messages_per_case):
+                sender, recipient = rng.sample(users, 2)
+                created.append(_timestamp(rng, 365))
+                ids.append(_uuid(rng))
+                case_ids.append(case["id"])
+                sender_ids.append(sender["id"])
+                recipient_ids.append(recipient["id"])
+                types.append(rng.choice(MESSAGE_TYPES))
+                contents.append(f"Message from {sender['email']}{about}")
+                read.append(rng.random() < 0.5)
+        return RecordBatch({
+            "id": ids,
+            "case_id": case_ids,
+            "sender_id": sender_ids,
+            "recipient_id": recipient_ids,
+            "message_type": types,
+            "content": contents,
+            "read": read,
+            "created_at": created,
+            "updated_at": created,
+        })
+
+    def firm_note_batch(self, firm_index: int) -> RecordBatch:
+        rng = self._rng(firm_index, "notes")
+        users = self.firm_users(firm_index)
+        ids, case_ids, user_ids, contents, private, created = ([] for _ in range(6))
+        for case in self.firm_cases(firm_index):
+            about = f" about {case['title']}"
+            for _ in range(self.scale.notes_per_case):
+                author = rng.choice(users)
+                created.append(_timestamp(rng, 365))
+                ids.append(_uuid(rng))
+                case_ids.append(case["id"])
+                user_ids.append(author["id"])
+                contents.append(f"Note from {author['email']}{about}")
+                private.append(rng.random() < 0.5)
+        return RecordBatch({
+            "id": ids,
+            "case_id": case_ids,
+            "user_id": user_ids,
+            "content": contents,
+            "is_private": private,
+            "created_at": created,
+            "updated_at": created,
+        })
+
+    def firm_calendar_event_batch(self, firm_index: int) -> RecordBatch:
+        rng = self._rng(firm_index, "events")
+        users = self.firm_users(firm_index)
+        ids, case_ids, user_ids, titles, descriptions, starts, ends, virtual, types = ([] for _ in range(9))
+        for case in self.firm_cases(firm_index):
+            title = f"Meeting for {case['title']}"
+            for _ in range(self.scale.events_per_case):
+                organizer = rng.choice(users)
+                start = BASE_TIME + timedelta(days=rng.randint(1, 90), hours=rng.randint(8, 17))
+                end = start + timedelta(hours=rng.randint(1, 4))
+                ids.append(_uuid(rng))
+                case_ids.append(case["id"])
+                user_ids.append(organizer["id"])
+                titles.append(title)
+                descriptions.append(f"Event organized by {organizer['email']}")
+                starts.append(start.isoformat())
+                ends.append(end.isoformat())
+                virtual.append(rng.random() < 0.7)
+                types.append(rng.choice(EVENT_TYPES))
+        return RecordBatch({
+            "id": ids,
+            "case_id": case_ids,
+            "user_id": user_ids,
+            "title": titles,
+            "description": descriptions,
+            "start_time": starts,
+            "end_time": ends,
+            "location": Constant("Virtual Meeting"),
+            "is_virtual": virtual,
+            "type": types,
+            "created_at": Constant(BASE_TIME_ISO),
+            "updated_at": Constant(BASE_TIME_ISO),
+        })
+
+    def firm_messages(self, firm_index: int) -> Iterator[Dict]:
+        return self.firm_message_batch(firm_index).rows()
+
+    def firm_notes(self, firm_index: int) -> Iterator[Dict]:
+        return self.firm_note_batch(firm_index).rows()
+
+    def firm_calendar_events(self, firm_index: int) -> Iterator[Dict]:
+        return self.firm_calendar_event_batch(firm_index).rows()
+
+    # Whole-dataset streams, firm by firm
+
+    def firms(self) -> Iterator[Dict]:
+        for firm_index in self.firm_indexes:
+            yield self.firm(firm_index)
+
+    def users(self) -> Iterator[Dict]:
+        return iter_rows(self.user_batches())
+
+    def cases(self, practice_area_ids: Optional[Dict[str, str]] = None) -> Iterator[Dict]:
+        return iter_rows(self.case_batches(practice_area_ids))
+
+    def case_participants(self) -> Iterator[Dict]:
+        for firm_index in self.firm_indexes:
+            yield from self.firm_case_participants(firm_index)
+
+    def messages(self) -> Iterator[Dict]:
+        return iter_rows(self.message_batches())
+
+    def notes(self) -> Iterator[Dict]:
+        return iter_rows(self.note_batches())
+
+    def calendar_events(self) -> Iterator[Dict]:
+        return iter_rows(self.calendar_event_batches())
+
+    # The same streams as one RecordBatch per firm, for consumers that never need dicts
+
+    def user_batches(self) -> Iterator[RecordBatch]:
+        for firm_index in self.firm_indexes:
+            yield self.firm_user_batch(firm_index)
+
+    def case_batches(self, practice_area_ids: Optional[Dict[str, str]] = None) -> Iterator[RecordBatch]:
+        for firm_index in self.firm_indexes:
+            yield self.firm_case_batch(firm_index, practice_area_ids)
+
+    def message_batches(self) -> Iterator[RecordBatch]:
+        for firm_index in self.firm_indexes:
+            yield self.firm_message_batch(firm_index)
+
+    def note_batches(self) -> Iterator[RecordBatch]:
+        for firm_index in self.firm_indexes:
+            yield self.firm_note_batch(firm_index)
+
+    def calendar_event_batches(self) -> Iterator[RecordBatch]:
+        for firm_index in self.firm_indexes:
+            yield self.firm_calendar_event_batch(firm_index)
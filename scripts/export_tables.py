@@ -0,0 +1,351 @@
+"""Stream Supabase tables to Parquet or NDJSON files for analysis.
+
+Each table is read in (updated_at, id) keyset order, one page at a time, and
+every page is written out before the next is fetched, so memory use depends
+on the page size rather than the table size. With --incremental, only rows
+changed since the last successful export of that table are fetched. Rows
+whose updated_at is NULL sort first, so an incremental export only picks up
+new ones while its watermark is still among them.
+
+    python export_tables.py matters,time_entries --format parquet --incremental
+"""
+import argparse
+import gzip
+import json
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from dotenv import load_dotenv
+
+from local_store import cache_path
+from schema_cache import fetch_snapshot
+from tracing import tracer
+
+DEFAULT_TABLES = ["matters", "time_entries", "documents", "messages", "user_metrics"]
+DEFAULT_PAGE_SIZE = 1000
+FORMATS = ("parquet", "ndjson")
+
+# Postgres column types (as in information_schema.columns.data_type) stored as
+# the matching Arrow type; every other type, timestamps and jsonb included, is text
+ARROW_TYPES = {
+    "smallint": "int16",
+    "integer": "int32",
+    "bigint": "int64",
+    "real": "float32",
+    "double precision": "float64",
+    "numeric": "float64",
+    "boolean": "bool_",
+}
+
+
+class ExportWatermarks:
+    """SQLite record of the last (updated_at, id) exported per table, format and projection.
+
+    A NULL updated_at is stored as an empty string.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or cache_path("export_watermarks.sqlite")
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS watermarks (
+                export TEXT PRIMARY KEY,
+                updated_at TEXT NOT NULL,
+                id TEXT NOT NULL,
+                exported_at REAL NOT NULL
+            )
+        """)
+        self._conn.commit()
+
+    def get(self, export: str) -> Optional[Tuple[Optional[str], str]]:
+        with self._lock:
+            row = self._conn.execute("SELECT updated_at, id FROM watermarks WHERE export = ?",
+                                     (export,)).fetchone()
+        return (row[0] or None, row[1]) if row else None
+
+    def save(self, export: str, updated_at: Optional[str], row_id: str) -> None:
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO watermarks VALUES (?, ?, ?, ?)",
+                               (export, updated_at or "", row_id, time.time()))
+            self._conn.commit()
+
+    def clear(self, export: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM watermarks WHERE export = ?", (export,))
+            self._conn.commit()
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+class NdjsonWriter:
+    """One JSON object per line; gzip-compressed when the path ends in .gz."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = gzip.open(path, "wt", encoding="utf-8") if path.endswith(".gz") else open(path, "w")
+
+    def write(self, rows: List[Dict]) -> None:
+        self._file.writelines(json.dumps(row, default=str) + "\n" for row in rows)
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class ParquetWriter:
+    """Append pages as row groups of one Parquet file.
+
+    Column types come from `column_types` (column -> Postgres type, from the
+    schema catalog) where known, and otherwise from the first page: booleans
+    stay booleans, numbers are stored as doubles and everything else, including
+    columns that are null throughout the first page, as text. Values in text
+    columns that are not strings (numbers, JSON objects and arrays) are written
+    as JSON text, so a later page can never conflict with the schema.
+    """
+
+    def __init__(self, path: str, compression: str = "zstd", column_types: Optional[Dict[str, str]] = None):
+        try:
+            # Imported here so NDJSON exports work without pyarrow installed
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise RuntimeError("Parquet export needs pyarrow (pip install pyarrow), or use --format ndjson")
+        self._pa = pyarrow
+        self._pq = pyarrow.parquet
+        self.path = path
+        self.compression = compression
+        self.column_types = column_types or {}
+        self._writer = None
+        self._schema = None
+        self._text_columns = set()
+
+    def _field(self, column: str, values: List):
+        pa = self._pa
+        if column in self.column_types:
+            arrow_type = ARROW_TYPES.get(self.column_types[column])
+            return pa.field(column, getattr(pa, arrow_type)() if arrow_type else pa.string())
+        present = [value for value in values if value is not None]
+        if present and all(isinstance(value, bool) for value in present):
+            return pa.field(column, pa.bool_())
+        if present and all(isinstance(value, (int, float)) and not isinstance(value, bool) for value in present):
+            return pa.field(column, pa.float64())
+        return pa.field(column, pa.string())
+
+    def _as_text(self, rows: List[Dict]) -> List[Dict]:
+        text = self._text_columns
+        return [{column: json.dumps(value) if column in text and value is not None and not isinstance(value, str)
+                 else value for column, value in row.items()} for row in rows]
+
+    def write(self, rows: List[Dict]) -> None:
+        pa = self._pa
+        if self._schema is None:
+            fields = [self._field(column, [row.get(column) for row in rows]) for column in rows[0]]
+            self._schema = pa.schema(fields)
+            self._text_columns = {field.name for field in self._schema if pa.types.is_string(field.type)}
+            self._writer = self._pq.ParquetWriter(self.path, self._schema, compression=self.compression)
+        self._writer.write_table(pa.Table.from_pylist(self._as_text(rows), schema=self._schema))
+
+    def close(self) -> None:
+        # No file is created for an export without rows
+        if self._writer is not None:
+            self._writer.close()
+
+
+class TableExport:
+    def __init__(self, table: str, path: str):
+        self.table = table
+        self.path = path
+        self.rows = 0
+        self.pages = 0
+        self.seconds = 0.0
+        self.since: Optional[str] = None
+        self.error: Optional[str] = None
+
+
+class TableExporter:
+    """Export tables page by page with keyset pagination on (updated_at, id).
+
+    Ordering by updated_at rather than id means a row updated while the
+    export runs moves ahead of the cursor and is picked up later, and it
+    lets the last exported (updated_at, id) serve as the incremental
+    watermark. The watermark only advances once a table's file is complete.
+    Rows with a NULL updated_at come first, ordered by id.
+    """
+
+    def __init__(self, client, out_dir: str, fmt: str = "parquet", columns: Optional[Sequence[str]] = None,
+                 page_size: int = DEFAULT_PAGE_SIZE, incremental: bool = False,
+                 watermarks: Optional[ExportWatermarks] = None, tables_in_parallel: int = 2):
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown export format {fmt!r}, expected one of {FORMATS}")
+        self.client = client
+        self.out_dir = out_dir
+        self.fmt = fmt
+        self.columns = list(columns) if columns else None
+        self.page_size = page_size
+        self.incremental = incremental
+        self.watermarks = watermarks or ExportWatermarks()
+        self.tables_in_parallel = tables_in_parallel
+        self.exports: Dict[str, TableExport] = {}
+        # table -> column -> Postgres type, for the Parquet schema
+        self.column_types: Dict[str, Dict[str, str]] = {}
+
+    def _select(self) -> str:
+        if not self.columns:
+            return "*"
+        return ",".join(dict.fromkeys(self.columns + ["id", "updated_at"]))
+
+    def _page(self, table: str, after: Optional[Tuple[str, str]]) -> List[Dict]:
+        query = self.client.table(table).select(self._select())
+        if after is not None:
+            updated_at, row_id = after
+            if updated_at is None:
+                query = query.or_(f'updated_at.not.is.null,and(updated_at.is.null,id.gt.{row_id})')
+            else:
+                query = query.or_(f'updated_at.gt."{updated_at}",'
+                                  f'and(updated_at.eq."{updated_at}",id.gt.{row_id})')
+        query = query.order("updated_at", nullsfirst=True).order("id")
+        return query.limit(self.page_size).execute().data
+
+    def watermark_key(self, table: str) -> str:
+        """Watermarks are kept per table, format and projection."""
+        return ":".join([table, self.fmt] + ([",".join(self.columns)] if self.columns else []))
+
+    def _path(self, table: str) -> str:
+        extension = "parquet" if self.fmt == "parquet" else "ndjson.gz"
+        if self.incremental:
+            stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+            return os.path.join(self.out_dir, f"{table}-{stamp}.{extension}")
+        return os.path.join(self.out_dir, f"{table}.{extension}")
+
+    def export_table(self, table: str) -> TableExport:
+        export = TableExport(table, self._path(table))
+        self.exports[table] = export
+        key = self.watermark_key(table)
+        after = self.watermarks.get(key) if self.incremental else None
+        export.since = after[0] if after else None
+        started = time.perf_counter()
+        if self.fmt == "parquet":
+            writer = ParquetWriter(export.path, column_types=self.column_types.get(table))
+        else:
+            writer = NdjsonWriter(export.path)
+        last = after
+        try:
+            while True:
+                page = self._page(table, last)
+                if not page:
+                    break
+                last = (page[-1].get("updated_at"), page[-1]["id"])
+                if self.columns:
+                    page = [{column: row.get(column) for column in self.columns} for row in page]
+                writer.write(page)
+                export.rows += len(page)
+                export.pages += 1
+                if len(page) < self.page_size:
+                    break
+        except Exception as e:
+            export.error = str(e)
+            print(f"Error exporting {table}: {str(e)}")
+        finally:
+            writer.close()
+            export.seconds = time.perf_counter() - started
+        if export.error is None and last is not None and last != after:
+            self.watermarks.save(key, last[0], last[1])
+        if export.rows == 0 and os.path.exists(export.path) and self.incremental:
+            os.remove(export.path)
+        return export
+
+    def load_column_types(self) -> None:
+        """Read every table's column types from the schema catalog in one call."""
+        try:
+            snapshot = fetch_snapshot(self.client)
+        except Exception as e:
+            print(f"Schema catalog unavailable, taking Parquet column types from the data: {str(e)}")
+            return
+        self.column_types = {table: {column["column"]: column["type"] for column in columns}
+                             for table, columns in snapshot.columns.items()}
+
+    def run(self, tables: Sequence[str]) -> None:
+        os.makedirs(self.out_dir, exist_ok=True)
+        if self.fmt == "parquet" and not self.column_types:
+            self.load_column_types()
+        with ThreadPoolExecutor(max_workers=self.tables_in_parallel) as pool:
+            list(pool.map(self.export_table, tables))
+
+    @property
+    def failed(self) -> List[str]:
+        return [table for table, export in self.exports.items() if export.error]
+
+    def report(self) -> None:
+        print("\nExport summary:")
+        print(f"{'table':<22}{'rows':>10}{'pages':>7}{'seconds':>9}{'rows/sec':>11}  file")
+        for export in self.exports.values():
+            rate = export.rows / export.seconds if export.seconds else 0.0
+            if export.error:
+                target = f"FAILED: {export.error}"
+            elif export.rows or not self.incremental:
+                target = export.path
+            else:
+                target = f"(no changes since {export.since})"
+            print(f"{export.table:<22}{export.rows:>10}{export.pages:>7}{export.seconds:>9.2f}{rate:>11.1f}"
+                  f"  {target}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Export Supabase tables to Parquet or NDJSON.")
+    parser.add_argument("tables", nargs="?", default=",".join(DEFAULT_TABLES),
+                        help=f"Comma-separated tables (default: {','.join(DEFAULT_TABLES)})")
+    parser.add_argument("--format", choices=FORMATS, default="parquet",
+                        help="parquet needs pyarrow; ndjson is written gzip-compressed")
+    parser.add_argument("--columns", default=None,
+                        help="Comma-separated columns to export (default: all)")
+    parser.add_argument("--out-dir", default="exports")
+    parser.add_argument("--page-size", type=int, default=DEFAULT_PAGE_SIZE)
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only export rows whose updated_at is past the last export's watermark")
+    parser.add_argument("--reset-watermarks", action="store_true",
+                        help="Forget the stored watermarks for these tables before exporting")
+    parser.add_argument("--tables-in-parallel", type=int, default=2)
+    parser.add_argument("--trace", nargs="?", const="", default=None, metavar="console|FILE",
+                        help="Count and time every Supabase call and print a summary; with a value, "
+                             "also export spans to stdout or a file")
+    return parser.parse_args()
+
+
+def main():
+    from supabase import create_client
+
+    args = parse_args()
+    load_dotenv()
+    client = create_client(
+        os.getenv('NEXT_PUBLIC_SUPABASE_URL', ''),
+        os.getenv('SUPABASE_SERVICE_ROLE_KEY', '')
+    )
+    if args.trace is not None:
+        tracer.configure(args.trace)
+        tracer.instrument_supabase(client)
+
+    tables = [table.strip() for table in args.tables.split(",") if table.strip()]
+    columns = [column.strip() for column in args.columns.split(",")] if args.columns else None
+    exporter = TableExporter(client, args.out_dir, args.format, columns=columns, page_size=args.page_size,
+                             incremental=args.incremental, tables_in_parallel=args.tables_in_parallel)
+    if args.reset_watermarks:
+        for table in tables:
+            exporter.watermarks.clear(exporter.watermark_key(table))
+    exporter.run(tables)
+    exporter.report()
+    exporter.watermarks.close()
+    if tracer.enabled:
+        tracer.report()
+        tracer.close()
+    if exporter.failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
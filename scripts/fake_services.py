@@ -0,0 +1,449 @@
+"""Local stand-ins for Supabase and the third-party APIs, for benchmarks.
+
+`FakeSupabase` is a threaded HTTP server that speaks enough of the PostgREST
+protocol for the seeding scripts (select/insert/upsert/update/delete with the
+usual filters and or/and trees, RPC calls and the reserve_number_block
+counter) plus the SendGrid, Twilio and Slack endpoints the notification
+dispatcher posts to. Every request is tallied under the stage named in its
+X-Bench-Stage header. The fake Graph, Google Calendar,
+Zoom and Azure clients run in-process and sleep to simulate API latency.
+"""
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+STAGE_HEADER = "X-Bench-Stage"
+
+# Unique constraints enforced on plain inserts, as in create_tables.sql
+UNIQUE_KEYS = {
+    "law_firms": [("name",)],
+    "practice_areas": [("name",)],
+    "users": [("email",)],
+    "cases": [("case_number",)],
+}
+
+RESERVED_PARAMS = {"select", "order", "limit", "offset", "on_conflict", "columns"}
+
+
+def _text(value) -> str:
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return str(value)
+
+
+def _unquote(value: str) -> str:
+    return value[1:-1] if len(value) >= 2 and value[0] == value[-1] == '"' else value
+
+
+def _split_top_level(text: str) -> List[str]:
+    """Split a PostgREST logic tree on the commas that are not nested or quoted."""
+    parts, depth, quoted, start = [], 0, False, 0
+    for i, char in enumerate(text):
+        if char == '"':
+            quoted = not quoted
+        elif not quoted and char == "(":
+            depth += 1
+        elif not quoted and char == ")":
+            depth -= 1
+        elif not quoted and char == "," and depth == 0:
+            parts.append(text[start:i])
+            start = i + 1
+    parts.append(text[start:])
+    return parts
+
+
+def _matches_tree(row: Dict, operator: str, tree: str) -> bool:
+    """Evaluate or=(...)/and=(...) conditions such as `a.gt.1,and(a.eq.1,id.gt.x)`."""
+    results = []
+    for part in _split_top_level(tree[1:-1]):
+        if part.startswith(("or(", "and(")):
+            nested, _, rest = part.partition("(")
+            results.append(_matches_tree(row, nested, "(" + rest))
+        else:
+            column, _, expression = part.partition(".")
+            results.append(_matches(row, column, expression))
+    return any(results) if operator == "or" else all(results)
+
+
+def _matches(row: Dict, column: str, expression: str) -> bool:
+    if column in ("or", "and"):
+        return _matches_tree(row, column, expression)
+    op, _, value = expression.partition(".")
+    if op == "not":
+        # NOT of a comparison with NULL is still not true
+        return (row.get(column) is not None or value.startswith("is.")) and not _matches(row, column, value)
+    actual = _text(row.get(column))
+    if op == "in":
+        return actual in {_unquote(v) for v in value.strip("()").split(",")}
+    if op == "is":
+        return actual == value
+    if row.get(column) is None:
+        # As in SQL, a comparison with NULL is never true
+        return False
+    value = _unquote(value)
+    if op == "eq":
+        return actual == value
+    if op == "neq":
+        return actual != value
+    if op == "gt":
+        return actual > value
+    if op == "gte":
+        return actual >= value
+    if op == "lt":
+        return actual < value
+    if op == "lte":
+        return actual <= value
+    raise ValueError(f"Unsupported filter operator: {op}")
+
+
+class StageStats:
+    def __init__(self):
+        self.requests = 0
+        self.rows = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def as_dict(self) -> Dict:
+        return dict(self.__dict__)
+
+
+class FakeSupabase:
+    """In-memory PostgREST (and notification API) server on a background thread.
+
+    For exercising retries, `max_body_bytes` rejects larger requests with a
+    413 as a proxy in front of PostgREST would, and `flaky_writes` is the
+    fraction of inserts that are committed but answered with a 503, like a
+    request whose response is lost. Notification API calls are kept in
+    `api_requests`, and `api_failures` holds statuses to answer the next ones
+    with instead of accepting them.
+    """
+
+    def __init__(self, latency: float = 0.0, host: str = "127.0.0.1", port: int = 0,
+                 max_body_bytes: int = 0, flaky_writes: float = 0.0, seed: int = 0):
+        self.latency = latency
+        self.max_body_bytes = max_body_bytes
+        self.flaky_writes = flaky_writes
+        self._random = random.Random(seed)
+        self.tables: Dict[str, List[Dict]] = {}
+        self.sequences: Dict[str, int] = {}
+        # What rpc/schema_catalog returns; None answers like a project without the function
+        self.catalog: Optional[Dict] = None
+        self.stats: Dict[str, StageStats] = {}
+        self.api_requests: List[SimpleNamespace] = []
+        self.api_failures: List[int] = []
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-supabase", daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeSupabase":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def reset(self, tables: bool = True) -> None:
+        with self._lock:
+            self.stats = {}
+            if tables:
+                self.tables = {}
+
+    def stage_stats(self) -> Dict[str, Dict]:
+        with self._lock:
+            return {stage: stats.as_dict() for stage, stats in self.stats.items()}
+
+    # PostgREST
+
+    def _filtered(self, rows: List[Dict], params: List[Tuple[str, str]]) -> List[Dict]:
+        for column, expression in params:
+            if column not in RESERVED_PARAMS:
+                rows = [row for row in rows if _matches(row, column, expression)]
+        return rows
+
+    def _select(self, table: str, params: List[Tuple[str, str]]) -> List[Dict]:
+        if table == "number_sequences":
+            # The table behind the number RPCs, which keep it in `sequences`
+            source = [{"series": series, "next_value": value} for series, value in self.sequences.items()]
+        else:
+            source = self.tables.get(table, [])
+        rows = self._filtered(source, params)
+        query = dict(params)
+        orders = [part for key, value in params if key == "order" for part in value.split(",")]
+        for part in reversed(orders):
+            column, *modifiers = part.split(".")
+            descending = "desc" in modifiers
+            # Postgres puts NULLs last in ascending order and first in descending order
+            nulls_first = "nullsfirst" in modifiers or (descending and "nullslast" not in modifiers)
+            present = sorted([row for row in rows if row.get(column) is not None],
+                             key=lambda row: _text(row.get(column)), reverse=descending)
+            nulls = [row for row in rows if row.get(column) is None]
+            rows = nulls + present if nulls_first else present + nulls
+        offset = int(query.get("offset", 0))
+        rows = rows[offset:]
+        if "limit" in query:
+            rows = rows[:int(query["limit"])]
+        select = query.get("select", "*")
+        if select != "*":
+            columns = [column.strip() for column in select.split(",")]
+            rows = [{column: row.get(column) for column in columns} for row in rows]
+        return rows
+
+    def _write(self, table: str, body, params: Dict[str, str], prefer: str) -> Tuple[int, List[Dict]]:
+        rows = body if isinstance(body, list) else [body]
+        existing = self.tables.setdefault(table, [])
+        on_conflict = params.get("on_conflict")
+        keys = [tuple(on_conflict.split(","))] if on_conflict else UNIQUE_KEYS.get(table, [])
+        keys = keys + [("id",)]
+        indexes = {key: {tuple(_text(r.get(c)) for c in key): r for r in existing} for key in keys}
+        written = []
+        for row in rows:
+            row = dict(row)
+            conflict = None
+            for key in keys:
+                if all(row.get(c) is not None for c in key):
+                    conflict = indexes[key].get(tuple(_text(row.get(c)) for c in key))
+                    if conflict:
+                        break
+            if conflict is not None:
+                if not on_conflict:
+                    return 409, [{"code": "23505", "message": f"duplicate key value violates unique constraint on {table}"}]
+                if "ignore-duplicates" in prefer:
+                    continue
+                conflict.update(row)
+                written.append(conflict)
+                continue
+            row.setdefault("id", str(uuid.uuid4()))
+            existing.append(row)
+            for key in keys:
+                indexes[key][tuple(_text(row.get(c)) for c in key)] = row
+            written.append(row)
+        return 201, written
+
+    def _handle_rest(self, method: str, path: str, params: List[Tuple[str, str]], body, prefer: str):
+        resource = path[len("/rest/v1/"):]
+        if resource == "rpc/reserve_number_block":
+            with self._lock:
+                first = self.sequences.get(body["p_series"], 1)
+                self.sequences[body["p_series"]] = first + body["p_count"]
+            return 200, first, 0
+        if resource == "rpc/advance_number_sequences":
+            with self._lock:
+                for series, last in zip(body["p_series"], body["p_last"]):
+                    self.sequences[series] = max(self.sequences.get(series, 1), last + 1)
+            return 200, None, 0
+        if resource == "rpc/schema_catalog" and self.catalog is not None:
+            return 200, self.catalog, 0
+        if resource.startswith("rpc/"):
+            return 200, [], 0
+        with self._lock:
+            if method == "GET":
+                return 200, self._select(resource, params), 0
+            if method == "POST":
+                status, rows = self._write(resource, body, dict(params), prefer)
+                return status, rows, len(rows) if status < 400 else 0
+            matched = self._filtered(self.tables.get(resource, []), params)
+            if method == "PATCH":
+                for row in matched:
+                    row.update(body)
+            elif method == "DELETE":
+                ids = {id(row) for row in matched}
+                self.tables[resource] = [row for row in self.tables.get(resource, []) if id(row) not in ids]
+            return 200, matched, len(matched)
+
+    # Notification APIs
+
+    def _handle_api(self, path: str, body, started: float):
+        with self._lock:
+            self.api_requests.append(SimpleNamespace(path=path, body=body, started=started,
+                                                     finished=time.monotonic()))
+            if self.api_failures:
+                return self.api_failures.pop(0), {"message": "Injected failure"}, 0
+        if path.endswith("/v3/mail/send"):
+            return 202, None, 1
+        if path.endswith("/Messages.json"):
+            return 201, {"sid": uuid.uuid4().hex}, 1
+        if path.endswith("/chat.postMessage"):
+            return 200, {"ok": True}, 1
+        return 404, {"message": f"No fake for {path}"}, 0
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body go out as separate writes; without this, Nagle plus
+            # delayed ACKs stall every keep-alive response by ~40 ms
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def _serve(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                raw = self.rfile.read(length) if length else b""
+                parts = urlsplit(self.path)
+                params = parse_qsl(parts.query, keep_blank_values=True)
+                started = time.monotonic()
+                if server.latency:
+                    time.sleep(server.latency)
+                if server.max_body_bytes and len(raw) > server.max_body_bytes:
+                    self._reply(413, b"<html><body>413 Request Entity Too Large</body></html>", "text/html", raw, 0)
+                    return
+                if parts.path.startswith("/rest/v1/"):
+                    body = json.loads(raw) if raw and "json" in (self.headers.get("Content-Type") or "") else None
+                    status, payload, rows = server._handle_rest(self.command, parts.path, params, body,
+                                                                self.headers.get("Prefer") or "")
+                    if "return=minimal" in (self.headers.get("Prefer") or "") and status < 400:
+                        payload = None
+                        status = 204 if status == 200 else status
+                    if self.command == "POST" and status < 400 and not parts.path.startswith("/rest/v1/rpc/"):
+                        with server._lock:
+                            lost = server._random.random() < server.flaky_writes
+                        if lost:
+                            status, payload = 503, {"code": "503", "message": "Service Unavailable"}
+                else:
+                    if "json" in (self.headers.get("Content-Type") or ""):
+                        body = json.loads(raw) if raw else None
+                    else:
+                        body = dict(parse_qsl(raw.decode()))
+                    status, payload, rows = server._handle_api(parts.path, body, started)
+                out = json.dumps(payload).encode() if payload is not None else b""
+                self._reply(status, out, "application/json", raw, rows)
+
+            def _reply(self, status: int, out: bytes, content_type: str, raw: bytes, rows: int):
+                stage = self.headers.get(STAGE_HEADER) or "(unattributed)"
+                with server._lock:
+                    stats = server.stats.setdefault(stage, StageStats())
+                    stats.requests += 1
+                    stats.rows += rows
+                    stats.bytes_in += len(raw) + len(self.path)
+                    stats.bytes_out += len(out)
+
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(out)))
+                self.end_headers()
+                self.wfile.write(out)
+
+            do_GET = do_POST = do_PATCH = do_DELETE = _serve
+
+        return Handler
+
+
+# In-process fakes for the SDK-based integrations
+
+class FakeCalls:
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def call(self) -> None:
+        with self._lock:
+            self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+
+class FakeTextAnalytics(FakeCalls):
+    # Documents per request the service accepts, by operation
+    MAX_DOCUMENTS = {"analyze_sentiment": 10, "extract_key_phrases": 10, "recognize_entities": 5}
+
+    def __init__(self, latency: float):
+        super().__init__(latency)
+        # (operation, documents) of every request, and operations whose requests all fail
+        self.requests: List[Tuple[str, int]] = []
+        self.failing = set()
+
+    def _request(self, operation: str, documents) -> None:
+        self.call()
+        with self._lock:
+            self.requests.append((operation, len(documents)))
+        if operation in self.failing:
+            raise RuntimeError(f"(ServiceUnavailable) {operation} is unavailable")
+        limit = self.MAX_DOCUMENTS[operation]
+        if len(documents) > limit:
+            raise ValueError(f"(InvalidDocumentBatch) Batch request contains too many records. "
+                             f"Max {limit} records are permitted.")
+
+    def analyze_sentiment(self, documents):
+        self._request("analyze_sentiment", documents)
+        scores = SimpleNamespace(positive=0.2, neutral=0.7, negative=0.1)
+        return [SimpleNamespace(is_error=False, sentiment="neutral", confidence_scores=scores)
+                for _ in documents]
+
+    def extract_key_phrases(self, documents):
+        self._request("extract_key_phrases", documents)
+        return [SimpleNamespace(is_error=False, key_phrases=document.split()[:3]) for document in documents]
+
+    def recognize_entities(self, documents):
+        self._request("recognize_entities", documents)
+        return [SimpleNamespace(is_error=False, entities=[]) for _ in documents]
+
+
+class FakeGraph(FakeCalls):
+    def post(self, path: str, json: Optional[Dict] = None):
+        self.call()
+        responses = [{"id": request["id"], "status": 201, "body": {"id": f"outlook-{request['id']}"}}
+                     for request in (json or {}).get("requests", [])]
+        return SimpleNamespace(json=lambda: {"responses": responses})
+
+
+class FakeCalendarService(FakeCalls):
+    class _Batch:
+        def __init__(self, service, callback):
+            self.service = service
+            self.callback = callback
+            self.request_ids = []
+
+        def add(self, request, request_id=None):
+            self.request_ids.append(request_id)
+
+        def execute(self):
+            self.service.call()
+            for request_id in self.request_ids:
+                self.callback(request_id, {"id": f"google-{request_id}"}, None)
+
+    def new_batch_http_request(self, callback=None):
+        return self._Batch(self, callback)
+
+    def events(self):
+        return SimpleNamespace(insert=lambda calendarId, body: body)
+
+
+class FakeZoom(FakeCalls):
+    def __init__(self, latency: float):
+        super().__init__(latency)
+        self.meeting = SimpleNamespace(create=self._create)
+
+    def _create(self, **kwargs):
+        self.call()
+        return {"id": self.calls}
+
+
+def install_fake_integrations(registry, latency: float) -> Dict[str, FakeCalls]:
+    """Register latency-injecting fakes for the SDK integrations; returns them by name."""
+    fakes = {
+        "text_analytics": FakeTextAnalytics(latency),
+        "graph": FakeGraph(latency),
+        "google_calendar": FakeCalendarService(latency),
+        "zoom": FakeZoom(latency),
+    }
+    for name, fake in fakes.items():
+        registry.register(name, lambda fake=fake: fake)
+    return fakes
@@ -0,0 +1,93 @@
+import threading
+from typing import Dict, List
+
+# Numbers reserved per round trip unless a caller asks for more at once
+DEFAULT_BLOCK_SIZE = 1000
+
+
+class SeriesBlock:
+    """The unused part of the block most recently reserved for one series."""
+
+    def __init__(self):
+        self.next = 0
+        self.end = 0
+        self.reservations = 0
+        self.issued = 0
+        self.lock = threading.Lock()
+
+    @property
+    def remaining(self) -> int:
+        return self.end - self.next
+
+
+class BlockAllocator:
+    """Hand out sequence numbers from blocks reserved in the number_sequences table.
+
+    `reserve_number_block()` advances a series' counter in one atomic upsert,
+    so every process gets a disjoint block and the database always holds the
+    high-water mark. Numbers within a block are issued from memory; whatever
+    is left of a block when the process exits is skipped, the same trade-off
+    Postgres makes for cached sequence values.
+    """
+
+    def __init__(self, client, block_size: int = DEFAULT_BLOCK_SIZE):
+        self.client = client
+        self.block_size = block_size
+        self.series: Dict[str, SeriesBlock] = {}
+        self._lock = threading.Lock()
+
+    def _block(self, series: str) -> SeriesBlock:
+        with self._lock:
+            if series not in self.series:
+                self.series[series] = SeriesBlock()
+            return self.series[series]
+
+    def _reserve(self, series: str, count: int) -> int:
+        first = self.client.rpc("reserve_number_block", {"p_series": series, "p_count": count}).execute().data
+        if not isinstance(first, int):
+            raise ValueError(f"reserve_number_block({series!r}) returned {first!r}, expected an integer")
+        return first
+
+    def take(self, series: str, count: int) -> List[int]:
+        """Return `count` unused numbers of `series`, reserving at most one new block."""
+        block = self._block(series)
+        with block.lock:
+            numbers = list(range(block.next, block.next + min(count, block.remaining)))
+            block.next += len(numbers)
+            missing = count - len(numbers)
+            if missing:
+                size = max(missing, self.block_size)
+                first = self._reserve(series, size)
+                block.reservations += 1
+                numbers += range(first, first + missing)
+                block.next, block.end = first + missing, first + size
+            block.issued += count
+        return numbers
+
+    def next(self, series: str) -> int:
+        return self.take(series, 1)[0]
+
+    def advance(self, last_used: Dict[str, int]) -> None:
+        """Move each series past numbers that were assigned without it, e.g. by the data generator.
+
+        One round trip for all series. A series never moves backwards, and
+        the unused part of a cached block that overlaps the numbers is dropped.
+        """
+        if not last_used:
+            return
+        series = sorted(last_used)
+        self.client.rpc("advance_number_sequences",
+                        {"p_series": series, "p_last": [last_used[name] for name in series]}).execute()
+        for name in series:
+            block = self._block(name)
+            with block.lock:
+                if block.next <= last_used[name]:
+                    block.next = block.end
+
+    def report(self) -> None:
+        if not self.series:
+            return
+        print("\nAllocated numbers:")
+        print(f"{'series':<28}{'issued':>9}{'blocks':>8}{'unused':>8}")
+        for name, block in sorted(self.series.items()):
+            print(f"{name:<28}{block.issued:>9}{block.reservations:>8}{block.remaining:>8}")
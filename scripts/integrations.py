@@ -0,0 +1,121 @@
+import os
+import pickle
+import threading
+from typing import Any, Callable, Dict, Optional
+
+# Google Calendar OAuth scopes
+SCOPES = ['https://www.googleapis.com/auth/calendar']
+
+
+def _graph():
+    from msgraph.core import GraphClient
+    return GraphClient(credential=os.getenv('MSGRAPH_ACCESS_TOKEN'))
+
+
+def _text_analytics():
+    from azure.ai.textanalytics import TextAnalyticsClient
+    from azure.core.credentials import AzureKeyCredential
+    return TextAnalyticsClient(
+        endpoint=os.getenv('AZURE_TEXT_ANALYTICS_ENDPOINT'),
+        credential=AzureKeyCredential(os.getenv('AZURE_TEXT_ANALYTICS_KEY'))
+    )
+
+
+def _google_calendar():
+    from google_auth_oauthlib.flow import InstalledAppFlow
+    from google.auth.transport.requests import Request
+    from googleapiclient.discovery import build
+
+    creds = None
+    if os.path.exists('token.pickle'):
+        with open('token.pickle', 'rb') as token:
+            creds = pickle.load(token)
+    if not creds or not creds.valid:
+        if creds and creds.expired and creds.refresh_token:
+            creds.refresh(Request())
+        else:
+            # Only reached the first time a calendar event is synced
+            flow = InstalledAppFlow.from_client_secrets_file(
+                'credentials.json', SCOPES)
+            creds = flow.run_local_server(port=0)
+        with open('token.pickle', 'wb') as token:
+            pickle.dump(creds, token)
+    return build('calendar', 'v3', credentials=creds)
+
+
+def _zoom():
+    from zoomus import ZoomClient
+    return ZoomClient(
+        os.getenv('ZOOM_API_KEY'),
+        os.getenv('ZOOM_API_SECRET')
+    )
+
+
+def _notifications():
+    from notifications import NotificationDispatcher
+    return NotificationDispatcher.from_env()
+
+
+def _note_analyzer():
+    from note_analysis import NoteAnalyzer
+    client = integrations.get('text_analytics')
+    return NoteAnalyzer(client) if client else None
+
+
+def _calendar_sync():
+    from calendar_sync import CalendarSync
+    return CalendarSync(integrations.get('graph'), integrations.get('google_calendar'),
+                        integrations.get('zoom'))
+
+
+class IntegrationRegistry:
+    """Build third-party API clients on first use instead of at import time.
+
+    `get()` returns None when integrations are disabled or the client could
+    not be constructed, so callers simply skip that integration.
+    """
+
+    def __init__(self):
+        self._factories: Dict[str, Callable[[], Any]] = {}
+        self._clients: Dict[str, Optional[Any]] = {}
+        # Re-entrant: a factory may build the clients it depends on through get()
+        self._lock = threading.RLock()
+        self.enabled = True
+
+    def register(self, name: str, factory: Callable[[], Any]) -> None:
+        self._factories[name] = factory
+        self._clients.pop(name, None)
+
+    def disable(self) -> None:
+        """Turn every integration off, e.g. for a DB-only seed."""
+        self.enabled = False
+
+    def loaded(self, name: str) -> Optional[Any]:
+        """Return the client if it has already been built, without building it."""
+        return self._clients.get(name)
+
+    def get(self, name: str) -> Optional[Any]:
+        if not self.enabled:
+            return None
+        if name in self._clients:
+            return self._clients[name]
+        if name not in self._factories:
+            raise KeyError(f"Unknown integration: {name}")
+        with self._lock:
+            if name not in self._clients:
+                try:
+                    self._clients[name] = self._factories[name]()
+                except Exception as e:
+                    print(f"Error initializing {name} client, skipping it: {str(e)}")
+                    self._clients[name] = None
+            return self._clients[name]
+
+
+integrations = IntegrationRegistry()
+integrations.register('graph', _graph)
+integrations.register('text_analytics', _text_analytics)
+integrations.register('google_calendar', _google_calendar)
+integrations.register('zoom', _zoom)
+integrations.register('notifications', _notifications)
+integrations.register('note_analyzer', _note_analyzer)
+integrations.register('calendar_sync', _calendar_sync)
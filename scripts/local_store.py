@@ -0,0 +1,11 @@
+import os
+
+# Local state (caches, journals, checkpoints) lives here unless SEED_CACHE_DIR is set
+DEFAULT_CACHE_DIR = ".seed_cache"
+
+
+def cache_path(name: str) -> str:
+    """Return the path of a file in the local cache directory, creating the directory."""
+    directory = os.getenv('SEED_CACHE_DIR', DEFAULT_CACHE_DIR)
+    os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, name)
@@ -0,0 +1,134 @@
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple, Union
+
+# Values per in_() filter; keeps the PostgREST query string well under URL limits
+IN_FILTER_SIZE = 200
+PAGE_SIZE = 1000
+
+KeySpec = Union[str, Sequence[str]]
+
+
+def _columns(key: KeySpec) -> Tuple[str, ...]:
+    return (key,) if isinstance(key, str) else tuple(key)
+
+
+def _key(values) -> Tuple[str, ...]:
+    if not isinstance(values, tuple):
+        values = (values,)
+    return tuple(str(value) for value in values)
+
+
+class TableIndex:
+    """In-memory map of natural key -> id for one table.
+
+    The index knows which part of the table it has loaded: either all of it,
+    or the rows whose first key column is in a set of prefetched values.
+    Membership answers are only authoritative inside that coverage.
+    """
+
+    def __init__(self, table: str, key: KeySpec):
+        self.table = table
+        self.columns = _columns(key)
+        self.ids: Dict[Tuple[str, ...], str] = {}
+        self.complete = False
+        self.covered: Set[str] = set()
+
+    def covers(self, key) -> bool:
+        return self.complete or _key(key)[0] in self.covered
+
+    def get_id(self, key) -> Optional[str]:
+        return self.ids.get(_key(key))
+
+    def contains(self, key) -> bool:
+        return _key(key) in self.ids
+
+    def add(self, row: Dict) -> None:
+        if row.get("id") is not None and all(row.get(column) is not None for column in self.columns):
+            self.ids[_key(tuple(row[column] for column in self.columns))] = str(row["id"])
+
+
+class LookupIndex:
+    """Prefetched existence/ID lookups shared by the seeding stages.
+
+    `load()` fetches the keys of a table (or of the rows matching a set of
+    values) in a few paginated or in_() selects instead of one query per row.
+    The BulkWriter feeds every row it writes back through `observe()`, so the
+    index stays current as the pipeline inserts.
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self.indexes: Dict[Tuple[str, Tuple[str, ...]], TableIndex] = {}
+        self.queries = 0
+        self._lock = threading.Lock()
+
+    def index(self, table: str, key: KeySpec) -> TableIndex:
+        with self._lock:
+            name = (table, _columns(key))
+            if name not in self.indexes:
+                self.indexes[name] = TableIndex(table, key)
+            return self.indexes[name]
+
+    def load(self, table: str, key: KeySpec, values: Optional[Iterable] = None) -> TableIndex:
+        """Fetch id and key columns for `table`.
+
+        With `values`, only rows whose first key column is one of them are
+        fetched (for composite keys such as (case_id, user_id) pass case IDs);
+        without, the whole table is paged through in id order.
+        """
+        index = self.index(table, key)
+        select = ",".join(dict.fromkeys(("id",) + index.columns))
+        if values is None:
+            if not index.complete:
+                self._load_all(index, select)
+            return index
+
+        first = index.columns[0]
+        single = len(index.columns) == 1
+        pending = [value for value in dict.fromkeys(str(v) for v in values)
+                   if not index.covers(value) and not (single and index.contains(value))]
+        for start in range(0, len(pending), IN_FILTER_SIZE):
+            batch = pending[start:start + IN_FILTER_SIZE]
+            offset = 0
+            while True:
+                result = (self.client.table(table).select(select).in_(first, batch)
+                          .order("id").range(offset, offset + PAGE_SIZE - 1).execute())
+                self.queries += 1
+                for row in result.data:
+                    index.add(row)
+                if len(result.data) < PAGE_SIZE:
+                    break
+                offset += PAGE_SIZE
+            index.covered.update(batch)
+        return index
+
+    def _load_all(self, index: TableIndex, select: str) -> None:
+        last_id = None
+        while True:
+            query = self.client.table(index.table).select(select).order("id").limit(PAGE_SIZE)
+            if last_id is not None:
+                query = query.gt("id", last_id)
+            result = query.execute()
+            self.queries += 1
+            for row in result.data:
+                index.add(row)
+            if len(result.data) < PAGE_SIZE:
+                break
+            last_id = result.data[-1]["id"]
+        index.complete = True
+
+    def observe(self, table: str, rows: List[Dict]) -> None:
+        """Record rows that were just written to `table`."""
+        for (indexed_table, _), index in list(self.indexes.items()):
+            if indexed_table == table:
+                for row in rows:
+                    index.add(row)
+
+    def lookup(self, table: str, key: KeySpec, value) -> Tuple[bool, Optional[str]]:
+        """Return (known, id): `known` is False when the value is outside the loaded coverage."""
+        index = self.indexes.get((table, _columns(key)))
+        if index is None:
+            return False, None
+        if index.contains(value):
+            return True, index.get_id(value)
+        return index.covers(value), None
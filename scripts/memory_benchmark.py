@@ -0,0 +1,83 @@
+"""Compare the memory held by generated rows as dicts and as RecordBatches.
+
+For each high-volume table the generator's output is materialised twice,
+once as a list of row dicts and once as a list of per-firm RecordBatches,
+and tracemalloc reports the bytes each representation keeps alive. The
+time to feed every row to a COPY-style encoder (one value sequence per row)
+is measured for both as well.
+
+    python memory_benchmark.py --scale firms=20,users_per_firm=40,messages_per_case=50
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+from typing import Callable, Tuple
+
+from data_generator import DEFAULT_SEED, ScaleConfig, SeedDataGenerator
+
+DEFAULT_SCALE = "firms=10,users_per_firm=40,cases_per_lawyer=4,messages_per_case=50,notes_per_case=20,events_per_case=10"
+
+
+def measure(build: Callable[[], object]) -> Tuple[object, int, float]:
+    """Return what `build` made, the bytes it keeps allocated and the seconds it took."""
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - started
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, retained, elapsed
+
+
+def encode_dicts(rows) -> int:
+    columns = list(rows[0]) if rows else []
+    count = 0
+    for row in rows:
+        values = [row.get(column) for column in columns]
+        count += len(values) > 0
+    return count
+
+
+def encode_batches(batches) -> int:
+    count = 0
+    for batch in batches:
+        for values in batch.tuples(batch.names):
+            count += len(values) > 0
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", type=ScaleConfig.parse, default=ScaleConfig.parse(DEFAULT_SCALE))
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    args = parser.parse_args()
+
+    generator = SeedDataGenerator(args.scale, seed=args.seed)
+    streams = {
+        "users": (generator.users, generator.user_batches),
+        "cases": (generator.cases, generator.case_batches),
+        "messages": (generator.messages, generator.message_batches),
+        "notes": (generator.notes, generator.note_batches),
+        "calendar_events": (generator.calendar_events, generator.calendar_event_batches),
+    }
+    print(f"Memory held by generated rows ({args.scale}):")
+    print(f"{'table':<18}{'rows':>9}{'dicts MB':>10}{'batches MB':>12}{'saved':>8}"
+          f"{'B/row dict':>12}{'B/row batch':>13}{'encode dicts s':>16}{'encode batch s':>16}")
+    for table, (rows_of, batches_of) in streams.items():
+        rows, dict_bytes, _ = measure(lambda: list(rows_of()))
+        _, _, dict_encode = measure(lambda: encode_dicts(rows))
+        count = len(rows)
+        del rows
+        batches, batch_bytes, _ = measure(lambda: list(batches_of()))
+        _, _, batch_encode = measure(lambda: encode_batches(batches))
+        del batches
+        saved = 1 - batch_bytes / dict_bytes if dict_bytes else 0.0
+        print(f"{table:<18}{count:>9}{dict_bytes / 1e6:>10.1f}{batch_bytes / 1e6:>12.1f}{saved:>8.0%}"
+              f"{dict_bytes / max(count, 1):>12.0f}{batch_bytes / max(count, 1):>13.0f}"
+              f"{dict_encode:>16.3f}{batch_encode:>16.3f}")
+
+
+if __name__ == "__main__":
+    main()
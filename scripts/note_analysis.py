@@ -0,0 +1,202 @@
+import hashlib
+import json
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from bulk_writer import iter_chunks
+from local_store import cache_path
+from tracing import tracer
+
+# Documents per request accepted by Azure Text Analytics, by operation
+AZURE_BATCH_LIMITS = {"analyze_sentiment": 10, "extract_key_phrases": 10, "recognize_entities": 5}
+# Notes per analysis batch; operations with a lower limit split it into several requests
+AZURE_MAX_BATCH = max(AZURE_BATCH_LIMITS.values())
+
+# Notes pulled from the input stream per round of analysis
+DEFAULT_CHUNK_SIZE = 200
+
+
+def content_hash(content: str) -> str:
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+
+class AnalysisCache:
+    """SQLite store of analysis results keyed by the SHA-256 of the note text."""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or cache_path("note_analysis.sqlite")
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS analyses (hash TEXT PRIMARY KEY, result TEXT NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get_many(self, hashes: List[str]) -> Dict[str, Dict]:
+        found: Dict[str, Dict] = {}
+        with self._lock:
+            for start in range(0, len(hashes), 500):
+                batch = hashes[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT hash, result FROM analyses WHERE hash IN ({placeholders})", batch
+                )
+                found.update((digest, json.loads(result)) for digest, result in rows)
+        return found
+
+    def put_many(self, results: Dict[str, Dict]) -> None:
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO analyses (hash, result) VALUES (?, ?)",
+                [(digest, json.dumps(result)) for digest, result in results.items()],
+            )
+            self._conn.commit()
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+def _sentiment(doc) -> Dict:
+    scores = doc.confidence_scores
+    return {
+        'sentiment': doc.sentiment,
+        'confidence_scores': {'positive': scores.positive, 'neutral': scores.neutral,
+                              'negative': scores.negative},
+    }
+
+
+def _key_phrases(doc) -> Dict:
+    return {'key_phrases': list(doc.key_phrases)}
+
+
+def _entities(doc) -> Dict:
+    return {'entities': [{'text': entity.text, 'category': entity.category} for entity in doc.entities]}
+
+
+# Operation -> the fields it fills in from one document's result
+_EXTRACTORS = {"analyze_sentiment": _sentiment, "extract_key_phrases": _key_phrases,
+               "recognize_entities": _entities}
+
+
+class NoteAnalyzer:
+    """Analyse note text in Azure-sized batches, three analyses at a time, with a local cache.
+
+    Identical texts are analysed once per run, and texts already in the cache
+    (e.g. from an earlier seed) are never sent to Azure again. A text missing
+    any of the three analyses is returned with what did succeed but is not
+    cached, so the next run asks for it again.
+    """
+
+    def __init__(self, client, cache: Optional[AnalysisCache] = None,
+                 batch_size: int = AZURE_MAX_BATCH, batches_in_flight: int = 2):
+        self.client = client
+        self.cache = cache or AnalysisCache()
+        self.batch_size = batch_size
+        # Batches and the calls each batch makes use separate pools so a
+        # batch waiting on its calls can never starve them of a worker
+        calls_per_batch = sum(-(-batch_size // limit) for limit in AZURE_BATCH_LIMITS.values())
+        self.batch_pool = ThreadPoolExecutor(max_workers=batches_in_flight,
+                                             thread_name_prefix="note-batch")
+        self.pool = ThreadPoolExecutor(max_workers=calls_per_batch * batches_in_flight,
+                                       thread_name_prefix="note-analysis")
+        self.analyzed = 0
+        self.partial = 0
+        self.cache_hits = 0
+        self.requests = 0
+
+    def _call(self, operation: str, documents: List[str]):
+        with tracer.span("azure", operation, "text_analytics", documents=len(documents)):
+            return getattr(self.client, operation)(documents)
+
+    def _analyze_batch(self, documents: List[str]) -> Tuple[List[Dict], List[bool]]:
+        """Results for one batch, and whether each document got all three analyses.
+
+        A failed request costs only its own analysis of its documents.
+        """
+        calls = []
+        for operation, limit in AZURE_BATCH_LIMITS.items():
+            for start in range(0, len(documents), limit):
+                part = documents[start:start + limit]
+                calls.append((operation, start, len(part), self.pool.submit(self._call, operation, part)))
+        self.requests += len(calls)
+
+        results = [{} for _ in documents]
+        complete = [True] * len(documents)
+        for operation, start, count, future in calls:
+            try:
+                docs = future.result()
+            except Exception as e:
+                print(f"Error running {operation} on {count} notes with Azure: {str(e)}")
+                complete[start:start + count] = [False] * count
+                continue
+            for i, doc in enumerate(docs, start):
+                if doc.is_error:
+                    complete[i] = False
+                else:
+                    results[i].update(_EXTRACTORS[operation](doc))
+        return results, complete
+
+    def analyze(self, contents: List[str]) -> List[Dict]:
+        """Return one analysis dict per input text, in input order."""
+        hashes = [content_hash(content) for content in contents]
+        known = self.cache.get_many(list(set(hashes)))
+        self.cache_hits += sum(1 for digest in hashes if digest in known)
+
+        missing = {}
+        for digest, content in zip(hashes, contents):
+            if digest not in known:
+                missing.setdefault(digest, content)
+
+        if missing:
+            digests = list(missing)
+            batches = [digests[i:i + self.batch_size] for i in range(0, len(digests), self.batch_size)]
+            futures = [self.batch_pool.submit(self._analyze_batch, [missing[d] for d in batch])
+                       for batch in batches]
+            fresh: Dict[str, Dict] = {}
+            final: Dict[str, Dict] = {}
+            for batch, future in zip(batches, futures):
+                try:
+                    results, complete = future.result()
+                except Exception as e:
+                    print(f"Error analyzing {len(batch)} notes with Azure: {str(e)}")
+                    continue
+                for digest, result, done in zip(batch, results, complete):
+                    if result:
+                        fresh[digest] = result
+                    if done:
+                        final[digest] = result
+            self.analyzed += len(final)
+            self.partial += len(fresh) - len(final)
+            self.cache.put_many(final)
+            known.update(fresh)
+
+        return [known.get(digest, {}) for digest in hashes]
+
+    def annotate(self, notes: Iterable[Dict], chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Dict]:
+        """Yield the notes with sentiment, confidence_scores, key_phrases and entities filled in."""
+        for chunk in iter_chunks(notes, chunk_size):
+            analyses = self.analyze([note["content"] for note in chunk])
+            # Notes with the same content share one analysis; encode it once per chunk
+            encoded: Dict[int, Dict] = {}
+            for note, analysis in zip(chunk, analyses):
+                fields = encoded.get(id(analysis))
+                if fields is None:
+                    fields = encoded[id(analysis)] = {
+                        "sentiment": analysis.get('sentiment'),
+                        "confidence_scores": json.dumps(analysis.get('confidence_scores')),
+                        "key_phrases": json.dumps(analysis.get('key_phrases')),
+                        "entities": json.dumps(analysis.get('entities'))
+                    }
+                yield {**note, **fields}
+
+    def close(self) -> None:
+        self.batch_pool.shutdown()
+        self.pool.shutdown()
+        self.cache.close()
+
+    def report(self) -> None:
+        print(f"\nNote analysis: {self.analyzed} analysed, {self.partial} partial (not cached), "
+              f"{self.cache_hits} cache hits, "
+              f"{self.requests} Azure requests")
@@ -0,0 +1,318 @@
+import asyncio
+import os
+import random
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+import httpx
+
+from tracing import tracer
+
+# How long a channel worker waits for more items before sending a partial batch
+BATCH_LINGER_SECONDS = 0.05
+
+RETRYABLE_STATUS = {408, 425, 429, 500, 502, 503, 504}
+
+
+class Notification:
+    __slots__ = ("channel", "to", "subject", "body")
+
+    def __init__(self, channel: str, to: str, subject: str, body: str):
+        self.channel = channel
+        self.to = to
+        self.subject = subject
+        self.body = body
+
+
+class DeliveryError(Exception):
+    def __init__(self, message: str, retryable: bool, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retryable = retryable
+        self.retry_after = retry_after
+
+
+def _check_response(response: httpx.Response) -> None:
+    if response.status_code < 400:
+        return
+    retry_after = response.headers.get("Retry-After")
+    raise DeliveryError(
+        f"HTTP {response.status_code}: {response.text[:200]}",
+        retryable=response.status_code in RETRYABLE_STATUS,
+        retry_after=float(retry_after) if retry_after and retry_after.isdigit() else None,
+    )
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter."""
+
+    def __init__(self, max_attempts: int = 4, base_delay: float = 0.5, max_delay: float = 10.0):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        if retry_after is not None:
+            return min(retry_after, self.max_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+
+class RateLimiter:
+    """Token bucket allowing `rate` requests per second with bursts of `burst`."""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+
+    async def acquire(self) -> None:
+        while True:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class Channel:
+    """One delivery channel: how to send, and how fast and how often to try.
+
+    `requests()` splits a batch into the API calls needed to deliver it; the
+    dispatcher rate-limits and retries each call on its own, so a retry never
+    re-sends notifications that were already accepted.
+    """
+
+    name = ""
+    batch_size = 1
+
+    def __init__(self, base_url: str, rate: float, burst: int = 1,
+                 retry: Optional[RetryPolicy] = None, concurrency: int = 4):
+        self.base_url = base_url.rstrip("/")
+        self.limiter = RateLimiter(rate, burst)
+        self.retry = retry or RetryPolicy()
+        self.concurrency = concurrency
+
+    def requests(self, items: List[Notification]) -> List[List[Notification]]:
+        return [[item] for item in items]
+
+    async def send(self, client: httpx.AsyncClient, items: List[Notification]) -> None:
+        raise NotImplementedError
+
+
+class SendGridChannel(Channel):
+    """Email via SendGrid v3; identical messages share one request through personalizations."""
+
+    name = "email"
+    batch_size = 1000  # SendGrid's personalizations limit per request
+
+    def __init__(self, api_key: str, from_email: str, base_url: str = "https://api.sendgrid.com", **kwargs):
+        super().__init__(base_url, **kwargs)
+        self.api_key = api_key
+        self.from_email = from_email
+
+    def requests(self, items: List[Notification]) -> List[List[Notification]]:
+        groups: Dict[tuple, List[Notification]] = defaultdict(list)
+        for item in items:
+            groups[(item.subject, item.body)].append(item)
+        return list(groups.values())
+
+    async def send(self, client: httpx.AsyncClient, items: List[Notification]) -> None:
+        response = await client.post(
+            f"{self.base_url}/v3/mail/send",
+            headers={"Authorization": f"Bearer {self.api_key}"},
+            json={
+                "personalizations": [{"to": [{"email": item.to}]} for item in items],
+                "from": {"email": self.from_email},
+                "subject": items[0].subject,
+                "content": [{"type": "text/html", "value": items[0].body}],
+            },
+        )
+        _check_response(response)
+
+
+class TwilioChannel(Channel):
+    """SMS via the Twilio Messages API, which has no batch endpoint."""
+
+    name = "sms"
+
+    def __init__(self, account_sid: str, auth_token: str, from_number: str,
+                 base_url: str = "https://api.twilio.com", **kwargs):
+        super().__init__(base_url, **kwargs)
+        self.account_sid = account_sid
+        self.auth_token = auth_token
+        self.from_number = from_number
+
+    async def send(self, client: httpx.AsyncClient, items: List[Notification]) -> None:
+        item = items[0]
+        response = await client.post(
+            f"{self.base_url}/2010-04-01/Accounts/{self.account_sid}/Messages.json",
+            auth=(self.account_sid, self.auth_token),
+            data={"To": item.to, "From": self.from_number, "Body": f"{item.subject}\n{item.body}"},
+        )
+        _check_response(response)
+
+
+class SlackChannel(Channel):
+    """Slack chat.postMessage, which has no batch endpoint."""
+
+    name = "slack"
+
+    def __init__(self, token: str, base_url: str = "https://slack.com/api", **kwargs):
+        super().__init__(base_url, **kwargs)
+        self.token = token
+
+    async def send(self, client: httpx.AsyncClient, items: List[Notification]) -> None:
+        item = items[0]
+        response = await client.post(
+            f"{self.base_url}/chat.postMessage",
+            headers={"Authorization": f"Bearer {self.token}"},
+            json={"channel": item.to, "text": f"*{item.subject}*\n{item.body}"},
+        )
+        _check_response(response)
+        payload = response.json()
+        if not payload.get("ok", False):
+            error = payload.get("error", "unknown_error")
+            raise DeliveryError(f"Slack error: {error}", retryable=error == "ratelimited")
+
+
+class ChannelStats:
+    def __init__(self):
+        self.queued = 0
+        self.sent = 0
+        self.failed = 0
+        self.requests = 0
+        self.retries = 0
+
+
+class NotificationDispatcher:
+    """Queue notifications and deliver them in the background, per channel.
+
+    `enqueue()` never blocks on the network: it hands the notification to an
+    event loop running on a daemon thread. Each channel has its own queue,
+    workers, rate limit and retry policy. Call `close()` to wait for the
+    queues to drain before the process exits.
+    """
+
+    def __init__(self, channels: List[Channel], timeout: float = 30.0):
+        self.channels = {channel.name: channel for channel in channels}
+        self.stats = {name: ChannelStats() for name in self.channels}
+        self.timeout = timeout
+        self._loop = asyncio.new_event_loop()
+        self._queues: Dict[str, asyncio.Queue] = {}
+        self._workers: List[asyncio.Task] = []
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="notification-dispatcher", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+
+    @classmethod
+    def from_env(cls) -> "NotificationDispatcher":
+        """Build the channels whose credentials are configured; base URLs can point at fakes."""
+        channels: List[Channel] = []
+        if os.getenv('SENDGRID_API_KEY'):
+            channels.append(SendGridChannel(
+                os.getenv('SENDGRID_API_KEY'), os.getenv('SENDGRID_FROM_EMAIL', ''),
+                base_url=os.getenv('SENDGRID_API_URL', 'https://api.sendgrid.com'),
+                rate=float(os.getenv('SENDGRID_RATE', '10')), burst=5))
+        if os.getenv('TWILIO_ACCOUNT_SID'):
+            channels.append(TwilioChannel(
+                os.getenv('TWILIO_ACCOUNT_SID'), os.getenv('TWILIO_AUTH_TOKEN', ''),
+                os.getenv('TWILIO_PHONE_NUMBER', ''),
+                base_url=os.getenv('TWILIO_API_URL', 'https://api.twilio.com'),
+                rate=float(os.getenv('TWILIO_RATE', '1')), burst=1))
+        if os.getenv('SLACK_BOT_TOKEN'):
+            channels.append(SlackChannel(
+                os.getenv('SLACK_BOT_TOKEN'),
+                base_url=os.getenv('SLACK_API_URL', 'https://slack.com/api'),
+                rate=float(os.getenv('SLACK_RATE', '1')), burst=3))
+        return cls(channels)
+
+    def _run(self) -> None:
+        asyncio.set_event_loop(self._loop)
+        self._client = httpx.AsyncClient(timeout=self.timeout)
+        for name, channel in self.channels.items():
+            self._queues[name] = asyncio.Queue()
+            for _ in range(channel.concurrency):
+                self._workers.append(self._loop.create_task(self._worker(channel)))
+        self._ready.set()
+        self._loop.run_forever()
+
+    def enqueue(self, notification: Notification) -> bool:
+        """Queue a notification; returns False when its channel is not configured."""
+        if notification.channel not in self.channels:
+            return False
+        self.stats[notification.channel].queued += 1
+        self._loop.call_soon_threadsafe(self._queues[notification.channel].put_nowait, notification)
+        return True
+
+    async def _next_batch(self, queue: asyncio.Queue, size: int) -> List[Notification]:
+        batch = [await queue.get()]
+        deadline = self._loop.time() + BATCH_LINGER_SECONDS
+        while len(batch) < size:
+            remaining = deadline - self._loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _worker(self, channel: Channel) -> None:
+        queue = self._queues[channel.name]
+        stats = self.stats[channel.name]
+        while True:
+            batch = await self._next_batch(queue, channel.batch_size)
+            try:
+                await self._deliver(channel, batch, stats)
+            finally:
+                for _ in batch:
+                    queue.task_done()
+
+    async def _deliver(self, channel: Channel, batch: List[Notification], stats: ChannelStats) -> None:
+        for items in channel.requests(batch):
+            for attempt in range(channel.retry.max_attempts):
+                await channel.limiter.acquire()
+                stats.requests += 1
+                try:
+                    with tracer.span(channel.name, "send", channel.__class__.__name__, recipients=len(items)):
+                        await channel.send(self._client, items)
+                    stats.sent += len(items)
+                    break
+                except (DeliveryError, httpx.TransportError) as e:
+                    if not getattr(e, "retryable", True) or attempt == channel.retry.max_attempts - 1:
+                        stats.failed += len(items)
+                        print(f"Error sending {len(items)} {channel.name} notifications: {str(e)}")
+                        break
+                    stats.retries += 1
+                    await asyncio.sleep(channel.retry.delay(attempt, getattr(e, "retry_after", None)))
+                except Exception as e:
+                    stats.failed += len(items)
+                    print(f"Error sending {len(items)} {channel.name} notifications: {str(e)}")
+                    break
+
+    async def _drain(self) -> None:
+        await asyncio.gather(*(queue.join() for queue in self._queues.values()))
+        for worker in self._workers:
+            worker.cancel()
+        await self._client.aclose()
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """Wait for every queued notification to be delivered or fail, then stop."""
+        future = asyncio.run_coroutine_threadsafe(self._drain(), self._loop)
+        try:
+            future.result(timeout)
+        finally:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+
+    def report(self) -> None:
+        print("\nNotification summary:")
+        print(f"{'channel':<10}{'queued':>8}{'sent':>8}{'failed':>8}{'requests':>10}{'retries':>9}")
+        for name, stats in self.stats.items():
+            print(f"{name:<10}{stats.queued:>8}{stats.sent:>8}{stats.failed:>8}"
+                  f"{stats.requests:>10}{stats.retries:>9}")
@@ -0,0 +1,70 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import bcrypt
+
+from tracing import tracer
+
+# bcrypt cost factors (log2 rounds). "production" matches bcrypt.gensalt()'s
+# default; "seed" is the library minimum and is only meant for synthetic data.
+COST_PROFILES: Dict[str, int] = {
+    "production": 12,
+    "seed": 4,
+}
+
+# Below this many hashes a process pool costs more to start than it saves
+MIN_PARALLEL_BATCH = 8
+
+
+def _hash_one(item: Tuple[str, int]) -> str:
+    password, rounds = item
+    salt = bcrypt.gensalt(rounds=rounds)
+    return bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
+
+
+class PasswordHasher:
+    """Hash batches of passwords with bcrypt across a process pool.
+
+    With `reuse_identical` set, each distinct password is hashed once and the
+    result shared by every user with that password. Only opt in for seed or
+    test data, since accounts with the same password then share one hash.
+    """
+
+    def __init__(self, profile: str = "production", workers: Optional[int] = None,
+                 reuse_identical: bool = False):
+        if profile not in COST_PROFILES:
+            raise ValueError(f"Unknown cost profile {profile!r}, expected one of {sorted(COST_PROFILES)}")
+        self.profile = profile
+        self.rounds = COST_PROFILES[profile]
+        self.workers = workers or os.cpu_count() or 1
+        self.reuse_identical = reuse_identical
+        self.hashed = 0
+        self.seconds = 0.0
+
+    def hash(self, password: str) -> str:
+        return self.hash_many([password])[0]
+
+    def hash_many(self, passwords: Sequence[str]) -> List[str]:
+        """Return one bcrypt hash per input password, in input order."""
+        started = time.perf_counter()
+        with tracer.span("bcrypt", "hash_many", self.profile, passwords=len(passwords)):
+            if self.reuse_identical:
+                distinct = list(dict.fromkeys(passwords))
+                by_password = dict(zip(distinct, self._hash_all(distinct)))
+                hashes = [by_password[password] for password in passwords]
+            else:
+                hashes = self._hash_all(passwords)
+        self.seconds += time.perf_counter() - started
+        self.hashed += len(passwords)
+        return hashes
+
+    def _hash_all(self, passwords: Sequence[str]) -> List[str]:
+        items = [(password, self.rounds) for password in passwords]
+        if self.workers <= 1 or len(items) < MIN_PARALLEL_BATCH:
+            return [_hash_one(item) for item in items]
+        workers = min(self.workers, len(items))
+        chunksize = max(1, len(items) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(_hash_one, items, chunksize=chunksize))
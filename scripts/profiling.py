@@ -0,0 +1,211 @@
+"""Per-stage CPU, memory and wait-time profiles for the data scripts (--profile).
+
+Each stage runs under its own cProfile profiler and a tracemalloc peak
+window, and every traced call it makes (see tracing.py) is added up by
+service, which splits its wall time into CPU on the stage's thread, network
+wait (Supabase and the integrations, less the CPU spent encoding requests),
+password hashing (in-process or waiting on the pool) and anything else.
+A sampling thread records the Python stack of every running stage for a
+collapsed-stack file that flamegraph.pl, speedscope or inferno can render.
+
+Output goes to the profile directory:
+
+    <script>-report.txt       the report printed at the end of the run
+    <script>-<stage>.prof     cProfile data, for pstats or snakeviz
+    <script>.folded           collapsed stacks, one "stage;frame;...;frame count" per line
+"""
+import cProfile
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional
+
+from tracing import tracer
+
+DEFAULT_PROFILE_DIR = "profiles"
+# Seconds between stack samples for the collapsed-stack file
+SAMPLE_INTERVAL = 0.005
+TOP_FUNCTIONS = 15
+TOP_ALLOCATIONS = 5
+# Tracer services counted as hashing; every other service is network wait
+HASHING_SERVICES = ("bcrypt",)
+
+
+class StageProfile:
+    """What one stage spent its time and memory on."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.wall = 0.0
+        self.cpu = 0.0
+        # service -> [seconds in traced calls, thread CPU seconds within them, calls]
+        self.services: Dict[str, List[float]] = {}
+        self.peak_bytes = 0
+        self.retained_bytes = 0
+        self.allocations: List[tracemalloc.StatisticDiff] = []
+        self.stats: Optional[pstats.Stats] = None
+
+    @property
+    def hashing(self) -> float:
+        """All time in hashing calls, whether hashed on this thread or waited for from the pool."""
+        return sum(seconds for service, (seconds, _, _) in self.services.items() if service in HASHING_SERVICES)
+
+    @property
+    def cpu_outside_hashing(self) -> float:
+        hashing_cpu = sum(cpu for service, (_, cpu, _) in self.services.items() if service in HASHING_SERVICES)
+        return max(0.0, self.cpu - hashing_cpu)
+
+    @property
+    def network(self) -> float:
+        """Time in the other traced calls minus the CPU spent building and parsing requests."""
+        return sum(max(0.0, seconds - cpu) for service, (seconds, cpu, _) in self.services.items()
+                   if service not in HASHING_SERVICES)
+
+    @property
+    def other(self) -> float:
+        return max(0.0, self.wall - self.cpu_outside_hashing - self.network - self.hashing)
+
+
+def _frame_name(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class RunProfiler:
+    """Profile the stages of one script run; see the module docstring."""
+
+    def __init__(self, script: str, out_dir: str = DEFAULT_PROFILE_DIR,
+                 sample_interval: float = SAMPLE_INTERVAL):
+        self.script = script
+        self.out_dir = out_dir
+        self.sample_interval = sample_interval
+        self.profiles: Dict[str, StageProfile] = {}
+        self.samples: Counter = Counter()
+        self._running: Dict[int, str] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        os.makedirs(self.out_dir, exist_ok=True)
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        self._sampler = threading.Thread(target=self._sample, name="profile-sampler", daemon=True)
+        self._sampler.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._sampler is not None:
+            self._sampler.join()
+        tracemalloc.stop()
+
+    def _sample(self) -> None:
+        while not self._stop.wait(self.sample_interval):
+            with self._lock:
+                running = dict(self._running)
+            if not running:
+                continue
+            frames = sys._current_frames()
+            for ident, stage in running.items():
+                frame = frames.get(ident)
+                stack = []
+                # Walk up to the stage's entry point; the engine and thread pool above it are noise
+                while frame is not None and frame.f_code is not _STAGE_ENTRY:
+                    stack.append(_frame_name(frame.f_code))
+                    frame = frame.f_back
+                self.samples[";".join([stage] + stack[::-1])] += 1
+
+    def _call(self, name: str, fn: Callable, *args, **kwargs) -> Any:
+        profile = self.profiles[name] = StageProfile(name)
+        profiler = cProfile.Profile()
+        before = tracemalloc.take_snapshot()
+        retained = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        with self._lock:
+            self._running[threading.get_ident()] = name
+        cpu = time.thread_time()
+        started = time.perf_counter()
+        try:
+            with tracer.attribute(profile.services):
+                return profiler.runcall(fn, *args, **kwargs)
+        finally:
+            profile.wall = time.perf_counter() - started
+            profile.cpu = time.thread_time() - cpu
+            with self._lock:
+                self._running.pop(threading.get_ident(), None)
+            current, peak = tracemalloc.get_traced_memory()
+            profile.peak_bytes = peak - retained
+            profile.retained_bytes = current - retained
+            profile.allocations = tracemalloc.take_snapshot().compare_to(before, "lineno")[:TOP_ALLOCATIONS]
+            profile.stats = pstats.Stats(profiler)
+            profile.stats.dump_stats(os.path.join(self.out_dir, f"{self.script}-{name}.prof"))
+
+    def run(self, name: str, fn: Callable, *args, **kwargs) -> Any:
+        """Call `fn` as the stage `name` and return its result."""
+        return self._call(name, fn, *args, **kwargs)
+
+    def wrap(self, name: str, fn: Callable) -> Callable:
+        """`fn` profiled as the stage `name`, for SeedEngine stages."""
+        return lambda *args, **kwargs: self._call(name, fn, *args, **kwargs)
+
+    def write_collapsed(self) -> str:
+        path = os.path.join(self.out_dir, f"{self.script}.folded")
+        with open(path, "w") as out:
+            for stack, count in sorted(self.samples.items()):
+                out.write(f"{stack} {count}\n")
+        return path
+
+    def _stage_lines(self, profile: StageProfile) -> List[str]:
+        lines = [
+            f"\nStage {profile.name}: {profile.wall:.2f}s wall = {profile.cpu_outside_hashing:.2f}s CPU + "
+            f"{profile.network:.2f}s network + {profile.hashing:.2f}s hashing + {profile.other:.2f}s other wait",
+            f"  memory: peak +{profile.peak_bytes / 1e6:.1f} MB, retained {profile.retained_bytes / 1e6:+.1f} MB",
+        ]
+        if profile.services:
+            calls = sorted(profile.services.items())
+            lines.append("  traced calls: " + ", ".join(f"{service} {count} calls {seconds:.2f}s ({cpu:.2f}s CPU)"
+                                                        for service, (seconds, cpu, count) in calls))
+        if profile.allocations:
+            lines.append("  largest allocation growth:")
+            for diff in profile.allocations:
+                frame = diff.traceback[0]
+                where = f"{os.path.basename(frame.filename)}:{frame.lineno}"
+                lines.append(f"    {diff.size_diff / 1e3:>10.1f} kB  {where}")
+        if profile.stats is not None and profile.stats.total_calls:
+            lines.append("  top functions by cumulative time:")
+            lines.append(f"    {'calls':>9}{'tottime':>9}{'cumtime':>9}  function")
+            profile.stats.sort_stats("cumulative")
+            for func in profile.stats.fcn_list[:TOP_FUNCTIONS]:
+                _, calls, tottime, cumtime, _ = profile.stats.stats[func]
+                filename, line, function = func
+                where = f"{os.path.basename(filename)}:{line}({function})" if line else function
+                lines.append(f"    {calls:>9}{tottime:>9.3f}{cumtime:>9.3f}  {where}")
+        return lines
+
+    def report(self) -> None:
+        """Print the per-stage report and write it, with the collapsed stacks, to the profile directory."""
+        if not self.profiles:
+            return
+        lines = [f"Profile of {self.script}:",
+                 f"{'stage':<24}{'wall s':>8}{'CPU s':>8}{'network s':>11}{'hashing s':>11}{'other s':>9}"
+                 f"{'peak MB':>9}"]
+        for profile in self.profiles.values():
+            lines.append(f"{profile.name:<24}{profile.wall:>8.2f}{profile.cpu_outside_hashing:>8.2f}"
+                         f"{profile.network:>11.2f}{profile.hashing:>11.2f}{profile.other:>9.2f}"
+                         f"{profile.peak_bytes / 1e6:>9.1f}")
+        for profile in self.profiles.values():
+            lines += self._stage_lines(profile)
+        text = "\n".join(lines)
+        print("\n" + text)
+        report_path = os.path.join(self.out_dir, f"{self.script}-report.txt")
+        with open(report_path, "w") as out:
+            out.write(text + "\n")
+        folded = self.write_collapsed()
+        print(f"\nProfile written to {report_path}; per-stage cProfile data in {self.out_dir}/*.prof; "
+              f"flame graph input in {folded}")
+
+
+_STAGE_ENTRY = RunProfiler._call.__code__
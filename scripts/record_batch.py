@@ -0,0 +1,97 @@
+from itertools import repeat
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+
+class Constant:
+    """A column holding the same value in every row of a batch."""
+
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+
+Column = Union[List, Constant]
+
+
+class RecordBatch:
+    """Rows of one table stored column by column instead of as one dict per row.
+
+    Each column is a list with one value per row, or a Constant stored once
+    for the whole batch (e.g. a shared timestamp or an enum value). Two
+    columns may share one list, as created_at and updated_at do for rows
+    that were never updated. The generator builds batches, the validator
+    checks them a column at a time, and the COPY loader streams tuples from
+    them; `rows()` turns them into dicts only where a consumer needs dicts,
+    such as the JSON body of a PostgREST request.
+    """
+
+    __slots__ = ("columns", "length")
+
+    def __init__(self, columns: Dict[str, Column]):
+        self.columns = columns
+        self.length = 0
+        for values in columns.values():
+            if not isinstance(values, Constant):
+                self.length = len(values)
+                break
+
+    @classmethod
+    def from_rows(cls, rows: Sequence[Dict]) -> "RecordBatch":
+        names = list(dict.fromkeys(name for row in rows for name in row))
+        return cls({name: [row.get(name) for row in rows] for name in names})
+
+    def __len__(self) -> int:
+        return self.length
+
+    @property
+    def names(self) -> List[str]:
+        return list(self.columns)
+
+    def column(self, name: str) -> List:
+        values = self.columns.get(name)
+        if values is None:
+            return [None] * self.length
+        if isinstance(values, Constant):
+            return [values.value] * self.length
+        return values
+
+    def _iter_column(self, name: str) -> Iterable:
+        values = self.columns.get(name)
+        if values is None:
+            return repeat(None, self.length)
+        if isinstance(values, Constant):
+            return repeat(values.value, self.length)
+        return values
+
+    def tuples(self, names: Optional[Sequence[str]] = None) -> Iterator[Tuple]:
+        """Yield one tuple per row in `names` order, without building dicts."""
+        return zip(*(self._iter_column(name) for name in (names or self.columns)))
+
+    def rows(self) -> Iterator[Dict]:
+        names = list(self.columns)
+        for values in self.tuples(names):
+            yield dict(zip(names, values))
+
+    def take(self, indexes: Sequence[int]) -> "RecordBatch":
+        """A new batch with only the rows at `indexes`; shared lists stay shared."""
+        taken: Dict[int, List] = {}
+        columns: Dict[str, Column] = {}
+        for name, values in self.columns.items():
+            if isinstance(values, Constant):
+                columns[name] = values
+            else:
+                if id(values) not in taken:
+                    taken[id(values)] = [values[i] for i in indexes]
+                columns[name] = taken[id(values)]
+        batch = RecordBatch(columns)
+        batch.length = len(indexes)
+        return batch
+
+    def slice(self, start: int, stop: Optional[int] = None) -> "RecordBatch":
+        return self.take(range(start, self.length if stop is None else min(stop, self.length)))
+
+
+def iter_rows(batches: Iterable[RecordBatch]) -> Iterator[Dict]:
+    for batch in batches:
+        yield from batch.rows()
@@ -0,0 +1,167 @@
+import argparse
+import json
+import os
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from dotenv import load_dotenv
+from postgrest.types import ReturnMethod
+
+from lookup_index import IN_FILTER_SIZE, PAGE_SIZE
+
+
+class ReferenceTable:
+    """A lookup table whose rows are identified by a natural key column."""
+
+    def __init__(self, table: str, key: str = "name", columns: Sequence[str] = ("description",)):
+        self.table = table
+        self.key = key
+        self.columns = tuple(columns)
+
+
+# Lookup tables that can be synced, keyed by table name
+REFERENCE_TABLES = {
+    "practice_areas": ReferenceTable("practice_areas", "name", ("description",)),
+    "roles": ReferenceTable("roles", "name", ("description",)),
+    "priorities": ReferenceTable("priorities", "name", ()),
+    "matter_types": ReferenceTable("matter_types", "value", ("label",)),
+    "currencies": ReferenceTable("currencies", "value", ("label",)),
+}
+
+
+class SyncPlan:
+    """The inserts, updates and deletes needed to make a table match the desired rows."""
+
+    def __init__(self, spec: ReferenceTable):
+        self.spec = spec
+        self.inserts: List[Dict] = []
+        self.updates: List[Dict] = []
+        self.deletes: List[Dict] = []
+        self.unchanged = 0
+
+    @property
+    def empty(self) -> bool:
+        return not (self.inserts or self.updates or self.deletes)
+
+    def summary(self) -> None:
+        key = self.spec.key
+        print(f"\n{self.spec.table}: {len(self.inserts)} to insert, {len(self.updates)} to update, "
+              f"{len(self.deletes)} to delete, {self.unchanged} unchanged")
+        for row in self.inserts:
+            print(f"  + {row[key]}")
+        for row in self.updates:
+            print(f"  ~ {row[key]}")
+        for row in self.deletes:
+            print(f"  - {row[key]}")
+
+
+def fetch_rows(client, spec: ReferenceTable) -> List[Dict]:
+    """Read the id, key and compared columns of every row, a page at a time."""
+    select = ",".join(dict.fromkeys(("id", spec.key) + spec.columns))
+    rows: List[Dict] = []
+    while True:
+        result = (client.table(spec.table).select(select).order("id")
+                  .range(len(rows), len(rows) + PAGE_SIZE - 1).execute())
+        rows.extend(result.data)
+        if len(result.data) < PAGE_SIZE:
+            return rows
+
+
+def plan_sync(client, spec: ReferenceTable, desired: Iterable[Dict], delete: bool = True) -> SyncPlan:
+    """Diff `desired` against the table by natural key.
+
+    Existing rows keep their IDs; only the compared columns that differ are
+    updated. Rows not in `desired` are deleted unless `delete` is False.
+    """
+    plan = SyncPlan(spec)
+    current = {row[spec.key]: row for row in fetch_rows(client, spec)}
+    wanted: Dict[str, Dict] = {}
+    for row in desired:
+        wanted.setdefault(row[spec.key], row)
+
+    for key, row in wanted.items():
+        existing = current.get(key)
+        if existing is None:
+            plan.inserts.append(row)
+        elif any(existing.get(column) != row[column] for column in spec.columns if column in row):
+            plan.updates.append({**existing, **row, "id": existing["id"]})
+        else:
+            plan.unchanged += 1
+    if delete:
+        plan.deletes = [row for key, row in current.items() if key not in wanted]
+    return plan
+
+
+def apply_sync(client, plan: SyncPlan) -> bool:
+    """Apply a plan with one bulk statement per kind of change; returns False on any error."""
+    table = plan.spec.table
+    ok = True
+    if plan.inserts:
+        try:
+            client.table(table).insert(plan.inserts, returning=ReturnMethod.minimal).execute()
+            print(f"Inserted {len(plan.inserts)} rows into {table}")
+        except Exception as e:
+            print(f"Error inserting into {table}: {str(e)}")
+            ok = False
+    if plan.updates:
+        try:
+            client.table(table).upsert(plan.updates, on_conflict="id",
+                                       returning=ReturnMethod.minimal).execute()
+            print(f"Updated {len(plan.updates)} rows in {table}")
+        except Exception as e:
+            print(f"Error updating {table}: {str(e)}")
+            ok = False
+    if plan.deletes:
+        ids = [row["id"] for row in plan.deletes]
+        try:
+            for start in range(0, len(ids), IN_FILTER_SIZE):
+                client.table(table).delete(returning=ReturnMethod.minimal).in_(
+                    "id", ids[start:start + IN_FILTER_SIZE]).execute()
+            print(f"Deleted {len(ids)} rows from {table}")
+        except Exception as e:
+            print(f"Error deleting from {table}: {str(e)}")
+            ok = False
+    return ok
+
+
+def sync_reference_data(client, spec: ReferenceTable, desired: Iterable[Dict],
+                        delete: bool = True, dry_run: bool = False) -> Optional[SyncPlan]:
+    """Plan, summarise and (unless `dry_run`) apply a reference-data sync."""
+    try:
+        plan = plan_sync(client, spec, desired, delete=delete)
+    except Exception as e:
+        print(f"Error reading {spec.table}: {str(e)}")
+        return None
+    plan.summary()
+    if dry_run or plan.empty:
+        return plan
+    apply_sync(client, plan)
+    return plan
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Sync a lookup table with the rows in a JSON file.")
+    parser.add_argument("table", choices=sorted(REFERENCE_TABLES))
+    parser.add_argument("rows", help="JSON file holding a list of row objects")
+    parser.add_argument("--dry-run", action="store_true", help="Print the changes without applying them")
+    parser.add_argument("--keep-extra", action="store_true",
+                        help="Do not delete rows that are missing from the file")
+    return parser.parse_args()
+
+
+def main():
+    from supabase import create_client
+
+    args = parse_args()
+    load_dotenv()
+    client = create_client(
+        os.getenv('NEXT_PUBLIC_SUPABASE_URL', ''),
+        os.getenv('NEXT_PUBLIC_SUPABASE_ANON_KEY', '')
+    )
+    with open(args.rows) as f:
+        rows = json.load(f)
+    sync_reference_data(client, REFERENCE_TABLES[args.table], rows,
+                        delete=not args.keep_extra, dry_run=args.dry_run)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+import argparse
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from dotenv import load_dotenv
+from postgrest.types import ReturnMethod
+
+from local_store import cache_path
+
+DEFAULT_CHUNK_SIZE = 1000
+DEFAULT_TABLES = ["messages", "notes", "document_audit_logs"]
+ACTIONS = ("archive", "delete")
+
+
+class RetentionPolicy:
+    """Archive rows older than `days`, or delete archived rows older than `days`."""
+
+    def __init__(self, table: str, action: str, days: int):
+        if action not in ACTIONS:
+            raise ValueError(f"Unknown retention action {action!r}, expected one of {ACTIONS}")
+        self.table = table
+        self.action = action
+        self.days = days
+
+    @property
+    def name(self) -> str:
+        return f"{self.action}:{self.table}"
+
+
+class RetentionCheckpoints:
+    """SQLite record of how far each policy got, keyed by (action, table).
+
+    A checkpoint holds the cutoff the run started with and the (created_at, id)
+    of the last chunk that was fully applied. An unfinished checkpoint is
+    resumed with its original cutoff.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or cache_path("retention.sqlite")
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS checkpoints (
+                policy TEXT PRIMARY KEY,
+                cutoff TEXT NOT NULL,
+                last_created_at TEXT,
+                last_id TEXT,
+                processed INTEGER NOT NULL DEFAULT 0,
+                done INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        self._conn.commit()
+
+    def get(self, policy: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT cutoff, last_created_at, last_id, processed, done FROM checkpoints WHERE policy = ?",
+                (policy,)
+            ).fetchone()
+        if row is None:
+            return None
+        return dict(zip(("cutoff", "last_created_at", "last_id", "processed", "done"), row))
+
+    def save(self, policy: str, cutoff: str, last_created_at: Optional[str], last_id: Optional[str],
+             processed: int, done: bool = False) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?)",
+                (policy, cutoff, last_created_at, last_id, processed, int(done)),
+            )
+            self._conn.commit()
+
+    def clear(self, policy: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM checkpoints WHERE policy = ?", (policy,))
+            self._conn.commit()
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+class PolicyProgress:
+    def __init__(self, policy: RetentionPolicy):
+        self.policy = policy
+        self.rows = 0
+        self.chunks = 0
+        self.resumed = False
+        self.failed = False
+        self.seconds = 0.0
+
+
+class RetentionJob:
+    """Apply retention policies in keyset-ordered chunks, several tables at a time.
+
+    Each table is walked in (created_at, id) order, one page of IDs at a time;
+    each page is archived or deleted with an in_() filter and a minimal return
+    payload, so no statement touches more than `chunk_size` rows. Up to
+    `chunks_in_flight` chunks per table run concurrently, and the checkpoint
+    only advances past chunks whose predecessors have all been applied.
+    """
+
+    def __init__(self, client, checkpoints: Optional[RetentionCheckpoints] = None,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE, tables_in_parallel: int = 3,
+                 chunks_in_flight: int = 2):
+        self.client = client
+        self.checkpoints = checkpoints or RetentionCheckpoints()
+        self.chunk_size = chunk_size
+        self.tables_in_parallel = tables_in_parallel
+        self.chunks_in_flight = chunks_in_flight
+        self.progress: Dict[str, PolicyProgress] = {}
+
+    def _page(self, policy: RetentionPolicy, cutoff: str, last_created_at: Optional[str],
+              last_id: Optional[str]) -> List[Dict]:
+        query = self.client.table(policy.table).select("id,created_at").lt("created_at", cutoff)
+        if policy.action == "archive":
+            # neq alone never matches a NULL status
+            query = query.or_("status.is.null,status.neq.archived")
+        else:
+            query = query.eq("status", "archived")
+        if last_created_at is not None:
+            query = query.or_(f'created_at.gt."{last_created_at}",'
+                              f'and(created_at.eq."{last_created_at}",id.gt.{last_id})')
+        return query.order("created_at").order("id").limit(self.chunk_size).execute().data
+
+    def _apply(self, policy: RetentionPolicy, ids: List[str]) -> None:
+        table = self.client.table(policy.table)
+        if policy.action == "archive":
+            query = table.update({"status": "archived"}, returning=ReturnMethod.minimal)
+        else:
+            query = table.delete(returning=ReturnMethod.minimal)
+        query.in_("id", ids).execute()
+
+    def run_policy(self, policy: RetentionPolicy) -> PolicyProgress:
+        progress = PolicyProgress(policy)
+        self.progress[policy.name] = progress
+        started = time.perf_counter()
+
+        checkpoint = self.checkpoints.get(policy.name)
+        if checkpoint and not checkpoint["done"]:
+            cutoff = checkpoint["cutoff"]
+            last_created_at, last_id = checkpoint["last_created_at"], checkpoint["last_id"]
+            processed = checkpoint["processed"]
+            progress.resumed = True
+            print(f"Resuming {policy.name} after {processed} rows (cutoff {cutoff})")
+        else:
+            cutoff = (datetime.now() - timedelta(days=policy.days)).isoformat()
+            last_created_at = last_id = None
+            processed = 0
+            self.checkpoints.save(policy.name, cutoff, None, None, 0)
+
+        pending = deque()
+        with ThreadPoolExecutor(max_workers=self.chunks_in_flight,
+                                thread_name_prefix=f"retention-{policy.table}") as pool:
+
+            def settle(block: bool) -> None:
+                # Advance the checkpoint over the chunks that finished in order
+                nonlocal processed
+                while pending and (block or pending[0][0].done()):
+                    future, last_row, count = pending.popleft()
+                    future.result()
+                    processed += count
+                    progress.rows += count
+                    progress.chunks += 1
+                    self.checkpoints.save(policy.name, cutoff, last_row["created_at"],
+                                          last_row["id"], processed)
+                    block = False
+
+            try:
+                while True:
+                    rows = self._page(policy, cutoff, last_created_at, last_id)
+                    if not rows:
+                        break
+                    last_created_at, last_id = rows[-1]["created_at"], rows[-1]["id"]
+                    pending.append((pool.submit(self._apply, policy, [row["id"] for row in rows]),
+                                    rows[-1], len(rows)))
+                    settle(block=len(pending) >= self.chunks_in_flight)
+                    if len(rows) < self.chunk_size:
+                        break
+                while pending:
+                    settle(block=True)
+                self.checkpoints.save(policy.name, cutoff, last_created_at, last_id, processed, done=True)
+            except Exception as e:
+                progress.failed = True
+                print(f"Error applying {policy.name} after {processed} rows: {str(e)}")
+
+        progress.seconds = time.perf_counter() - started
+        verb = "Archived" if policy.action == "archive" else "Deleted archived"
+        print(f"{verb} {progress.rows} records from {policy.table}")
+        return progress
+
+    def run(self, policies: List[RetentionPolicy]) -> Dict[str, PolicyProgress]:
+        with ThreadPoolExecutor(max_workers=self.tables_in_parallel,
+                                thread_name_prefix="retention") as pool:
+            list(pool.map(self.run_policy, policies))
+        return self.progress
+
+    @property
+    def failed(self) -> List[str]:
+        return [name for name, progress in self.progress.items() if progress.failed]
+
+    def report(self) -> None:
+        print("\nRetention summary:")
+        print(f"{'policy':<32}{'rows':>10}{'chunks':>8}{'seconds':>9}  status")
+        for name, progress in self.progress.items():
+            status = "failed" if progress.failed else ("resumed" if progress.resumed else "ok")
+            print(f"{name:<32}{progress.rows:>10}{progress.chunks:>8}{progress.seconds:>9.2f}  {status}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Archive old rows and delete old archived rows in chunks.")
+    parser.add_argument("--tables", default=",".join(DEFAULT_TABLES),
+                        help="Comma-separated tables to process")
+    parser.add_argument("--archive-days", type=int, default=365,
+                        help="Archive rows older than this many days (0 to skip)")
+    parser.add_argument("--delete-days", type=int, default=730,
+                        help="Delete archived rows older than this many days (0 to skip)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--tables-in-parallel", type=int, default=3)
+    parser.add_argument("--chunks-in-flight", type=int, default=2,
+                        help="Concurrent chunk statements per table")
+    parser.add_argument("--restart", action="store_true",
+                        help="Ignore unfinished checkpoints and start from a fresh cutoff")
+    return parser.parse_args()
+
+
+def main():
+    from supabase import create_client
+
+    args = parse_args()
+    load_dotenv()
+    client = create_client(
+        os.getenv('NEXT_PUBLIC_SUPABASE_URL', ''),
+        os.getenv('SUPABASE_SERVICE_ROLE_KEY', '')
+    )
+    tables = [table.strip() for table in args.tables.split(",") if table.strip()]
+    policies = []
+    if args.archive_days:
+        policies += [RetentionPolicy(table, "archive", args.archive_days) for table in tables]
+    if args.delete_days:
+        policies += [RetentionPolicy(table, "delete", args.delete_days) for table in tables]
+
+    job = RetentionJob(client, chunk_size=args.chunk_size, tables_in_parallel=args.tables_in_parallel,
+                       chunks_in_flight=args.chunks_in_flight)
+    try:
+        if args.restart:
+            for policy in policies:
+                job.checkpoints.clear(policy.name)
+        # Archive before delete on the same table so freshly archived rows are not raced
+        archives = [p for p in policies if p.action == "archive"]
+        deletes = [p for p in policies if p.action == "delete"]
+        for batch in (archives, deletes):
+            if batch:
+                job.run(batch)
+        job.report()
+    finally:
+        job.checkpoints.close()
+    if job.failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+import re
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from schema_cache import SchemaSnapshot
+
+# Casts, qualifiers, parentheses and whitespace that pg_policies adds when it deparses an expression
+_CAST_RE = re.compile(r'::(?:character varying|[a-z_]+)(?:\[\])?')
+_QUALIFIER_RE = re.compile(r'\b[a-z_][a-z0-9_]*\.')
+_NOISE_RE = re.compile(r'[\s()]+')
+
+
+def normalize_expression(expression: Optional[str]) -> Optional[str]:
+    """Reduce a policy expression to a form that survives Postgres' deparsing.
+
+    Lossy but symmetric: both the desired and the stored expression go through
+    it, so equal expressions compare equal whatever the formatting.
+    """
+    if expression is None:
+        return None
+    return _NOISE_RE.sub("", _QUALIFIER_RE.sub("", _CAST_RE.sub("", expression.lower())))
+
+
+def _quote(identifier: str) -> str:
+    return '"' + identifier.replace('"', '""') + '"'
+
+
+class PolicySpec:
+    """A row level security policy as it should exist on a table."""
+
+    def __init__(self, table: str, name: str, command: str = "ALL", using: Optional[str] = None,
+                 check: Optional[str] = None):
+        self.table = table
+        self.name = name
+        self.command = command.upper()
+        self.using = using
+        self.check = check
+
+    def matches(self, current: Dict) -> bool:
+        return (current.get("command", "").upper() == self.command
+                and normalize_expression(current.get("using")) == normalize_expression(self.using)
+                and normalize_expression(current.get("check")) == normalize_expression(self.check))
+
+    def create_sql(self) -> str:
+        sql = f"CREATE POLICY {_quote(self.name)} ON {self.table} FOR {self.command}"
+        if self.using is not None:
+            sql += f" USING ({self.using})"
+        if self.check is not None:
+            sql += f" WITH CHECK ({self.check})"
+        return sql + ";"
+
+    def drop_sql(self) -> str:
+        return drop_policy_sql(self.table, self.name)
+
+
+def drop_policy_sql(table: str, name: str) -> str:
+    return f"DROP POLICY IF EXISTS {_quote(name)} ON {table};"
+
+
+class PolicyPlan:
+    """The statements that bring a set of tables' policies to the desired state."""
+
+    def __init__(self):
+        self.enable: List[str] = []
+        self.drops: List[str] = []
+        self.creates: List[PolicySpec] = []
+        self.unchanged = 0
+
+    @property
+    def empty(self) -> bool:
+        return not (self.enable or self.drops or self.creates)
+
+    def statements(self) -> List[str]:
+        # Drops come first so that a changed policy can be re-created under its own name
+        return ([f"ALTER TABLE {table} ENABLE ROW LEVEL SECURITY;" for table in self.enable]
+                + self.drops + [spec.create_sql() for spec in self.creates])
+
+    def sql(self) -> str:
+        """All statements as one script; exec_sql runs it inside a single transaction."""
+        return "\n".join(self.statements())
+
+    def summary(self) -> None:
+        print(f"RLS plan: {len(self.enable)} tables to enable, {len(self.drops)} policies to drop, "
+              f"{len(self.creates)} to create, {self.unchanged} unchanged")
+        for statement in self.statements():
+            print(f"  {statement}")
+
+
+def plan_policies(snapshot: Optional[SchemaSnapshot], desired: Iterable[PolicySpec],
+                  obsolete: Optional[Dict[str, Sequence[str]]] = None) -> PolicyPlan:
+    """Diff the desired policies (and the obsolete names per table) against the catalog.
+
+    Only policies that are missing or differ are re-created, and RLS is only
+    ever enabled, never switched off. Without a snapshot nothing is known
+    about the current state, so every desired policy is dropped if present
+    and re-created; the statements are idempotent either way.
+    """
+    plan = PolicyPlan()
+    desired = list(desired)
+    for table in dict.fromkeys(spec.table for spec in desired):
+        if snapshot is None or not snapshot.rls.get(table):
+            plan.enable.append(table)
+    for table, names in (obsolete or {}).items():
+        current = snapshot.table_policies(table) if snapshot is not None else None
+        plan.drops += [drop_policy_sql(table, name) for name in names if current is None or name in current]
+    for spec in desired:
+        current = snapshot.table_policies(spec.table).get(spec.name) if snapshot is not None else None
+        if current is not None and spec.matches(current):
+            plan.unchanged += 1
+            continue
+        if snapshot is None or current is not None:
+            plan.drops.append(spec.drop_sql())
+        plan.creates.append(spec)
+    return plan
+
+
+def apply_plan(client, plan: PolicyPlan) -> None:
+    """Run the whole plan in one exec_sql round trip, so it commits or rolls back as a unit."""
+    if not plan.empty:
+        client.rpc("exec_sql", {"sql": plan.sql()}).execute()
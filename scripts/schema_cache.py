@@ -0,0 +1,116 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+
+from local_store import cache_path
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "supabase", "migrations")
+
+
+def latest_migration(directory: str = MIGRATIONS_DIR) -> Optional[str]:
+    names = sorted(name for name in os.listdir(directory) if name.endswith(".sql"))
+    return names[-1] if names else None
+
+
+def schema_fingerprint(ddl: str = "", directory: str = MIGRATIONS_DIR) -> str:
+    """Fingerprint of the migrations on disk plus the DDL the seed script itself issues.
+
+    Keyed by the latest migration name, with a digest of every migration file
+    so that an edited migration also counts as a change.
+    """
+    digest = hashlib.sha256()
+    for name in sorted(name for name in os.listdir(directory) if name.endswith(".sql")):
+        digest.update(name.encode())
+        with open(os.path.join(directory, name), "rb") as f:
+            digest.update(hashlib.sha256(f.read()).digest())
+    digest.update(ddl.encode())
+    return f"{latest_migration(directory)}:{digest.hexdigest()[:16]}"
+
+
+class SchemaSnapshot:
+    """Tables, RLS flags, columns and policies of the public schema, as returned by schema_catalog()."""
+
+    def __init__(self, catalog: Dict):
+        self.catalog = catalog
+        self.rls = {row["table"]: row["rls"] for row in catalog.get("tables", [])}
+        self.columns: Dict[str, List[Dict]] = {}
+        for row in catalog.get("columns", []):
+            self.columns.setdefault(row["table"], []).append(row)
+        self.policies: Dict[str, Dict[str, Dict]] = {}
+        for row in catalog.get("policies", []):
+            self.policies.setdefault(row["table"], {})[row["name"]] = row
+
+    def has_table(self, table: str) -> bool:
+        return table in self.rls
+
+    def table_policies(self, table: str) -> Dict[str, Dict]:
+        return self.policies.get(table, {})
+
+    def describe(self, tables: List[str]) -> str:
+        lines = []
+        for table in tables:
+            columns = self.columns.get(table)
+            if columns is None:
+                lines.append(f"{table}: missing")
+            else:
+                lines.append(f"{table}: " + ", ".join(f"{c['column']} {c['type']}" for c in columns))
+        return "\n".join(lines)
+
+
+def fetch_snapshot(client) -> SchemaSnapshot:
+    """Read the whole public catalog in one RPC round trip."""
+    catalog = client.rpc("schema_catalog", {}).execute().data
+    if not isinstance(catalog, dict) or "tables" not in catalog:
+        raise ValueError(f"schema_catalog() returned {type(catalog).__name__}, expected a catalog object")
+    return SchemaSnapshot(catalog)
+
+
+class SchemaCache:
+    """SQLite record of the last schema each Supabase project was brought up to.
+
+    One row per project URL: the fingerprint the DDL stages last completed
+    against and the catalog snapshot taken then. A matching fingerprint means
+    the schema DDL has nothing left to do for that project.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or cache_path("schema.sqlite")
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS snapshots (
+                project TEXT PRIMARY KEY,
+                fingerprint TEXT NOT NULL,
+                catalog TEXT NOT NULL,
+                saved_at REAL NOT NULL
+            )
+        """)
+        self._conn.commit()
+
+    def get(self, project: str, fingerprint: str) -> Optional[SchemaSnapshot]:
+        """Return the cached snapshot if it was taken at `fingerprint`."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT catalog FROM snapshots WHERE project = ? AND fingerprint = ?", (project, fingerprint)
+            ).fetchone()
+        return SchemaSnapshot(json.loads(row[0])) if row else None
+
+    def save(self, project: str, fingerprint: str, snapshot: SchemaSnapshot) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO snapshots VALUES (?, ?, ?, ?)",
+                (project, fingerprint, json.dumps(snapshot.catalog), time.time()),
+            )
+            self._conn.commit()
+
+    def clear(self, project: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM snapshots WHERE project = ?", (project,))
+            self._conn.commit()
+
+    def close(self) -> None:
+        self._conn.close()
@@ -0,0 +1,165 @@
+import asyncio
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+StageFn = Callable[[Dict[str, Any]], Any]
+
+
+# Statuses that let dependent stages run
+OK_STATUSES = ("ok", "resumed")
+
+
+class StageFailed(Exception):
+    """Raised when a required stage fails or returns no result."""
+
+
+class Stage:
+    """One node of the seeding DAG.
+
+    `fn` receives the results of every stage finished so far, keyed by stage
+    name, and runs on a worker thread so blocking HTTP calls never stall the
+    event loop. A `required` stage that returns a falsy value cancels all of
+    its dependents. The result of a `resumable` stage is recorded in the
+    engine's journal, and a rerun restores it instead of running the stage.
+    """
+
+    def __init__(self, name: str, fn: StageFn, deps: Sequence[str] = (), required: bool = False,
+                 resumable: bool = False):
+        self.name = name
+        self.fn = fn
+        self.deps = tuple(deps)
+        self.required = required
+        self.resumable = resumable
+
+
+class StageTiming:
+    def __init__(self, name: str, started: float, finished: float, status: str):
+        self.name = name
+        self.started = started
+        self.finished = finished
+        self.status = status
+
+    @property
+    def seconds(self) -> float:
+        return self.finished - self.started
+
+
+def validate_stages(stages: Iterable[Stage]) -> Dict[str, Stage]:
+    """Index stages by name, rejecting unknown dependencies and cycles."""
+    by_name: Dict[str, Stage] = {}
+    for stage in stages:
+        if stage.name in by_name:
+            raise ValueError(f"Duplicate stage: {stage.name}")
+        by_name[stage.name] = stage
+
+    for stage in by_name.values():
+        for dep in stage.deps:
+            if dep not in by_name:
+                raise ValueError(f"Stage {stage.name} depends on unknown stage {dep}")
+
+    visiting, done = set(), set()
+
+    def visit(name: str, path: List[str]):
+        if name in done:
+            return
+        if name in visiting:
+            raise ValueError(f"Stage dependency cycle: {' -> '.join(path + [name])}")
+        visiting.add(name)
+        for dep in by_name[name].deps:
+            visit(dep, path + [name])
+        visiting.discard(name)
+        done.add(name)
+
+    for name in by_name:
+        visit(name, [])
+    return by_name
+
+
+class SeedEngine:
+    """Run a DAG of seeding stages, starting each one as soon as its dependencies finish.
+
+    `max_concurrent` caps how many stages run at once; profiling runs them
+    one at a time so that each stage's CPU and memory figures are its own.
+    """
+
+    def __init__(self, stages: Iterable[Stage], journal=None, max_concurrent: Optional[int] = None):
+        self.stages = validate_stages(stages)
+        self.journal = journal
+        self.max_concurrent = max_concurrent
+        self.results: Dict[str, Any] = {}
+        self.timings: Dict[str, StageTiming] = {}
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    async def _run_stage(self, stage: Stage, tasks: Dict[str, "asyncio.Task"], origin: float):
+        for dep in stage.deps:
+            await tasks[dep]
+            if self.timings[dep].status not in OK_STATUSES:
+                self.timings[stage.name] = StageTiming(stage.name, 0.0, 0.0, f"skipped ({dep})")
+                return
+
+        if self._slots is None:
+            await self._run_ready(stage, origin)
+        else:
+            async with self._slots:
+                await self._run_ready(stage, origin)
+
+    async def _run_ready(self, stage: Stage, origin: float):
+        started = time.perf_counter() - origin
+        if stage.resumable and self.journal is not None and self.journal.finished(stage.name):
+            self.results[stage.name] = self.journal.result(stage.name)
+            self.timings[stage.name] = StageTiming(stage.name, started, started, "resumed")
+            return
+        status = "ok"
+        try:
+            result = await asyncio.to_thread(stage.fn, self.results)
+            self.results[stage.name] = result
+            if stage.required and not result:
+                status = "failed"
+                print(f"Error: stage {stage.name} produced no result")
+        except Exception as e:
+            status = "failed"
+            print(f"Error in stage {stage.name}: {str(e)}")
+        if status == "ok" and stage.resumable and self.journal is not None:
+            self.journal.complete(stage.name, self.results[stage.name])
+        self.timings[stage.name] = StageTiming(stage.name, started,
+                                               time.perf_counter() - origin, status)
+
+    async def run_async(self) -> Dict[str, Any]:
+        origin = time.perf_counter()
+        self._slots = asyncio.Semaphore(self.max_concurrent) if self.max_concurrent else None
+        tasks: Dict[str, asyncio.Task] = {}
+        for stage in self.stages.values():
+            tasks[stage.name] = asyncio.create_task(self._run_stage(stage, tasks, origin))
+        await asyncio.gather(*tasks.values())
+        return self.results
+
+    def run(self) -> Dict[str, Any]:
+        return asyncio.run(self.run_async())
+
+    def critical_path(self) -> List[str]:
+        """Return the dependency chain that determined the total wall-clock time."""
+        finished = {name: timing.finished for name, timing in self.timings.items()}
+        if not finished:
+            return []
+        name: Optional[str] = max(finished, key=finished.get)
+        path = []
+        while name:
+            path.append(name)
+            deps = self.stages[name].deps
+            name = max(deps, key=lambda dep: finished.get(dep, 0.0)) if deps else None
+        return list(reversed(path))
+
+    @property
+    def failed(self) -> List[str]:
+        return [name for name, timing in self.timings.items() if timing.status not in OK_STATUSES]
+
+    def report(self) -> None:
+        print("\nStage timings:")
+        print(f"{'stage':<24}{'start':>9}{'end':>9}{'seconds':>10}  status")
+        for timing in sorted(self.timings.values(), key=lambda t: (t.started, t.name)):
+            print(f"{timing.name:<24}{timing.started:>9.2f}{timing.finished:>9.2f}"
+                  f"{timing.seconds:>10.2f}  {timing.status}")
+        total = max((timing.finished for timing in self.timings.values()), default=0.0)
+        serial = sum(timing.seconds for timing in self.timings.values())
+        print(f"Wall clock {total:.2f}s (sum of stages {serial:.2f}s), "
+              f"critical path: {' -> '.join(self.critical_path())}")
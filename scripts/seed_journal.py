@@ -0,0 +1,112 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional
+
+from local_store import cache_path
+
+
+def run_key(**parts) -> str:
+    """Identify a seeding run by everything that determines the rows it writes."""
+    text = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(text.encode()).hexdigest()[:16]
+
+
+class SeedJournal:
+    """SQLite record of an unfinished seeding run, so a rerun picks up where it stopped.
+
+    For each run key it keeps the result of every finished stage (the users,
+    cases and other natural key -> ID maps later stages depend on) and, for
+    streamed stages, how many rows of the stream have been written. A run
+    that completes clears its entries.
+    """
+
+    def __init__(self, run: str, path: Optional[str] = None):
+        self.run = run
+        self.path = path or cache_path("seed_journal.sqlite")
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS stages (
+                run TEXT NOT NULL,
+                stage TEXT NOT NULL,
+                result TEXT,
+                finished_at REAL NOT NULL,
+                PRIMARY KEY (run, stage)
+            );
+            CREATE TABLE IF NOT EXISTS batches (
+                run TEXT NOT NULL,
+                stage TEXT NOT NULL,
+                rows_done INTEGER NOT NULL,
+                PRIMARY KEY (run, stage)
+            );
+        """)
+        self._conn.commit()
+        self._finished = self._load_finished()
+
+    def _load_finished(self) -> Dict[str, Any]:
+        with self._lock:
+            rows = self._conn.execute("SELECT stage, result FROM stages WHERE run = ?", (self.run,)).fetchall()
+        return {stage: json.loads(result) for stage, result in rows}
+
+    @property
+    def resuming(self) -> bool:
+        return bool(self._finished) or self.offset_total() > 0
+
+    def finished(self, stage: str) -> bool:
+        return stage in self._finished
+
+    def result(self, stage: str) -> Any:
+        return self._finished[stage]
+
+    def complete(self, stage: str, result: Any) -> None:
+        """Record a finished stage's result; its batch offset is no longer needed."""
+        encoded = json.dumps(result, default=str)
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO stages VALUES (?, ?, ?, ?)",
+                               (self.run, stage, encoded, time.time()))
+            self._conn.execute("DELETE FROM batches WHERE run = ? AND stage = ?", (self.run, stage))
+            self._conn.commit()
+        self._finished[stage] = json.loads(encoded)
+
+    def offset(self, stage: str) -> int:
+        with self._lock:
+            row = self._conn.execute("SELECT rows_done FROM batches WHERE run = ? AND stage = ?",
+                                     (self.run, stage)).fetchone()
+        return row[0] if row else 0
+
+    def offset_total(self) -> int:
+        with self._lock:
+            row = self._conn.execute("SELECT COALESCE(SUM(rows_done), 0) FROM batches WHERE run = ?",
+                                     (self.run,)).fetchone()
+        return row[0]
+
+    def advance(self, stage: str, rows_done: int) -> None:
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO batches VALUES (?, ?, ?)", (self.run, stage, rows_done))
+            self._conn.commit()
+
+    def resume(self, stage: str, rows: Iterable[Dict]) -> Iterator[Dict]:
+        """Skip the rows of `stage`'s stream that an earlier attempt already wrote."""
+        done = self.offset(stage)
+        if done:
+            print(f"Resuming {stage} after {done} rows written by an earlier run")
+        return islice(rows, done, None)
+
+    def progress(self, stage: str) -> Callable[[int], None]:
+        """Callback for BulkWriter.write_stream that records rows written past the resume point."""
+        start = self.offset(stage)
+        return lambda consumed: self.advance(stage, start + consumed)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM stages WHERE run = ?", (self.run,))
+            self._conn.execute("DELETE FROM batches WHERE run = ?", (self.run,))
+            self._conn.commit()
+        self._finished = {}
+
+    def close(self) -> None:
+        self._conn.close()
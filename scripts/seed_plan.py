@@ -0,0 +1,348 @@
+"""Record what a seed run would write (--plan) and execute exactly that later (--apply).
+
+Planning runs the stages as usual, reads included: the schema catalog, the
+prefetched natural keys and the existing-row checks all hit the database,
+so the plan knows which rows are new. Nothing is written. The bulk writer
+hands every chunk to the plan instead of PostgREST, assigning client-side
+IDs where a stage needs IDs back. DDL and other write RPCs are recorded,
+and so are the notifications and calendar syncs the run would trigger.
+Case and invoice numbers are allocated from the plan's own copy of
+number_sequences, and applying the plan moves the real counters past them.
+Note analysis is a read-only call to Azure, so it runs while planning and
+the plan stores the annotated notes.
+
+A plan is a directory:
+
+    manifest.json        target URL, options, and every stage with its deps, status and counts
+    <stage>.jsonl.gz     the stage's operations, one JSON object per line, in the order they were made
+
+Applying a plan replays each stage's operations in order, with the
+stages' original dependencies, and makes no reads to decide what to
+write. The rows were chosen against the database as it was when the plan
+was made, so apply a plan soon after making it.
+"""
+import gzip
+import json
+import math
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from itertools import chain, groupby
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from tracing import tracer
+
+PLAN_VERSION = 1
+MANIFEST = "manifest.json"
+# RPCs that only read; every other RPC is recorded instead of called
+READ_ONLY_RPCS = {"schema_catalog"}
+# Recorded when an operation happens outside a stage
+RUN_STAGE = "run"
+
+
+class StagePlan:
+    """What one stage would do, for the manifest and the summary."""
+
+    def __init__(self, name: str, deps: Iterable[str] = ()):
+        self.name = name
+        self.deps = list(deps)
+        self.status = "pending"
+        # "table operation" -> rows, e.g. "users upsert"
+        self.rows: Dict[str, int] = {}
+        self.sql = 0
+        self.rpcs = 0
+        # kind -> items, e.g. "email notifications"
+        self.external: Dict[str, int] = {}
+        # service -> [seconds, thread CPU seconds, calls] made while planning
+        self.services: Dict[str, List[float]] = {}
+
+    @property
+    def reads(self) -> int:
+        return int(self.services.get("supabase", [0, 0, 0])[2])
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"name": self.name, "deps": self.deps, "status": self.status, "rows": self.rows,
+                "sql": self.sql, "rpcs": self.rpcs, "external": self.external, "reads": self.reads}
+
+
+class SeedPlan:
+    """Collects the operations of a planning run into a plan directory; see the module docstring."""
+
+    def __init__(self, path: str, url: str, chunk_size: int, options: Optional[Dict[str, Any]] = None):
+        self.path = path
+        self.url = url
+        self.chunk_size = chunk_size
+        self.options = options or {}
+        self.stages: Dict[str, StagePlan] = {}
+        self._files: Dict[str, Any] = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def start(self, stages) -> None:
+        """Create the plan directory and register `stages` (SeedEngine Stages) in DAG order."""
+        os.makedirs(self.path, exist_ok=True)
+        for name in os.listdir(self.path):
+            if name == MANIFEST or name.endswith(".jsonl.gz"):
+                os.remove(os.path.join(self.path, name))
+        for stage in stages:
+            self.stages[stage.name] = StagePlan(stage.name, stage.deps)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[StagePlan]:
+        """Record the operations made on this thread as part of stage `name`."""
+        plan = self.stages.setdefault(name, StagePlan(name))
+        previous = getattr(self._local, "stage", None)
+        self._local.stage = plan
+        try:
+            with tracer.attribute(plan.services):
+                yield plan
+        finally:
+            self._local.stage = previous
+
+    def wrap(self, name: str, fn: Callable) -> Callable:
+        """`fn` planned as the stage `name`, for SeedEngine stages."""
+        def planned(*args, **kwargs):
+            with self.stage(name):
+                return fn(*args, **kwargs)
+        return planned
+
+    def _current(self) -> StagePlan:
+        plan = getattr(self._local, "stage", None)
+        if plan is None:
+            plan = self.stages.setdefault(RUN_STAGE, StagePlan(RUN_STAGE))
+        return plan
+
+    def _append(self, stage: StagePlan, operation: Dict[str, Any]) -> None:
+        line = json.dumps(operation, default=str, separators=(",", ":")) + "\n"
+        with self._lock:
+            out = self._files.get(stage.name)
+            if out is None:
+                out = self._files[stage.name] = gzip.open(
+                    os.path.join(self.path, f"{stage.name}.jsonl.gz"), "wt", encoding="utf-8")
+            out.write(line)
+
+    def record_write(self, table: str, rows: List[Dict], on_conflict: Optional[str],
+                     ignore_duplicates: bool, returning: bool) -> List[Dict]:
+        """Record one bulk write chunk and answer as PostgREST would if every row were written.
+
+        Rows asked to come back get a client-side ID first, so later stages
+        reference the same IDs the apply run will insert.
+        """
+        if returning:
+            for row in rows:
+                if row.get("id") is None:
+                    row["id"] = str(uuid.uuid4())
+        stage = self._current()
+        operation = "upsert" if on_conflict else "insert"
+        with self._lock:
+            key = f"{table} {operation}"
+            stage.rows[key] = stage.rows.get(key, 0) + len(rows)
+        self._append(stage, {"op": "write", "table": table, "on_conflict": on_conflict,
+                             "ignore_duplicates": ignore_duplicates, "rows": rows})
+        return rows if returning else []
+
+    def record_rpc(self, function: str, params: Dict[str, Any]) -> None:
+        stage = self._current()
+        with self._lock:
+            if function == "exec_sql":
+                stage.sql += 1
+            else:
+                stage.rpcs += 1
+        self._append(stage, {"op": "rpc", "function": function, "params": params})
+
+    def record_external(self, kind: str, count: int, operation: Dict[str, Any]) -> None:
+        stage = self._current()
+        with self._lock:
+            stage.external[kind] = stage.external.get(kind, 0) + count
+        self._append(stage, operation)
+
+    def finish(self, engine) -> str:
+        """Close the operation files and write the manifest with each stage's outcome."""
+        with self._lock:
+            for out in self._files.values():
+                out.close()
+            self._files.clear()
+        for name, timing in engine.timings.items():
+            if name in self.stages:
+                self.stages[name].status = timing.status
+        manifest = {
+            "version": PLAN_VERSION,
+            "url": self.url,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "chunk_size": self.chunk_size,
+            "options": self.options,
+            "stages": [stage.to_dict() for stage in self.stages.values()],
+        }
+        path = os.path.join(self.path, MANIFEST)
+        with open(path, "w") as out:
+            json.dump(manifest, out, indent=2)
+        return path
+
+    def summary(self) -> None:
+        print_summary(self.url, [stage.to_dict() for stage in self.stages.values()], self.chunk_size)
+
+
+def print_summary(url: str, stages: List[Dict[str, Any]], chunk_size: int) -> None:
+    """Print per-stage row counts and the round trips applying them would take."""
+    print(f"\nPlan for {url} (write requests estimated at {chunk_size} rows per chunk):")
+    print(f"{'stage':<24}{'status':<10}{'rows':>9}{'writes':>8}{'DDL':>5}{'RPCs':>6}{'external':>10}"
+          f"{'round trips':>13}{'reads':>7}")
+    total_rows = total_trips = total_reads = 0
+    for stage in stages:
+        rows = sum(stage["rows"].values())
+        writes = sum(math.ceil(count / chunk_size) for count in stage["rows"].values())
+        external = sum(stage["external"].values())
+        trips = writes + stage["sql"] + stage["rpcs"]
+        total_rows += rows
+        total_trips += trips
+        total_reads += stage["reads"]
+        print(f"{stage['name']:<24}{stage['status']:<10}{rows:>9}{writes:>8}{stage['sql']:>5}{stage['rpcs']:>6}"
+              f"{external:>10}{trips:>13}{stage['reads']:>7}")
+    print(f"{'total':<34}{total_rows:>9}{'':>29}{total_trips:>13}{total_reads:>7}")
+    for stage in stages:
+        details = [f"{count} {key}" for key, count in sorted(stage["rows"].items())]
+        details += [f"{count} {kind}" for kind, count in sorted(stage["external"].items())]
+        if details:
+            print(f"  {stage['name']}: " + ", ".join(details))
+
+
+def load_manifest(path: str) -> Dict[str, Any]:
+    with open(os.path.join(path, MANIFEST)) as f:
+        manifest = json.load(f)
+    if manifest.get("version") != PLAN_VERSION:
+        raise ValueError(f"Plan {path} has version {manifest.get('version')}, expected {PLAN_VERSION}")
+    return manifest
+
+
+def read_operations(path: str, stage: str) -> Iterator[Dict[str, Any]]:
+    """Yield a stage's recorded operations in order; a stage with nothing to do has no file."""
+    file_path = os.path.join(path, f"{stage}.jsonl.gz")
+    if not os.path.exists(file_path):
+        return
+    with gzip.open(file_path, "rt", encoding="utf-8") as f:
+        for line in f:
+            yield json.loads(line)
+
+
+def _write_key(operation: Dict[str, Any]) -> Optional[Tuple]:
+    if operation["op"] != "write":
+        return None
+    return operation["table"], operation["on_conflict"], operation["ignore_duplicates"]
+
+
+def merged_writes(operations: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    """Join runs of consecutive writes with the same table and options into one streamed write.
+
+    The merged write's rows are a lazy iterator; consume it before moving on.
+    """
+    for key, group in groupby(operations, key=_write_key):
+        if key is None:
+            yield from group
+            continue
+        first = next(group)
+        yield {**first, "rows": chain.from_iterable(op["rows"] for op in chain([first], group))}
+
+
+class _RecordedCall:
+    """The response to a recorded RPC, in PostgREST's shape."""
+
+    count = None
+
+    def __init__(self, data: Any = None):
+        self.data = data
+
+    def execute(self):
+        return self
+
+
+class PlanningClient:
+    """Stands in for the Supabase client while planning.
+
+    Table queries and read-only RPCs go to the database; other RPCs, such as
+    exec_sql, are recorded. The stages write rows only through
+    the bulk writer, whose recorder catches those.
+
+    reserve_number_block() is answered from the series' counter as read from
+    number_sequences and then moved along by the plan itself; what gets
+    recorded is an advance_number_sequences() call past the numbers handed
+    out, so applying never skips or reuses a number the plan's rows contain.
+    """
+
+    def __init__(self, client, plan: SeedPlan):
+        self._client = client
+        self._plan = plan
+        # series -> next value, as of the database plus the plan's own reservations
+        self._sequences: Dict[str, int] = {}
+        self._sequence_lock = threading.Lock()
+
+    def rpc(self, function: str, params: Optional[Dict[str, Any]] = None, *args, **kwargs):
+        params = params or {}
+        if function in READ_ONLY_RPCS:
+            return self._client.rpc(function, params, *args, **kwargs)
+        if function == "reserve_number_block":
+            return _RecordedCall(self._reserve(params["p_series"], params["p_count"]))
+        if function == "advance_number_sequences":
+            with self._sequence_lock:
+                for series, last in zip(params["p_series"], params["p_last"]):
+                    self._sequences[series] = max(self._next_value(series), last + 1)
+        self._plan.record_rpc(function, params)
+        return _RecordedCall()
+
+    def _next_value(self, series: str) -> int:
+        if series not in self._sequences:
+            rows = (self._client.table("number_sequences").select("next_value")
+                    .eq("series", series).execute().data)
+            self._sequences[series] = rows[0]["next_value"] if rows else 1
+        return self._sequences[series]
+
+    def _reserve(self, series: str, count: int) -> int:
+        with self._sequence_lock:
+            first = self._next_value(series)
+            self._sequences[series] = first + count
+        self._plan.record_rpc("advance_number_sequences", {"p_series": [series], "p_last": [first + count - 1]})
+        return first
+
+    def __getattr__(self, name: str):
+        return getattr(self._client, name)
+
+
+class PlannedNotifications:
+    """Takes the place of the notification dispatcher while planning."""
+
+    def __init__(self, plan: SeedPlan):
+        self.plan = plan
+        self.planned = 0
+
+    def enqueue(self, notification) -> None:
+        self.planned += 1
+        self.plan.record_external(f"{notification.channel} notifications", 1, {
+            "op": "notify", "channel": notification.channel, "to": notification.to,
+            "subject": notification.subject, "body": notification.body,
+        })
+
+    def close(self) -> None:
+        pass
+
+    def report(self) -> None:
+        print(f"\nPlanned {self.planned} notifications")
+
+
+class PlannedCalendarSync:
+    """Takes the place of the calendar sync while planning; the events get no external IDs."""
+
+    def __init__(self, plan: SeedPlan):
+        self.plan = plan
+        self.planned = 0
+
+    def sync(self, events: List[Dict]) -> List[Dict]:
+        self.planned += len(events)
+        self.plan.record_external("calendar syncs", len(events), {"op": "calendar_sync", "events": events})
+        return []
+
+    def close(self) -> None:
+        pass
+
+    def report(self) -> None:
+        print(f"\nPlanned {self.planned} calendar event syncs")
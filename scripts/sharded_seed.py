@@ -0,0 +1,165 @@
+"""Seed generated data with several worker processes, one shard of law firms each.
+
+Everything a firm owns (users, cases, participants, messages, notes and
+events) references only that firm's rows, and the generator derives every
+firm from its own RNG streams, so firms can be split across processes with
+no coordination beyond the shared reference data. The coordinator runs the
+DDL and practice area stages once, then each worker imports seed_database
+afresh, with its own Supabase client (or Postgres connection for COPY),
+bulk writer and password hasher, and seeds its firms.
+"""
+import multiprocessing
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from data_generator import ScaleConfig
+
+
+class ShardTask:
+    """Everything a worker needs to seed its firms; must stay picklable."""
+
+    def __init__(self, shard: int, shards: int, firm_indexes: Sequence[int], scale: ScaleConfig, seed: int,
+                 practice_area_ids: Dict[str, str], loader: str = "rest", database_url: str = "",
+                 hash_profile: str = "seed", hash_workers: int = 1, reuse_identical_hashes: bool = False,
+                 max_in_flight: int = 4, no_integrations: bool = False, fresh: bool = False):
+        self.shard = shard
+        self.shards = shards
+        self.firm_indexes = list(firm_indexes)
+        self.scale = scale
+        self.seed = seed
+        self.practice_area_ids = practice_area_ids
+        self.loader = loader
+        self.database_url = database_url
+        self.hash_profile = hash_profile
+        self.hash_workers = hash_workers
+        self.reuse_identical_hashes = reuse_identical_hashes
+        self.max_in_flight = max_in_flight
+        self.no_integrations = no_integrations
+        self.fresh = fresh
+
+
+class ShardResult:
+    """What a worker did: stage outcomes and per-table write counts."""
+
+    def __init__(self, shard: int, firms: int):
+        self.shard = shard
+        self.firms = firms
+        self.seconds = 0.0
+        self.stages: Dict[str, Tuple[str, float]] = {}
+        # table -> (rows, failed, invalid, requests, seconds)
+        self.tables: Dict[str, Tuple[int, int, int, int, float]] = {}
+        self.error: Optional[str] = None
+
+    @property
+    def failed_stages(self) -> List[str]:
+        return [name for name, (status, _) in self.stages.items() if status not in ("ok", "resumed")]
+
+    @property
+    def rows(self) -> int:
+        return sum(counts[0] for counts in self.tables.values())
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and not self.failed_stages
+
+
+def seed_shard(task: ShardTask) -> ShardResult:
+    """Worker entry point: seed the task's firms in this process."""
+    result = ShardResult(task.shard, len(task.firm_indexes))
+    started = time.perf_counter()
+    try:
+        import seed_database as sd
+        from copy_loader import CopyLoader
+        from data_generator import SeedDataGenerator
+        from password_hashing import PasswordHasher
+        from seed_engine import SeedEngine
+        from seed_journal import SeedJournal, run_key
+
+        sd.password_hasher = PasswordHasher(profile=task.hash_profile, workers=task.hash_workers,
+                                            reuse_identical=task.reuse_identical_hashes)
+        if task.no_integrations:
+            sd.integrations.disable()
+        sd.bulk_writer.set_max_in_flight(task.max_in_flight)
+        generator = SeedDataGenerator(task.scale, seed=task.seed, practice_areas=sd.practice_areas,
+                                      firm_indexes=task.firm_indexes)
+        copy_loader = CopyLoader(task.database_url, sd.password_hasher) if task.loader == "copy" else None
+        sd.journal = SeedJournal(run_key(url=sd.SUPABASE_URL, loader=task.loader, scale=str(task.scale),
+                                         seed=task.seed, shard=f"{task.shard}/{task.shards}"))
+        if task.fresh:
+            sd.journal.clear()
+        engine = SeedEngine(sd.build_stages(generator, copy_loader, schema_current=True,
+                                            practice_area_ids=task.practice_area_ids),
+                            journal=sd.journal)
+        engine.run()
+        sd.drain_integrations()
+        if not engine.failed:
+            sd.journal.clear()
+        sd.journal.close()
+
+        result.stages = {name: (timing.status, timing.seconds) for name, timing in engine.timings.items()}
+        stats = copy_loader.stats if copy_loader else sd.bulk_writer.stats
+        result.tables = {table: (s.rows, s.failed, s.invalid, s.requests, s.wall_seconds) for table, s in stats.items()}
+    except Exception as e:
+        result.error = f"{type(e).__name__}: {e}\n{traceback.format_exc()}"
+    result.seconds = time.perf_counter() - started
+    return result
+
+
+def shard_firms(firms: int, shards: int) -> List[List[int]]:
+    """Deal firms round-robin so every shard gets a similar amount of data."""
+    return [list(range(shard, firms, shards)) for shard in range(shards)]
+
+
+def run_shards(tasks: Sequence[ShardTask]) -> List[ShardResult]:
+    """Run one worker process per task and collect the results in shard order."""
+    # spawn, not fork: each worker must build its own HTTP and database connections
+    context = multiprocessing.get_context("spawn")
+    results = []
+    with ProcessPoolExecutor(max_workers=len(tasks), mp_context=context) as pool:
+        futures = [pool.submit(seed_shard, task) for task in tasks]
+        for task, future in zip(tasks, futures):
+            try:
+                results.append(future.result())
+            except Exception as e:
+                result = ShardResult(task.shard, len(task.firm_indexes))
+                result.error = f"worker died: {type(e).__name__}: {e}"
+                results.append(result)
+    return results
+
+
+def report_shards(results: Sequence[ShardResult], wall_seconds: float) -> None:
+    print("\nShard summary:")
+    print(f"{'shard':>5}{'firms':>7}{'rows':>10}{'failed':>8}{'requests':>10}{'seconds':>9}{'rows/sec':>11}  status")
+    for result in results:
+        failed = sum(counts[1] for counts in result.tables.values())
+        requests = sum(counts[3] for counts in result.tables.values())
+        rate = result.rows / result.seconds if result.seconds else 0.0
+        if result.error:
+            status = "error: " + result.error.splitlines()[0]
+        elif result.failed_stages:
+            status = "failed stages: " + ", ".join(result.failed_stages)
+        else:
+            status = "ok"
+        print(f"{result.shard:>5}{result.firms:>7}{result.rows:>10}{failed:>8}{requests:>10}"
+              f"{result.seconds:>9.2f}{rate:>11.1f}  {status}")
+
+    totals: Dict[str, List[float]] = {}
+    for result in results:
+        for table, counts in result.tables.items():
+            total = totals.setdefault(table, [0, 0, 0, 0, 0.0])
+            for i, value in enumerate(counts):
+                total[i] += value
+    print(f"\n{'table':<24}{'rows':>10}{'failed':>8}{'invalid':>8}{'requests':>10}{'worker s':>10}")
+    for table, (rows, failed, invalid, requests, seconds) in totals.items():
+        print(f"{table:<24}{rows:>10}{failed:>8}{invalid:>8}{requests:>10}{seconds:>10.2f}")
+
+    rows = sum(result.rows for result in results)
+    busy = sum(result.seconds for result in results)
+    print(f"{len(results)} workers wrote {rows} rows in {wall_seconds:.2f}s "
+          f"({rows / wall_seconds if wall_seconds else 0.0:.1f} rows/sec, "
+          f"{busy / wall_seconds if wall_seconds else 0.0:.1f}x parallelism)")
+    for result in results:
+        if result.error:
+            print(f"\nShard {result.shard} error:\n{result.error}")
@@ -0,0 +1,108 @@
+import bulk_writer
+from bulk_writer import BulkWriter, ChunkSizer, TableStats
+
+
+def users(count):
+    return [{"email": f"user{n}@example.com", "first_name": "Test", "last_name": f"User {n}", "role": "client"}
+            for n in range(count)]
+
+
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(bulk_writer, "RETRY_BACKOFF_SECONDS", 0)
+
+
+def test_lost_responses_are_retried_without_duplicates(fake_supabase, supabase_client, monkeypatch):
+    no_backoff(monkeypatch)
+    fake_supabase.flaky_writes = 0.5
+    writer = BulkWriter(supabase_client, chunk_size=20, max_retries=10)
+
+    written = writer.write_stream("users", users(200))
+
+    stats = writer.stats["users"]
+    assert written == 200 and stats.failed == 0 and stats.retries > 0
+    emails = [user["email"] for user in fake_supabase.tables["users"]]
+    assert sorted(emails) == sorted(set(emails)) and len(emails) == 200
+
+
+def test_retried_writes_still_return_ids_in_input_order(fake_supabase, supabase_client, monkeypatch):
+    no_backoff(monkeypatch)
+    fake_supabase.flaky_writes = 0.5
+    writer = BulkWriter(supabase_client, chunk_size=10, max_retries=10)
+
+    ids = writer.write("users", users(50))
+
+    by_email = {user["email"]: user["id"] for user in fake_supabase.tables["users"]}
+    assert ids == [by_email[user["email"]] for user in users(50)]
+
+
+def test_rows_without_a_key_are_not_resent(fake_supabase, supabase_client, monkeypatch):
+    no_backoff(monkeypatch)
+    fake_supabase.flaky_writes = 1.0
+    writer = BulkWriter(supabase_client, chunk_size=10)
+    messages = [{"case_id": "c", "sender_id": "u", "content": f"message {n}"} for n in range(30)]
+
+    assert writer.write_stream("messages", messages) == 0
+
+    # Every request was committed but answered with a 503; resending would have duplicated them
+    assert writer.stats["messages"].retries == 0
+    assert writer.failed_rows("messages") == 30
+    assert len(fake_supabase.tables["messages"]) == 30
+
+
+def test_oversized_chunks_are_split(fake_supabase, supabase_client):
+    fake_supabase.max_body_bytes = 4000
+    writer = BulkWriter(supabase_client, chunk_size=200)
+
+    assert writer.write_stream("users", users(300)) == 300
+
+    assert writer.stats["users"].splits > 0
+    assert writer.sizers["users"].size < 200
+    assert len(fake_supabase.tables["users"]) == 300
+
+
+def test_chunk_sizer_adapts_to_latency_and_rejections():
+    sizer = ChunkSizer(100, max_size=1000, target_seconds=2.0, max_payload_bytes=10_000)
+
+    sizer.succeeded(100, 0.1)
+    assert sizer.size == 151
+    sizer.succeeded(151, 6.0)
+    assert sizer.size == 50
+    sizer.rejected(50)
+    assert sizer.size == 25
+
+    sizer.observe_rows([{"content": "x" * 990}])
+    assert not sizer.fits(11) and sizer.fits(1)
+    sizer.succeeded(25, 0.1)
+    assert sizer.size == 9
+
+
+def test_throughput_is_measured_over_wall_time():
+    stats = TableStats("messages")
+    # Two chunks in flight at once, then a third
+    stats.record(10.0, 11.0)
+    stats.record(10.5, 11.5)
+    stats.record(11.5, 12.0)
+    stats.rows = 500
+
+    assert stats.requests == 3
+    assert stats.seconds == 2.5
+    assert stats.wall_seconds == 2.0
+    assert stats.rows_per_sec == 250
+
+
+def test_concurrent_writers_do_not_lower_the_reported_rate(fake_supabase, supabase_client):
+    import threading
+
+    fake_supabase.latency = 0.05
+    writer = BulkWriter(supabase_client, chunk_size=10, max_in_flight=4)
+    threads = [threading.Thread(target=writer.write_stream, args=("users", users(40)[n::4]))
+               for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    stats = writer.stats["users"]
+    assert stats.rows == 40
+    # Four requests overlapped, so the wall time is well under their summed time
+    assert stats.wall_seconds < stats.seconds * 0.75
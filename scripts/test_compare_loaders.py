@@ -0,0 +1,40 @@
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+import compare_loaders
+
+ARGS = ["compare_loaders.py", "--supabase-url", "http://127.0.0.1:54321", "--supabase-key", "service-key",
+        "--database-url", "postgresql://postgres@127.0.0.1:54322/postgres"]
+
+
+def run_main(monkeypatch, statuses, loaders):
+    def fake_run(command, env):
+        loaders.append(command[command.index("--loader") + 1])
+        return SimpleNamespace(returncode=statuses[len(loaders) - 1])
+
+    monkeypatch.setattr(compare_loaders.subprocess, "run", fake_run)
+    monkeypatch.setattr(sys, "argv", ARGS)
+    compare_loaders.main()
+
+
+def test_both_loaders_are_compared(monkeypatch, capsys):
+    loaders = []
+    run_main(monkeypatch, [0, 0], loaders)
+
+    assert loaders == ["rest", "copy"]
+    assert "COPY speedup:" in capsys.readouterr().out
+
+
+@pytest.mark.parametrize("statuses, attempted", [([1, 0], ["rest"]), ([0, 2], ["rest", "copy"])])
+def test_a_failed_loader_stops_the_comparison(monkeypatch, capsys, statuses, attempted):
+    loaders = []
+    with pytest.raises(SystemExit) as exit_info:
+        run_main(monkeypatch, statuses, loaders)
+
+    out = capsys.readouterr().out
+    assert exit_info.value.code == 1
+    assert f"{attempted[-1]} loader exited with status {statuses[len(attempted) - 1]}" in out
+    assert "speedup" not in out and "Loader comparison" not in out
+    assert loaders == attempted
@@ -0,0 +1,78 @@
+import re
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+import copy_loader
+from copy_loader import COPY_ORDER, CopyLoader
+from data_generator import ScaleConfig, SeedDataGenerator
+from password_hashing import PasswordHasher
+from sharded_seed import shard_firms
+
+SCALE = "firms=4,users_per_firm=5,messages_per_case=2,notes_per_case=1,events_per_case=1"
+
+
+class RecordingCursor:
+    """Just enough of a psycopg cursor for CopyLoader: collects the rows each COPY writes."""
+
+    def __init__(self, copied):
+        self.copied = copied
+        self.areas = []
+
+    def execute(self, sql, params=None):
+        if sql.startswith("SELECT name, id FROM practice_areas"):
+            self.areas = [(name, f"area-{n}") for n, name in enumerate(params[0])]
+
+    def fetchall(self):
+        return self.areas
+
+    @contextmanager
+    def copy(self, sql):
+        table, columns = re.match(r"COPY (\w+) \((.*)\) FROM STDIN", sql).groups()
+        rows = self.copied.setdefault(table, [])
+        yield SimpleNamespace(write_row=lambda values: rows.append(dict(zip(columns.split(", "), values))))
+
+
+class RecordingConnection:
+    def __init__(self, copied):
+        self.copied = copied
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    @contextmanager
+    def transaction(self):
+        yield
+
+    @contextmanager
+    def cursor(self):
+        yield RecordingCursor(self.copied)
+
+
+def copy_shard(monkeypatch, firm_indexes):
+    copied = {}
+    monkeypatch.setattr(copy_loader, "psycopg", SimpleNamespace(connect=lambda dsn: RecordingConnection(copied)))
+    generator = SeedDataGenerator(ScaleConfig.parse(SCALE), firm_indexes=firm_indexes)
+    loader = CopyLoader("postgresql://localhost/test", PasswordHasher(profile="seed", workers=1))
+    assert loader.load(generator)
+    return generator, copied
+
+
+def test_each_shard_copies_only_its_own_firms(monkeypatch):
+    shards = [copy_shard(monkeypatch, firm_indexes) for firm_indexes in shard_firms(4, 2)]
+
+    for generator, copied in shards:
+        firm_ids = {firm["id"] for firm in generator.firms()}
+        assert len(copied["law_firms"]) == 2
+        assert len(copied["users"]) == 2 * generator.scale.users_per_firm
+        assert {user["id"] for user in copied["users"]} == {user["id"] for user in generator.users()}
+        assert all(user["password_hash"] and "password" not in user for user in copied["users"])
+        assert {case["firm_id"] for case in copied["cases"]} == firm_ids
+
+    # Together the shards copy every row exactly once
+    everything = copy_shard(monkeypatch, list(range(4)))[1]
+    for table in COPY_ORDER:
+        ids = [row["id"] for _, copied in shards for row in copied.get(table, []) if "id" in row]
+        assert sorted(ids) == sorted(row["id"] for row in everything.get(table, []) if "id" in row), table
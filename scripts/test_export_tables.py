@@ -0,0 +1,94 @@
+import gzip
+import json
+import uuid
+
+import pytest
+
+from export_tables import ExportWatermarks, TableExporter
+
+CATALOG = {
+    "tables": [{"table": "time_entries", "rls": True}],
+    "columns": [{"table": "time_entries", "column": column, "type": data_type} for column, data_type in
+                (("id", "uuid"), ("amount", "numeric"), ("billable", "boolean"), ("tags", "jsonb"),
+                 ("updated_at", "timestamp with time zone"))],
+    "policies": [],
+}
+
+
+def time_entries(fake_supabase):
+    rows = [{"id": f"{n:04d}-{uuid.uuid4()}", "amount": None, "billable": None, "tags": None,
+             "updated_at": f"2024-07-0{n + 1}T00:00:00+00:00"} for n in range(4)]
+    rows[2].update(amount=12.5, billable=True, tags={"matter": "M-1"})
+    rows[3].update(amount=3, billable=False, tags=["a", "b"])
+    fake_supabase.tables["time_entries"] = rows
+    return rows
+
+
+def exporter(client, tmp_path, fmt="parquet", **kwargs):
+    return TableExporter(client, str(tmp_path / "out"), fmt, page_size=2,
+                         watermarks=ExportWatermarks(str(tmp_path / "watermarks.sqlite")), **kwargs)
+
+
+def read_ndjson(path):
+    with gzip.open(path, "rt") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_parquet_types_come_from_the_catalog(fake_supabase, supabase_client, tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    time_entries(fake_supabase)
+    fake_supabase.catalog = CATALOG
+    export = exporter(supabase_client, tmp_path)
+
+    export.run(["time_entries"])
+
+    table = pq.read_table(export.exports["time_entries"].path)
+    assert export.failed == []
+    assert str(table.schema.field("amount").type) == "double"
+    assert str(table.schema.field("billable").type) == "bool"
+    assert table.column("amount").to_pylist() == [None, None, 12.5, 3.0]
+    assert table.column("tags").to_pylist() == [None, None, '{"matter": "M-1"}', '["a", "b"]']
+
+
+def test_columns_null_in_the_first_page_do_not_break_later_pages(fake_supabase, supabase_client, tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    time_entries(fake_supabase)
+    export = exporter(supabase_client, tmp_path)
+
+    export.run(["time_entries"])
+
+    table = pq.read_table(export.exports["time_entries"].path)
+    assert export.failed == []
+    assert table.num_rows == 4
+    # Without the catalog, a column first seen as all NULL is text
+    assert table.column("amount").to_pylist() == [None, None, "12.5", "3"]
+    assert table.column("billable").to_pylist() == [None, None, "true", "false"]
+
+
+def test_rows_without_updated_at_are_exported_and_watermarked(fake_supabase, supabase_client, tmp_path):
+    rows = list(time_entries(fake_supabase))
+    undated = [{"id": f"{n:04d}-{uuid.uuid4()}", "updated_at": None} for n in range(3)]
+    fake_supabase.tables["time_entries"] += undated
+    export = exporter(supabase_client, tmp_path, "ndjson", incremental=True)
+
+    export.run(["time_entries"])
+
+    exported = read_ndjson(export.exports["time_entries"].path)
+    assert [row["id"] for row in exported] == [row["id"] for row in undated + rows]
+    assert export.watermarks.get(export.watermark_key("time_entries")) == (rows[-1]["updated_at"], rows[-1]["id"])
+
+
+def test_a_watermark_on_a_row_without_updated_at(fake_supabase, supabase_client, tmp_path):
+    fake_supabase.tables["documents"] = [{"id": f"{n:04d}", "updated_at": None} for n in range(3)]
+    first = exporter(supabase_client, tmp_path, "ndjson", incremental=True)
+    first.run(["documents"])
+    first.watermarks.close()
+    assert first.failed == []
+
+    fake_supabase.tables["documents"] += [{"id": "0003", "updated_at": None},
+                                          {"id": "0000-later", "updated_at": "2024-07-01T00:00:00+00:00"}]
+    second = exporter(supabase_client, tmp_path, "ndjson", incremental=True)
+    second.run(["documents"])
+
+    assert second.watermarks.get(second.watermark_key("documents")) == ("2024-07-01T00:00:00+00:00", "0000-later")
+    assert [row["id"] for row in read_ndjson(second.exports["documents"].path)] == ["0003", "0000-later"]
@@ -0,0 +1,54 @@
+import subprocess
+import sys
+import threading
+
+from check_import_time import LAZY_MODULES, SCRIPTS_DIR, measure_imports
+from integrations import IntegrationRegistry
+
+
+def test_importing_seed_database_imports_no_integration_sdk():
+    imported = {name for name, _, _ in measure_imports("seed_database")}
+    eager = [name for name in imported
+             if any(name == lazy or name.startswith(lazy + ".") for lazy in LAZY_MODULES)]
+    assert eager == []
+
+
+def test_import_time_is_within_budget():
+    # check_import_time.py's budget; SEED_IMPORT_BUDGET_MS raises it on slow machines
+    result = subprocess.run([sys.executable, "check_import_time.py"], cwd=SCRIPTS_DIR,
+                            capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert "OK: seed_database imported in" in result.stdout
+
+
+def test_clients_are_built_once_on_first_use():
+    registry = IntegrationRegistry()
+    built = []
+    registry.register("calendar", lambda: built.append(1) or object())
+
+    assert built == [] and registry.loaded("calendar") is None
+    threads = [threading.Thread(target=registry.get, args=("calendar",)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert built == [1]
+    assert registry.get("calendar") is registry.loaded("calendar")
+
+
+def test_a_failing_factory_disables_only_its_integration():
+    registry = IntegrationRegistry()
+    registry.register("broken", lambda: 1 / 0)
+    registry.register("working", object)
+
+    assert registry.get("broken") is None
+    assert registry.get("working") is not None
+
+
+def test_disabled_registry_builds_nothing():
+    registry = IntegrationRegistry()
+    registry.register("calendar", lambda: 1 / 0)
+    registry.disable()
+
+    assert registry.get("calendar") is None
+    assert registry.loaded("calendar") is None
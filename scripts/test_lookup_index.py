@@ -0,0 +1,58 @@
+import uuid
+
+import lookup_index
+from bulk_writer import BulkWriter
+from lookup_index import LookupIndex
+
+
+def add_users(fake_supabase, count):
+    users = [{"id": str(uuid.uuid4()), "email": f"user{n}@example.com"} for n in range(count)]
+    fake_supabase.tables["users"] = list(users)
+    return users
+
+
+def test_whole_table_is_paged_in_once(fake_supabase, supabase_client, monkeypatch):
+    monkeypatch.setattr(lookup_index, "PAGE_SIZE", 10)
+    users = add_users(fake_supabase, 25)
+    lookups = LookupIndex(supabase_client)
+
+    index = lookups.load("users", "email")
+    lookups.load("users", "email")
+
+    assert lookups.queries == 3
+    assert index.complete
+    assert all(index.get_id(user["email"]) == user["id"] for user in users)
+    assert lookups.lookup("users", "email", "nobody@example.com") == (True, None)
+
+
+def test_values_are_fetched_in_batches_and_remembered(fake_supabase, supabase_client, monkeypatch):
+    monkeypatch.setattr(lookup_index, "IN_FILTER_SIZE", 4)
+    monkeypatch.setattr(lookup_index, "PAGE_SIZE", 2)
+    case_ids = [str(uuid.uuid4()) for _ in range(5)]
+    user_id = str(uuid.uuid4())
+    fake_supabase.tables["case_participants"] = [
+        {"id": str(uuid.uuid4()), "case_id": case_id, "user_id": user_id} for case_id in case_ids[:3]]
+    lookups = LookupIndex(supabase_client)
+
+    index = lookups.load("case_participants", ("case_id", "user_id"), case_ids)
+    queries = lookups.queries
+    lookups.load("case_participants", ("case_id", "user_id"), case_ids)
+
+    # 4 + 1 values; the first batch matches 3 rows, which takes two pages of 2
+    assert queries == 3
+    assert lookups.queries == queries
+    assert index.contains((case_ids[0], user_id)) and not index.contains((case_ids[4], user_id))
+    assert lookups.lookup("case_participants", ("case_id", "user_id"), (case_ids[4], user_id)) == (True, None)
+    assert lookups.lookup("case_participants", ("case_id", "user_id"), ("elsewhere", user_id)) == (False, None)
+
+
+def test_rows_written_through_the_bulk_writer_are_indexed(fake_supabase, supabase_client):
+    lookups = LookupIndex(supabase_client)
+    index = lookups.load("users", "email")
+    writer = BulkWriter(supabase_client, index=lookups)
+
+    ids = writer.write("users", [{"email": "new@example.com", "first_name": "New", "last_name": "User",
+                                  "role": "client"}], on_conflict="email")
+
+    assert index.get_id("new@example.com") == ids[0]
+    assert lookups.queries == 1
@@ -0,0 +1,51 @@
+from collections import Counter
+
+from fake_services import FakeTextAnalytics
+from note_analysis import AnalysisCache, NoteAnalyzer, content_hash
+
+ANALYSES = {"sentiment", "confidence_scores", "key_phrases", "entities"}
+
+
+def make_analyzer(tmp_path):
+    client = FakeTextAnalytics(latency=0)
+    return client, NoteAnalyzer(client, cache=AnalysisCache(str(tmp_path / "analysis.sqlite")))
+
+
+def test_requests_stay_within_each_operations_limit(tmp_path):
+    client, analyzer = make_analyzer(tmp_path)
+    notes = [f"Client called about filing {n}" for n in range(12)]
+
+    results = analyzer.analyze(notes + notes[:3])
+    analyzer.close()
+
+    assert all(set(result) == ANALYSES for result in results)
+    assert results[12:] == results[:3]
+    sizes = {operation: sorted(n for op, n in client.requests if op == operation)
+             for operation in FakeTextAnalytics.MAX_DOCUMENTS}
+    assert sizes == {"analyze_sentiment": [2, 10], "extract_key_phrases": [2, 10],
+                     "recognize_entities": [2, 5, 5]}
+    assert (analyzer.analyzed, analyzer.partial, analyzer.requests) == (12, 0, 7)
+
+
+def test_a_failed_analysis_keeps_the_others_and_is_not_cached(tmp_path):
+    client, analyzer = make_analyzer(tmp_path)
+    client.failing.add("recognize_entities")
+    notes = ["Deposition rescheduled", "Invoice disputed"]
+
+    partial = analyzer.analyze(notes)
+
+    assert all(set(result) == ANALYSES - {"entities"} for result in partial)
+    assert analyzer.cache.get_many([content_hash(note) for note in notes]) == {}
+    assert (analyzer.analyzed, analyzer.partial) == (0, 2)
+
+    client.failing.clear()
+    retried = analyzer.analyze(notes)
+    calls = len(client.requests)
+    cached = analyzer.analyze(notes)
+    analyzer.close()
+
+    assert all(set(result) == ANALYSES for result in retried)
+    assert cached == retried
+    assert len(client.requests) == calls
+    assert Counter(op for op, _ in client.requests)["recognize_entities"] == 2
+    assert (analyzer.analyzed, analyzer.cache_hits) == (2, 2)
@@ -0,0 +1,125 @@
+import time
+
+import notifications
+from notifications import (Notification, NotificationDispatcher, RetryPolicy, SendGridChannel, SlackChannel,
+                           TwilioChannel)
+
+FAST = dict(rate=1000, burst=100)
+
+
+def sendgrid(server, **kwargs):
+    return SendGridChannel("sg-key", "noreply@example.com", base_url=server.url, **{**FAST, **kwargs})
+
+
+def twilio(server, **kwargs):
+    return TwilioChannel("AC123", "token", "+15550000000", base_url=server.url, **{**FAST, **kwargs})
+
+
+def slack(server, **kwargs):
+    return SlackChannel("xoxb-token", base_url=server.url, **{**FAST, **kwargs})
+
+
+def requests_to(server, suffix):
+    return [request for request in server.api_requests if request.path.endswith(suffix)]
+
+
+def max_in_flight(requests):
+    events = sorted([(r.started, 1) for r in requests] + [(r.finished, -1) for r in requests])
+    running = peak = 0
+    for _, change in events:
+        running += change
+        peak = max(peak, running)
+    return peak
+
+
+def test_each_channel_has_its_own_workers(fake_supabase):
+    fake_supabase.latency = 0.1
+    channels = [slack(fake_supabase, concurrency=2), twilio(fake_supabase, concurrency=1)]
+    dispatcher = NotificationDispatcher(channels)
+    for n in range(6):
+        dispatcher.enqueue(Notification("slack", f"U{n}", "Update", "body"))
+        dispatcher.enqueue(Notification("sms", f"+1555000000{n}", "Update", "body"))
+    dispatcher.close(timeout=10)
+
+    slack_requests = requests_to(fake_supabase, "/chat.postMessage")
+    sms_requests = requests_to(fake_supabase, "/Messages.json")
+    assert (len(slack_requests), len(sms_requests)) == (6, 6)
+    assert max_in_flight(slack_requests) == 2
+    assert max_in_flight(sms_requests) == 1
+    # A slow channel does not hold up the other one
+    assert max_in_flight(slack_requests + sms_requests) == 3
+    assert dispatcher.stats["slack"].sent == dispatcher.stats["sms"].sent == 6
+
+
+def test_requests_are_rate_limited_per_channel(fake_supabase):
+    dispatcher = NotificationDispatcher([twilio(fake_supabase, rate=20, burst=1, concurrency=4)])
+    for n in range(6):
+        dispatcher.enqueue(Notification("sms", f"+1555000000{n}", "Update", "body"))
+    dispatcher.close(timeout=10)
+
+    starts = sorted(request.started for request in requests_to(fake_supabase, "/Messages.json"))
+    assert len(starts) == 6
+    assert starts[-1] - starts[0] >= 5 / 20 * 0.9
+
+
+def test_failed_requests_are_retried_with_backoff(fake_supabase):
+    fake_supabase.api_failures = [503, 429]
+    dispatcher = NotificationDispatcher([slack(fake_supabase, retry=RetryPolicy(base_delay=0.1), concurrency=1)])
+    dispatcher.enqueue(Notification("slack", "U1", "Update", "body"))
+    dispatcher.close(timeout=10)
+
+    requests = requests_to(fake_supabase, "/chat.postMessage")
+    stats = dispatcher.stats["slack"]
+    assert (stats.sent, stats.failed, stats.requests, stats.retries) == (1, 0, 3, 2)
+    assert len(requests) == 3
+
+
+def test_permanent_failures_are_not_retried(fake_supabase):
+    fake_supabase.api_failures = [400]
+    dispatcher = NotificationDispatcher([slack(fake_supabase, concurrency=1)])
+    dispatcher.enqueue(Notification("slack", "U1", "Update", "body"))
+    dispatcher.close(timeout=10)
+
+    stats = dispatcher.stats["slack"]
+    assert (stats.sent, stats.failed, stats.requests, stats.retries) == (0, 1, 1, 0)
+
+
+def test_backoff_doubles_up_to_the_limit(monkeypatch):
+    monkeypatch.setattr(notifications.random, "uniform", lambda low, high: high)
+    policy = RetryPolicy(base_delay=0.5, max_delay=3.0)
+
+    assert [policy.delay(attempt) for attempt in range(4)] == [0.5, 1.0, 2.0, 3.0]
+    assert policy.delay(0, retry_after=2.0) == 2.0
+    assert policy.delay(0, retry_after=60.0) == 3.0
+
+
+def test_identical_emails_share_one_request(fake_supabase):
+    dispatcher = NotificationDispatcher([sendgrid(fake_supabase, concurrency=1)])
+    for n in range(5):
+        dispatcher.enqueue(Notification("email", f"user{n}@example.com", "Hearing moved", "Now on Monday"))
+    for n in range(2):
+        dispatcher.enqueue(Notification("email", f"client{n}@example.com", "Invoice ready", "See attached"))
+    dispatcher.close(timeout=10)
+
+    requests = requests_to(fake_supabase, "/v3/mail/send")
+    recipients = {request.body["subject"]: [p["to"][0]["email"] for p in request.body["personalizations"]]
+                  for request in requests}
+    assert len(requests) == 2
+    assert recipients == {"Hearing moved": [f"user{n}@example.com" for n in range(5)],
+                          "Invoice ready": ["client0@example.com", "client1@example.com"]}
+    assert dispatcher.stats["email"].sent == 7
+
+
+def test_enqueue_never_waits_for_delivery(fake_supabase):
+    fake_supabase.latency = 0.2
+    dispatcher = NotificationDispatcher([slack(fake_supabase, concurrency=1)])
+
+    started = time.perf_counter()
+    queued = [dispatcher.enqueue(Notification("slack", f"U{n}", "Update", "body")) for n in range(5)]
+    enqueue_seconds = time.perf_counter() - started
+    skipped = dispatcher.enqueue(Notification("sms", "+15550000000", "Update", "body"))
+    dispatcher.close(timeout=10)
+
+    assert enqueue_seconds < 0.1
+    assert queued == [True] * 5 and skipped is False
+    assert dispatcher.stats["slack"].sent == 5
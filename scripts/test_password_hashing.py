@@ -0,0 +1,48 @@
+import bcrypt
+import pytest
+
+from password_hashing import COST_PROFILES, PasswordHasher
+
+
+def rounds_of(password_hash):
+    # $2b$<cost>$<salt and hash>
+    return int(password_hash.split("$")[2])
+
+
+def test_profiles_set_the_bcrypt_cost():
+    assert rounds_of(PasswordHasher(profile="seed", workers=1).hash("Seed-1-1!")) == COST_PROFILES["seed"]
+    assert COST_PROFILES["production"] == 12
+
+
+def test_unknown_profile_is_rejected():
+    with pytest.raises(ValueError):
+        PasswordHasher(profile="fast")
+
+
+def test_hashes_verify_and_keep_input_order_across_the_pool():
+    passwords = [f"Seed-{n}-1!" for n in range(12)]
+    hashes = PasswordHasher(profile="seed", workers=2).hash_many(passwords)
+
+    assert len(hashes) == len(passwords)
+    for password, password_hash in zip(passwords, hashes):
+        assert bcrypt.checkpw(password.encode(), password_hash.encode())
+
+
+def test_identical_passwords_share_a_hash_only_when_asked():
+    passwords = ["Same-Passw0rd!"] * 3 + ["Other-Passw0rd!"]
+
+    reused = PasswordHasher(profile="seed", workers=1, reuse_identical=True).hash_many(passwords)
+    assert len(set(reused)) == 2
+    assert reused[0] == reused[1] == reused[2]
+
+    salted = PasswordHasher(profile="seed", workers=1).hash_many(passwords)
+    assert len(set(salted)) == 4
+
+
+def test_hasher_counts_what_it_hashed():
+    hasher = PasswordHasher(profile="seed", workers=1)
+    hasher.hash_many(["One-Passw0rd!", "Two-Passw0rd!"])
+    hasher.hash("Three-Passw0rd!")
+
+    assert hasher.hashed == 3
+    assert hasher.seconds > 0
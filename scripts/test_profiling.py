@@ -0,0 +1,74 @@
+import os
+import time
+
+from profiling import RunProfiler
+from tracing import tracer
+
+
+def spin(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def load_users():
+    spin(0.1)
+    with tracer.span("supabase", "insert", "users"):
+        time.sleep(0.1)
+    with tracer.span("bcrypt", "hash"):
+        time.sleep(0.05)
+
+
+def load_cases():
+    spin(0.05)
+
+
+def profile_run(tmp_path):
+    profiler = RunProfiler("seed_database", out_dir=str(tmp_path), sample_interval=0.001)
+    profiler.start()
+    try:
+        profiler.run("users", load_users)
+        run_cases = profiler.wrap("cases", load_cases)
+        run_cases()
+    finally:
+        profiler.stop()
+    return profiler
+
+
+def test_collapsed_stacks_start_at_the_stage(tmp_path):
+    profiler = profile_run(tmp_path)
+
+    path = profiler.write_collapsed()
+
+    lines = open(path).read().splitlines()
+    assert all(int(line.rsplit(" ", 1)[1]) > 0 for line in lines)
+    stacks = [[frame.split(" ")[0] for frame in line.rsplit(" ", 1)[0].split(";")] for line in lines]
+    # Stacks stop at the profiler's entry point, above which are only the engine and thread pool
+    assert {tuple(stack[:3]) for stack in stacks} <= {("users", "runcall", "load_users"),
+                                                      ("cases", "runcall", "load_cases"),
+                                                      ("users", "runcall"), ("cases", "runcall")}
+    assert ["users", "runcall", "load_users", "spin"] in stacks
+    assert ["cases", "runcall", "load_cases", "spin"] in stacks
+
+
+def test_report_splits_each_stage(tmp_path, capsys):
+    profiler = profile_run(tmp_path)
+
+    profiler.report()
+
+    users = profiler.profiles["users"]
+    assert users.services["supabase"][2] == 1
+    assert users.network >= 0.09
+    assert users.hashing >= 0.045
+    assert users.cpu_outside_hashing >= 0.09
+    assert users.wall >= users.cpu_outside_hashing + users.network + users.hashing - 0.01
+    assert profiler.profiles["cases"].services == {}
+
+    report = open(tmp_path / "seed_database-report.txt").read()
+    assert report in capsys.readouterr().out
+    assert "Stage users:" in report and "Stage cases:" in report
+    assert "traced calls: bcrypt 1 calls" in report
+    assert "load_users" in report
+    assert os.path.exists(tmp_path / "seed_database-users.prof")
+    assert os.path.exists(tmp_path / "seed_database-cases.prof")
+    assert os.path.exists(tmp_path / "seed_database.folded")
@@ -0,0 +1,40 @@
+from reference_sync import REFERENCE_TABLES, plan_sync, sync_reference_data
+
+AREAS = REFERENCE_TABLES["practice_areas"]
+
+
+def names(fake_supabase):
+    return sorted(row["name"] for row in fake_supabase.tables.get("practice_areas", []))
+
+
+def test_plan_sync_diffs_by_natural_key(fake_supabase, supabase_client):
+    fake_supabase.tables["practice_areas"] = [
+        {"id": "1", "name": "Tax Law", "description": "Taxes"},
+        {"id": "2", "name": "Family Law", "description": "Old text"},
+        {"id": "3", "name": "Maritime Law", "description": "Ships"},
+    ]
+    plan = plan_sync(supabase_client, AREAS, [
+        {"name": "Tax Law", "description": "Taxes"},
+        {"name": "Family Law", "description": "Families"},
+        {"name": "Patent Law", "description": "Patents"},
+    ])
+    assert [row["name"] for row in plan.inserts] == ["Patent Law"]
+    assert plan.updates == [{"id": "2", "name": "Family Law", "description": "Families"}]
+    assert [row["id"] for row in plan.deletes] == ["3"]
+    assert plan.unchanged == 1
+
+
+def test_keep_extra_rows(fake_supabase, supabase_client):
+    fake_supabase.tables["practice_areas"] = [{"id": "3", "name": "Maritime Law", "description": "Ships"}]
+    plan = plan_sync(supabase_client, AREAS, [{"name": "Tax Law", "description": "Taxes"}], delete=False)
+    assert plan.deletes == []
+
+
+def test_sync_applies_the_plan_and_a_second_sync_is_empty(fake_supabase, supabase_client):
+    fake_supabase.tables["practice_areas"] = [{"id": "3", "name": "Maritime Law", "description": "Ships"}]
+    desired = [{"name": "Tax Law", "description": "Taxes"}, {"name": "Patent Law", "description": "Patents"}]
+    sync_reference_data(supabase_client, AREAS, desired)
+    assert names(fake_supabase) == ["Patent Law", "Tax Law"]
+
+    plan = sync_reference_data(supabase_client, AREAS, desired)
+    assert plan.empty and plan.unchanged == 2
@@ -0,0 +1,53 @@
+from datetime import datetime, timedelta
+
+from retention import RetentionCheckpoints, RetentionJob, RetentionPolicy
+
+
+def old_rows(count, first=0, **columns):
+    start = datetime.now() - timedelta(days=400)
+    return [{"id": f"{n:08d}-0000-0000-0000-000000000000", "created_at": (start + timedelta(minutes=n)).isoformat(),
+             **columns} for n in range(first, first + count)]
+
+
+def archived(rows):
+    return sum(1 for row in rows if row.get("status") == "archived")
+
+
+def test_archives_rows_without_a_status(fake_supabase, supabase_client, tmp_path):
+    fake_supabase.tables["messages"] = old_rows(5, status=None) + old_rows(3, first=5, status="sent")
+    job = RetentionJob(supabase_client, RetentionCheckpoints(str(tmp_path / "retention.sqlite")), chunk_size=2)
+    try:
+        job.run([RetentionPolicy("messages", "archive", 365)])
+    finally:
+        job.checkpoints.close()
+
+    assert not job.failed
+    assert archived(fake_supabase.tables["messages"]) == 8
+
+
+def test_resumes_from_the_checkpoint(fake_supabase, supabase_client, tmp_path):
+    fake_supabase.tables["notes"] = old_rows(10, status="archived")
+    path = str(tmp_path / "retention.sqlite")
+    policy = RetentionPolicy("notes", "delete", 365)
+
+    class Interrupted(RetentionJob):
+        def _apply(self, policy, ids):
+            if self.progress[policy.name].chunks >= 2:
+                raise RuntimeError("connection reset")
+            super()._apply(policy, ids)
+
+    job = Interrupted(supabase_client, RetentionCheckpoints(path), chunk_size=3, chunks_in_flight=1)
+    job.run([policy])
+    job.checkpoints.close()
+    assert job.failed == [policy.name]
+    assert len(fake_supabase.tables["notes"]) == 4
+
+    resumed = RetentionJob(supabase_client, RetentionCheckpoints(path), chunk_size=3, chunks_in_flight=1)
+    try:
+        resumed.run([policy])
+    finally:
+        resumed.checkpoints.close()
+    progress = resumed.progress[policy.name]
+    assert progress.resumed and not progress.failed
+    assert progress.rows == 4
+    assert fake_supabase.tables["notes"] == []
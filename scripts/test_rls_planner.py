@@ -0,0 +1,69 @@
+from rls_planner import PolicySpec, apply_plan, plan_policies
+from schema_cache import SchemaSnapshot
+
+READ = PolicySpec("case_participants", "Enable read access for case participants", "SELECT", using="true")
+WRITE = PolicySpec("case_participants", "Enable all access for service role", "ALL", using="true")
+
+
+def snapshot(rls=True, policies=()):
+    return SchemaSnapshot({"tables": [{"table": "case_participants", "rls": rls}],
+                           "policies": [{"table": "case_participants", **policy} for policy in policies]})
+
+
+def test_deparsed_policies_count_as_unchanged():
+    # pg_policies hands expressions back with casts, qualifiers and parentheses
+    current = snapshot(policies=[
+        {"name": READ.name, "command": "SELECT", "using": "(true)", "check": None},
+        {"name": WRITE.name, "command": "ALL", "using": "( true )", "check": None},
+    ])
+    plan = plan_policies(current, [READ, WRITE])
+
+    assert plan.empty
+    assert plan.unchanged == 2
+
+
+def test_only_changed_and_missing_policies_are_recreated():
+    current = snapshot(policies=[
+        {"name": READ.name, "command": "SELECT", "using": "(auth.uid() = user_id)", "check": None},
+        {"name": "Users can view their cases", "command": "SELECT", "using": "true", "check": None},
+    ])
+    plan = plan_policies(current, [READ, WRITE], obsolete={"case_participants": [
+        "Users can view their cases", "Never existed"]})
+
+    assert plan.enable == []
+    assert plan.drops == ['DROP POLICY IF EXISTS "Users can view their cases" ON case_participants;',
+                          READ.drop_sql()]
+    assert plan.creates == [READ, WRITE]
+
+
+def test_without_a_snapshot_everything_is_replaced_idempotently():
+    plan = plan_policies(None, [READ], obsolete={"case_participants": ["Old policy"]})
+
+    assert plan.statements() == [
+        "ALTER TABLE case_participants ENABLE ROW LEVEL SECURITY;",
+        'DROP POLICY IF EXISTS "Old policy" ON case_participants;',
+        READ.drop_sql(),
+        READ.create_sql(),
+    ]
+
+
+def test_plan_is_applied_in_one_round_trip():
+    calls = []
+
+    class Client:
+        def rpc(self, function, params):
+            calls.append((function, params))
+            return self
+
+        def execute(self):
+            return self
+
+    apply_plan(Client(), plan_policies(snapshot(rls=False), [READ, WRITE]))
+    apply_plan(Client(), plan_policies(snapshot(policies=[
+        {"name": spec.name, "command": spec.command, "using": spec.using, "check": None} for spec in (READ, WRITE)
+    ]), [READ, WRITE]))
+
+    assert len(calls) == 1
+    function, params = calls[0]
+    assert function == "exec_sql"
+    assert params["sql"].startswith("ALTER TABLE case_participants ENABLE ROW LEVEL SECURITY;")
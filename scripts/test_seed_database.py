@@ -0,0 +1,203 @@
+import base64
+import json
+import uuid
+
+SCALE = "firms=2,users_per_firm=6,messages_per_case=3,notes_per_case=2,events_per_case=2"
+CHILD_TABLES = ("case_participants", "messages", "notes", "calendar_events")
+
+
+def assert_references_resolve(tables):
+    ids = {table: {row["id"] for row in tables.get(table, [])} for table in ("law_firms", "users", "cases")}
+    for case in tables["cases"]:
+        assert case["firm_id"] in ids["law_firms"]
+        assert case["assigned_to"] in ids["users"]
+    for table, user_column in (("case_participants", "user_id"), ("messages", "sender_id"),
+                               ("notes", "user_id"), ("calendar_events", "user_id")):
+        for row in tables[table]:
+            assert row["case_id"] in ids["cases"], table
+            assert row[user_column] in ids["users"], table
+
+
+def reassign_ids(tables):
+    """Give every firm, user and case a new ID, as if another run had created them."""
+    new_ids = {}
+    for table in ("law_firms", "users", "cases"):
+        for row in tables[table]:
+            new_ids[row["id"]] = row["id"] = str(uuid.uuid4())
+    for case in tables["cases"]:
+        for column in ("firm_id", "assigned_to", "created_by"):
+            case[column] = new_ids[case[column]]
+    for table in CHILD_TABLES:
+        tables[table] = []
+
+
+def test_generated_children_reference_existing_rows(fake_supabase, run_script):
+    first = run_script("seed_database.py", fake_supabase, "--no-integrations", "--scale", SCALE)
+    assert first.returncode == 0, first.stdout + first.stderr
+    counts = {table: len(rows) for table, rows in fake_supabase.tables.items()}
+    reassign_ids(fake_supabase.tables)
+
+    second = run_script("seed_database.py", fake_supabase, "--no-integrations", "--scale", SCALE)
+    assert second.returncode == 0, second.stdout + second.stderr
+
+    assert {table: len(rows) for table, rows in fake_supabase.tables.items()} == counts
+    assert_references_resolve(fake_supabase.tables)
+
+
+class FailingCalendarSync:
+    def sync(self, events):
+        raise RuntimeError("calendar provider unavailable")
+
+    def close(self):
+        pass
+
+    def report(self):
+        pass
+
+
+def run_generated(sd, scale=SCALE, journal=None):
+    from data_generator import ScaleConfig, SeedDataGenerator
+    from seed_engine import SeedEngine
+
+    generator = SeedDataGenerator(ScaleConfig.parse(scale), practice_areas=sd.practice_areas)
+    engine = SeedEngine(sd.build_stages(generator, schema_current=True), journal=journal)
+    engine.run()
+    return engine
+
+
+def test_calendar_sync_is_its_own_stage(seed_database):
+    from fake_services import install_fake_integrations
+
+    install_fake_integrations(seed_database.integrations, 0.0)
+    seed_database.integrations.register('notifications', lambda: None)
+    engine = run_generated(seed_database)
+    seed_database.drain_integrations()
+
+    assert engine.timings["calendar_sync"].status == "ok"
+    stats = seed_database.bulk_writer.stats
+    events = stats["calendar_events"].rows
+    assert events > 0
+    # The write-back of external IDs is counted apart from the insert
+    assert stats["calendar_sync"].rows == events
+
+
+def test_calendar_provider_failure_does_not_fail_the_insert(seed_database):
+    seed_database.integrations.register('calendar_sync', FailingCalendarSync)
+    seed_database.integrations.register('notifications', lambda: None)
+    seed_database.integrations.register('note_analyzer', lambda: None)
+    engine = run_generated(seed_database)
+
+    assert engine.timings["calendar_events"].status == "ok"
+    assert engine.timings["calendar_sync"].status == "failed"
+    assert "calendar_sync" not in seed_database.bulk_writer.stats
+
+
+def test_calendar_write_back_keeps_ids_it_did_not_sync(seed_database, monkeypatch, tmp_path):
+    from calendar_sync import CalendarSync, CalendarSyncLog
+    from fake_services import FakeCalendarService, FakeZoom
+
+    base = {"case_id": str(uuid.uuid4()), "user_id": str(uuid.uuid4()), "title": "Hearing",
+            "description": "Prep", "start_time": "2024-07-01T10:00:00", "end_time": "2024-07-01T11:00:00"}
+    events = [dict(base, id=str(uuid.uuid4()), is_virtual=n % 2 == 0) for n in range(4)]
+    # Outlook IDs stored by another machine, which this run's sync log knows nothing about
+    seed_database.supabase.table("calendar_events").insert(
+        [dict(event, outlook_id=f"outlook-{event['id']}") for event in events]).execute()
+    sync = CalendarSync(calendar_service=FakeCalendarService(0), zoom_client=FakeZoom(0),
+                        log=CalendarSyncLog(str(tmp_path / "calendar.sqlite")))
+    seed_database.integrations.register('calendar_sync', lambda: sync)
+    writer = seed_database.bulk_writer
+    send = writer._send
+    sent = []
+
+    def record(table, chunk, *args):
+        sent.append(chunk)
+        return send(table, chunk, *args)
+
+    monkeypatch.setattr(writer, "_send", record)
+    assert seed_database.sync_calendar_events(events) == 4
+
+    stored = {row["id"]: row for row in seed_database.supabase.table("calendar_events").select("*").execute().data}
+    for event in events:
+        row = stored[event["id"]]
+        assert row["outlook_id"] == f"outlook-{event['id']}"
+        assert row["google_calendar_id"] == f"google-{event['id']}"
+        assert (row.get("zoom_id") is not None) == event["is_virtual"]
+    # Each request names only columns every one of its rows has a value for
+    for chunk in sent:
+        assert len({tuple(sorted(row)) for row in chunk}) == 1
+        assert all(value is not None for row in chunk for value in row.values())
+
+
+def test_refuses_the_anon_key(fake_supabase, run_script):
+    claims = base64.urlsafe_b64encode(json.dumps({"role": "anon"}).encode()).decode().rstrip("=")
+    result = run_script("seed_database.py", fake_supabase, "--no-integrations", key=f"header.{claims}.signature")
+
+    assert result.returncode == 1
+    assert "needs the service_role key" in result.stdout
+    assert not fake_supabase.tables
+
+
+def test_requires_a_key(fake_supabase, run_script):
+    result = run_script("seed_database.py", fake_supabase, "--no-integrations", key="")
+
+    assert result.returncode == 1
+    assert "set SEED_SUPABASE_KEY" in result.stdout
+    assert not fake_supabase.tables and not fake_supabase.stage_stats()
+
+
+def test_case_participants_resume_after_a_failed_chunk(seed_database, monkeypatch, tmp_path, capsys):
+    from data_generator import ScaleConfig, SeedDataGenerator
+    from seed_journal import SeedJournal
+
+    seed_database.integrations.disable()
+    journal = SeedJournal("participants", str(tmp_path / "journal.sqlite"))
+    monkeypatch.setattr(seed_database, "journal", journal)
+    writer = seed_database.bulk_writer
+    send = writer._send
+    sent = []
+
+    def fail_after_first_chunk(table, chunk, *args):
+        if table == "case_participants":
+            sent.append(len(chunk))
+            if len(sent) > 1:
+                raise ValueError("connection lost")
+        return send(table, chunk, *args)
+
+    monkeypatch.setattr(writer, "_send", fail_after_first_chunk)
+    scale = SCALE + ",cases_per_lawyer=10"
+    first = run_generated(seed_database, scale, journal)
+    assert first.timings["case_participants"].status == "failed"
+    assert journal.offset("case_participants") == sent[0]
+
+    monkeypatch.setattr(writer, "_send", send)
+    second = run_generated(seed_database, scale, journal)
+    assert second.timings["case_participants"].status == "ok"
+    assert f"Resuming case_participants after {sent[0]} rows" in capsys.readouterr().out
+    participants = {(p["case_id"], p["user_id"]) for p in seed_database.supabase.table("case_participants")
+                    .select("case_id,user_id").execute().data}
+    generator = SeedDataGenerator(ScaleConfig.parse(scale), practice_areas=seed_database.practice_areas)
+    assert len(participants) == sum(1 for _ in generator.case_participants()) > sent[0]
+
+
+def test_allocated_case_numbers_skip_seeded_ones(seed_database):
+    seed_database.integrations.disable()
+    engine = run_generated(seed_database)
+    assert engine.timings["case_numbers"].status == "ok"
+
+    seeded = {case["case_number"] for case in seed_database.supabase.table("cases").select("case_number")
+              .execute().data}
+    for series, last in engine.results["case_numbers"].items():
+        _, prefix, year = series.split(":")
+        allocated = seed_database.generate_case_numbers(prefix, int(year), 3)
+        assert not seeded & set(allocated)
+        assert allocated[0] == f"{prefix}-{year}-{last + 1:03d}"
+
+
+def test_fixture_users_keep_their_passwords(seed_database):
+    import bcrypt
+
+    users = seed_database.insert_users()
+
+    assert len(users) == 4
+    stored = {user["email"]: user for user in seed_database.supabase.table("users").select("*").execute().data}
+    assert bcrypt.checkpw(b"hashed_password_1", stored["john.smith@smithlaw.com"]["password_hash"].encode())
@@ -0,0 +1,66 @@
+import json
+import os
+from types import SimpleNamespace
+
+from fake_services import FakeSupabase
+from id_allocator import BlockAllocator
+from seed_plan import PlanningClient, SeedPlan, read_operations
+
+SCALE = "firms=2,users_per_firm=6,messages_per_case=3,notes_per_case=2,events_per_case=2"
+
+
+def contents(server):
+    return {
+        "rows": {table: len(rows) for table, rows in server.tables.items()},
+        "case_numbers": sorted(case["case_number"] for case in server.tables.get("cases", [])),
+        "emails": sorted(user["email"] for user in server.tables.get("users", [])),
+        "sequences": dict(server.sequences),
+    }
+
+
+def test_a_plan_writes_nothing_and_applying_it_matches_a_direct_run(fake_supabase, run_script, tmp_path):
+    plan_dir = str(tmp_path / "plan")
+    args = ("--no-integrations", "--scale", SCALE, "--seed", "7")
+
+    planned = run_script("seed_database.py", fake_supabase, *args, "--plan", plan_dir)
+    assert planned.returncode == 0, planned.stdout + planned.stderr
+    assert fake_supabase.tables == {} and fake_supabase.sequences == {}
+    with open(os.path.join(plan_dir, "manifest.json")) as f:
+        stages = {stage["name"]: stage for stage in json.load(f)["stages"]}
+    assert stages["case_numbers"]["rpcs"] == 1
+
+    applied = run_script("seed_database.py", fake_supabase, *args, "--apply", plan_dir)
+    assert applied.returncode == 0, applied.stdout + applied.stderr
+
+    direct_server = FakeSupabase().start()
+    try:
+        direct = run_script("seed_database.py", direct_server, *args)
+        assert direct.returncode == 0, direct.stdout + direct.stderr
+        expected = contents(direct_server)
+    finally:
+        direct_server.stop()
+    assert contents(fake_supabase) == expected
+    assert expected["sequences"]
+
+
+def test_number_blocks_are_reserved_by_the_plan(fake_supabase, supabase_client, tmp_path):
+    fake_supabase.sequences["invoice:2024"] = 40
+    plan = SeedPlan(str(tmp_path / "plan"), fake_supabase.url, 50)
+    plan.start([])
+    allocator = BlockAllocator(PlanningClient(supabase_client, plan), block_size=10)
+
+    numbers = allocator.take("invoice:2024", 12) + allocator.take("invoice:2024", 3)
+    plan.finish(SimpleNamespace(timings={}))
+
+    assert numbers == list(range(40, 55))
+    assert fake_supabase.sequences == {"invoice:2024": 40}
+    assert plan.stages["run"].rpcs == 2
+
+    for operation in read_operations(plan.path, "run"):
+        supabase_client.rpc(operation["function"], operation["params"]).execute()
+    planned = dict(fake_supabase.sequences)
+
+    fake_supabase.sequences["invoice:2024"] = 40
+    direct = BlockAllocator(supabase_client, block_size=10)
+    assert direct.take("invoice:2024", 12) + direct.take("invoice:2024", 3) == numbers
+    assert planned == fake_supabase.sequences == {"invoice:2024": 62}
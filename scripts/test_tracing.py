@@ -0,0 +1,78 @@
+import json
+import sys
+
+import pytest
+from postgrest.exceptions import APIError
+
+from tracing import RunTracer
+
+
+def test_round_trips_are_counted_by_operation(fake_supabase, supabase_client):
+    tracer = RunTracer()
+    tracer.instrument_supabase(supabase_client)
+
+    supabase_client.table("users").insert({"email": "a@example.com"}).execute()
+    supabase_client.table("users").upsert({"email": "b@example.com"}, on_conflict="email").execute()
+    supabase_client.table("users").select("id").execute()
+    supabase_client.table("users").select("id").eq("email", "a@example.com").execute()
+    supabase_client.rpc("schema_catalog", {}).execute()
+    with pytest.raises(APIError):
+        supabase_client.table("users").insert({"email": "a@example.com"}).execute()
+
+    calls = {key: (stats.calls, stats.errors) for key, stats in tracer.stats.items()}
+    assert calls == {
+        ("supabase", "users", "insert"): (2, 1),
+        ("supabase", "users", "upsert"): (1, 0),
+        ("supabase", "users", "select"): (2, 0),
+        ("supabase", "schema_catalog", "rpc"): (1, 0),
+    }
+
+
+def test_spans_are_exported_to_a_file(tmp_path, monkeypatch):
+    # Without the OpenTelemetry SDK spans go out as JSON lines
+    monkeypatch.setitem(sys.modules, "opentelemetry", None)
+    path = tmp_path / "spans.jsonl"
+    tracer = RunTracer()
+    tracer.configure(str(path))
+
+    with tracer.span("sendgrid", "send", "mail", recipients=3):
+        pass
+    with tracer.span("twilio", "send", "sms") as call:
+        call.fail("HTTP 429")
+    with pytest.raises(RuntimeError):
+        with tracer.span("slack", "post", "channel"):
+            raise RuntimeError("boom")
+    tracer.close()
+
+    spans = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [(s["name"], s["status"]) for s in spans] == [
+        ("sendgrid send mail", "ok"), ("twilio send sms", "error"), ("slack post channel", "error")]
+    assert spans[0]["attributes"]["recipients"] == 3
+    assert spans[1]["error"] == "HTTP 429"
+    assert spans[2]["error"] == "RuntimeError: boom"
+    assert tracer.stats[("slack", "channel", "post")].errors == 1
+
+
+def test_calls_are_attributed_to_the_current_thread():
+    tracer = RunTracer()
+    totals = {}
+    with tracer.attribute(totals):
+        for _ in range(3):
+            with tracer.span("graph", "get", "events"):
+                pass
+    with tracer.span("graph", "get", "events"):
+        pass
+
+    assert totals["graph"][2] == 3
+    assert tracer.stats[("graph", "events", "get")].calls == 4
+
+
+def test_percentiles_come_from_the_histogram():
+    tracer = RunTracer()
+    for ms in [1] * 90 + [40] * 9 + [700]:
+        tracer.record("supabase", "users", "select", ms)
+
+    stats = tracer.stats[("supabase", "users", "select")]
+    assert stats.percentile(0.5) == 1
+    assert stats.percentile(0.95) == 50
+    assert stats.percentile(1.0) == 700
@@ -0,0 +1,37 @@
+from validation import is_date, is_phone, split_valid
+
+
+def test_dates_must_exist():
+    assert is_date("2024-02-29")
+    assert not is_date("2024-13-45")
+    assert not is_date("2023-02-29")
+
+
+def test_phone_formats():
+    assert is_phone("212-555-0100")
+    assert is_phone("+1.212.555.0100")
+    assert is_phone("2125550100")
+    assert not is_phone("212 555 0100")
+
+
+def test_weak_passwords_are_rejected_without_echoing_them():
+    users = [
+        {"email": "a@example.com", "first_name": "A", "last_name": "A", "role": "lawyer",
+         "password": "Strong-Passw0rd!"},
+        {"email": "b@example.com", "first_name": "B", "last_name": "B", "role": "client",
+         "password": "password1"},
+    ]
+    valid, report = split_valid("users", users)
+
+    assert [user["email"] for user in valid] == ["a@example.com"]
+    assert report.errors == {1: ["password: weak password"]}
+    assert "password1" not in report.summary()
+
+
+def test_exempt_columns_are_not_checked():
+    users = [{"email": "a@example.com", "first_name": "A", "last_name": "A", "role": "lawyer",
+              "password": "hashed_password_1"}]
+
+    valid, report = split_valid("users", users, exempt=("password",))
+
+    assert valid == users and not report.errors
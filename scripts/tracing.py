@@ -0,0 +1,220 @@
+import bisect
+import json
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is open-ended
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+# HTTP method -> PostgREST operation
+REST_OPERATIONS = {"GET": "select", "POST": "insert", "PATCH": "update", "DELETE": "delete"}
+
+
+class OperationStats:
+    """Call count, errors and a latency histogram for one (service, resource, operation)."""
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.seconds = 0.0
+        self.max_ms = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+
+    def record(self, ms: float, error: bool) -> None:
+        self.calls += 1
+        self.errors += int(error)
+        self.seconds += ms / 1000
+        self.max_ms = max(self.max_ms, ms)
+        self.buckets[bisect.bisect_left(LATENCY_BUCKETS_MS, ms)] += 1
+
+    def percentile(self, fraction: float) -> float:
+        """Upper bound of the bucket holding the given fraction of calls."""
+        target = fraction * self.calls
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS_MS + (self.max_ms,), self.buckets):
+            seen += count
+            if seen >= target:
+                return min(bound, self.max_ms)
+        return self.max_ms
+
+
+class Call:
+    """Handle yielded by `RunTracer.span()`."""
+
+    def __init__(self):
+        self.error: Optional[str] = None
+
+    def fail(self, error: str) -> None:
+        self.error = error
+
+
+class _JsonLinesSpans:
+    """Minimal span writer used when the OpenTelemetry SDK is not installed."""
+
+    def __init__(self, out):
+        self.out = out
+        self._lock = threading.Lock()
+
+    def write(self, name: str, started: float, ms: float, attributes: Dict, error: Optional[str]) -> None:
+        record = {"name": name, "start": started, "duration_ms": round(ms, 3),
+                  "attributes": attributes, "status": "error" if error else "ok"}
+        if error:
+            record["error"] = error
+        with self._lock:
+            self.out.write(json.dumps(record) + "\n")
+            self.out.flush()
+
+
+class RunTracer:
+    """Per-operation round-trip counts and latency for one run, plus optional spans.
+
+    Counting is always on and costs a dict lookup per call. `configure()`
+    marks the run as traced, so scripts instrument their Supabase client and
+    print the summary, and optionally exports spans: OpenTelemetry spans
+    through the console exporter (to stdout or a file) when the SDK is
+    installed, JSON lines otherwise.
+    """
+
+    def __init__(self):
+        self.stats: Dict[Tuple[str, str, str], OperationStats] = {}
+        self._lock = threading.Lock()
+        self._otel = None
+        self._fallback: Optional[_JsonLinesSpans] = None
+        self._out = None
+        self._local = threading.local()
+        self.enabled = False
+
+    def configure(self, destination: Optional[str] = None, service_name: str = "seed-scripts") -> None:
+        """Enable tracing; export spans to stdout ("console") or to the file at `destination`."""
+        self.enabled = True
+        if not destination:
+            return
+        self._out = sys.stdout if destination == "console" else open(destination, "w")
+        try:
+            # Imported here so untraced runs never pay for the SDK import
+            from opentelemetry import trace as otel_trace
+            from opentelemetry.sdk.resources import Resource
+            from opentelemetry.sdk.trace import TracerProvider
+            from opentelemetry.sdk.trace.export import ConsoleSpanExporter, SimpleSpanProcessor
+        except ImportError:
+            print("OpenTelemetry SDK not installed, writing spans as JSON lines")
+            self._fallback = _JsonLinesSpans(self._out)
+            return
+        self._error_status = lambda message: otel_trace.Status(otel_trace.StatusCode.ERROR, message)
+        provider = TracerProvider(resource=Resource.create({"service.name": service_name}))
+        provider.add_span_processor(SimpleSpanProcessor(ConsoleSpanExporter(out=self._out)))
+        otel_trace.set_tracer_provider(provider)
+        self._otel = otel_trace.get_tracer("seed_scripts")
+
+    def record(self, service: str, resource: str, operation: str, ms: float, error: bool = False) -> None:
+        key = (service, resource, operation)
+        with self._lock:
+            stats = self.stats.get(key)
+            if stats is None:
+                stats = self.stats[key] = OperationStats()
+            stats.record(ms, error)
+
+    @contextmanager
+    def attribute(self, totals: Dict[str, List[float]]) -> Iterator[Dict[str, List[float]]]:
+        """Add [seconds, thread CPU seconds, calls] of every call made on this thread to `totals`, by service."""
+        previous = getattr(self._local, "totals", None)
+        self._local.totals = totals
+        try:
+            yield totals
+        finally:
+            self._local.totals = previous
+
+    @contextmanager
+    def span(self, service: str, operation: str, resource: str = "", **attributes) -> Iterator["Call"]:
+        """Time a call to `service`, count it, and export a span if tracing is configured.
+
+        An exception marks the call failed; so does `call.fail()` for errors
+        that are returned rather than raised.
+        """
+        attributes = {"service": service, "operation": operation, "resource": resource, **attributes}
+        name = f"{service} {operation} {resource}".rstrip()
+        call = Call()
+        totals = getattr(self._local, "totals", None)
+        started_cpu = time.thread_time() if totals is not None else 0.0
+        started_wall = time.time()
+        started = time.perf_counter()
+        otel_span = self._otel.start_as_current_span(name, attributes=attributes) if self._otel else None
+        try:
+            if otel_span is not None:
+                with otel_span as current:
+                    yield call
+                    if call.error:
+                        current.set_status(self._error_status(call.error))
+            else:
+                yield call
+        except Exception as e:
+            call.fail(f"{type(e).__name__}: {e}")
+            raise
+        finally:
+            ms = (time.perf_counter() - started) * 1000
+            self.record(service, resource, operation, ms, call.error is not None)
+            if totals is not None:
+                total = totals.setdefault(service, [0.0, 0.0, 0])
+                total[0] += ms / 1000
+                total[1] += time.thread_time() - started_cpu
+                total[2] += 1
+            if self._fallback is not None:
+                self._fallback.write(name, started_wall, ms, attributes, call.error)
+
+    def instrument_supabase(self, client) -> None:
+        """Count and time every PostgREST round trip made through `client`."""
+        import httpx
+
+        tracer = self
+
+        class TracingTransport(httpx.BaseTransport):
+            def __init__(self, inner):
+                self.inner = inner
+
+            def handle_request(self, request):
+                path = request.url.path.split("/rest/v1/", 1)[-1]
+                if path.startswith("rpc/"):
+                    resource, operation = path[4:], "rpc"
+                else:
+                    resource = path
+                    operation = REST_OPERATIONS.get(request.method, request.method.lower())
+                    if operation == "insert" and "resolution=" in request.headers.get("prefer", ""):
+                        operation = "upsert"
+                with tracer.span("supabase", operation, resource, **{"http.method": request.method}) as call:
+                    response = self.inner.handle_request(request)
+                    if response.status_code >= 400:
+                        call.fail(f"HTTP {response.status_code}")
+                    return response
+
+            def close(self):
+                self.inner.close()
+
+        session = client.postgrest.session
+        # httpx has no public way to wrap an existing client's transport
+        session._transport = TracingTransport(session._transport)
+
+    def report(self) -> None:
+        if not self.stats:
+            return
+        print("\nRound trips by service and operation:")
+        print(f"{'service':<18}{'resource':<22}{'operation':<18}{'calls':>7}{'errors':>7}"
+              f"{'total s':>9}{'p50 ms':>8}{'p95 ms':>8}{'max ms':>9}")
+        for (service, resource, operation), stats in sorted(self.stats.items()):
+            print(f"{service:<18}{resource[:21]:<22}{operation[:17]:<18}{stats.calls:>7}{stats.errors:>7}"
+                  f"{stats.seconds:>9.2f}{stats.percentile(0.5):>8.0f}{stats.percentile(0.95):>8.0f}"
+                  f"{stats.max_ms:>9.0f}")
+        by_service: Dict[str, float] = {}
+        for (service, _, _), stats in self.stats.items():
+            by_service[service] = by_service.get(service, 0.0) + stats.seconds
+        print("Time by service: " + ", ".join(f"{service} {seconds:.2f}s"
+                                               for service, seconds in sorted(by_service.items())))
+
+    def close(self) -> None:
+        if self._out is not None and self._out is not sys.stdout:
+            self._out.close()
+
+
+tracer = RunTracer()
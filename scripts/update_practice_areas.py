@@ -1,7 +1,11 @@
+import argparse
 import os
 from dotenv import load_dotenv
 from supabase import create_client, Client
 
+from reference_sync import REFERENCE_TABLES, sync_reference_data
+from tracing import tracer
+
 # Load environment variables
 load_dotenv()
 
@@ -65,36 +69,47 @@ practice_areas = [
     "Trusts and Estates"
 ]
 
-def update_practice_areas():
+def update_practice_areas(dry_run: bool = False, delete: bool = True):
+    """Bring practice_areas in line with the list above without churning existing IDs."""
     print("\nUpdating practice areas...")
-    
-    # First, clear existing practice areas
-    try:
-        result = supabase.table("practice_areas").select("*").execute()
-        if result.data:
-            print(f"Found {len(result.data)} existing practice areas")
-            for area in result.data:
-                supabase.table("practice_areas").delete().eq("id", area["id"]).execute()
-            print("Cleared existing practice areas")
-    except Exception as e:
-        print(f"Error clearing practice areas: {str(e)}")
-        return
+    rows = [{"name": area, "description": f"Legal services related to {area}"} for area in practice_areas]
+    return sync_reference_data(supabase, REFERENCE_TABLES["practice_areas"], rows,
+                               delete=delete, dry_run=dry_run)
 
-    # Insert new practice areas
-    for area in practice_areas:
-        try:
-            supabase.table("practice_areas").insert({
-                "name": area,
-                "description": f"Legal services related to {area}"
-            }).execute()
-            print(f"Added practice area: {area}")
-        except Exception as e:
-            print(f"Error adding {area}: {str(e)}")
+def parse_args():
+    parser = argparse.ArgumentParser(description="Sync the practice_areas table with the canonical list.")
+    parser.add_argument("--dry-run", action="store_true", help="Print the changes without applying them")
+    parser.add_argument("--keep-extra", action="store_true",
+                        help="Do not delete practice areas that are not in the list")
+    parser.add_argument("--trace", nargs="?", const="", default=None, metavar="console|FILE",
+                        help="Count and time every Supabase call and print a "
+                             "summary; with a value, also export spans to stdout or a file")
+    parser.add_argument("--profile", nargs="?", const="profiles", default=None, metavar="DIR",
+                        help="Profile the update with cProfile and tracemalloc and write a report and "
+                             "flame graph stacks to DIR (default: profiles)")
+    return parser.parse_args()
 
 def main():
+    args = parse_args()
+    if args.trace is not None:
+        tracer.configure(args.trace)
+    if args.trace is not None or args.profile is not None:
+        tracer.instrument_supabase(supabase)
     print("Starting practice areas update...")
-    update_practice_areas()
+    if args.profile is not None:
+        from profiling import RunProfiler
+        profiler = RunProfiler("update_practice_areas", args.profile)
+        profiler.start()
+        profiler.run("update_practice_areas", update_practice_areas,
+                     dry_run=args.dry_run, delete=not args.keep_extra)
+        profiler.stop()
+        profiler.report()
+    else:
+        update_practice_areas(dry_run=args.dry_run, delete=not args.keep_extra)
+    if tracer.enabled:
+        tracer.report()
+        tracer.close()
     print("\nPractice areas update completed!")
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
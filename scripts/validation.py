@@ -0,0 +1,237 @@
+import re
+from collections import Counter
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+from bulk_writer import iter_chunks
+from record_batch import RecordBatch
+
+VALID_CASE_STATUSES = frozenset(['open', 'pending', 'closed', 'archived'])
+VALID_PRIORITY_LEVELS = frozenset(['low', 'medium', 'high', 'urgent'])
+VALID_BILLING_STATUSES = frozenset(['draft', 'sent', 'paid', 'overdue', 'cancelled'])
+VALID_MESSAGE_TYPES = frozenset(['text', 'file', 'system', 'notification'])
+VALID_ROLES = frozenset(['lawyer', 'paralegal', 'client', 'admin'])
+VALID_EVENT_TYPES = frozenset(['meeting', 'court_date', 'deadline', 'reminder'])
+
+EMAIL_RE = re.compile(r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}')
+# Accepts formats like: 212-555-0100, (212) 555-0100, 2125550100
+PHONE_RE = re.compile(r'(\+\d{1,3}[-.]?)?\(?\d{3}\)?[-.]?\d{3}[-.]?\d{4}')
+ZIP_RE = re.compile(r'\d{5}(-\d{4})?')
+# Length, upper, lower, digit and special character in a single scan
+PASSWORD_RE = re.compile(r'(?=[^A-Z]*[A-Z])(?=[^a-z]*[a-z])(?=\D*\d)(?=.*[!@#$%^&*(),.?":{}|<>]).{8,}',
+                         re.DOTALL)
+
+Check = Callable[[object], bool]
+
+# Columns whose values are never echoed into error reports
+SECRET_COLUMNS = frozenset(['password'])
+
+# Scalar checks; each takes one value and never raises
+
+def is_email(value) -> bool:
+    return isinstance(value, str) and EMAIL_RE.fullmatch(value) is not None
+
+
+def is_phone(value) -> bool:
+    return isinstance(value, str) and PHONE_RE.fullmatch(value) is not None
+
+
+def is_zip_code(value) -> bool:
+    return isinstance(value, str) and ZIP_RE.fullmatch(value) is not None
+
+
+def is_strong_password(value) -> bool:
+    return isinstance(value, str) and PASSWORD_RE.fullmatch(value) is not None
+
+
+def is_date(value) -> bool:
+    if isinstance(value, date):
+        return True
+    if not isinstance(value, str):
+        return False
+    try:
+        datetime.strptime(value, '%Y-%m-%d')
+        return True
+    except ValueError:
+        return False
+
+
+def is_timestamp(value) -> bool:
+    if isinstance(value, datetime):
+        return True
+    try:
+        datetime.fromisoformat(value)
+        return True
+    except (TypeError, ValueError):
+        return False
+
+
+def is_money(value) -> bool:
+    if isinstance(value, bool):
+        return False
+    if isinstance(value, (int, float, Decimal)):
+        return value >= 0
+    try:
+        return float(value) >= 0
+    except (TypeError, ValueError):
+        return False
+
+
+def one_of(choices: Iterable[str]) -> Check:
+    allowed = frozenset(choices)
+    return lambda value: isinstance(value, str) and value.lower() in allowed
+
+
+class TableSpec:
+    """Columns that must be present and the check each present value must pass.
+
+    `checks` maps column -> (check, message). A column that is absent or None
+    is only an error when it is listed in `required`.
+    """
+
+    def __init__(self, table: str, required: Sequence[str] = (),
+                 checks: Optional[Dict[str, Tuple[Check, str]]] = None):
+        self.table = table
+        self.required = tuple(required)
+        self.checks = dict(checks or {})
+
+
+TABLE_SPECS: Dict[str, TableSpec] = {spec.table: spec for spec in [
+    TableSpec("law_firms", required=["name"], checks={
+        "email": (is_email, "invalid email"),
+        "phone_number": (is_phone, "invalid phone number"),
+        "zip_code": (is_zip_code, "invalid zip code"),
+    }),
+    TableSpec("users", required=["email", "first_name", "last_name", "role"], checks={
+        "email": (is_email, "invalid email"),
+        "phone_number": (is_phone, "invalid phone number"),
+        "role": (one_of(VALID_ROLES), "unknown role"),
+        "password": (is_strong_password, "weak password"),
+    }),
+    TableSpec("cases", required=["title", "case_number", "status"], checks={
+        "status": (one_of(VALID_CASE_STATUSES), "unknown case status"),
+        "priority": (one_of(VALID_PRIORITY_LEVELS), "unknown priority"),
+        "open_date": (is_date, "invalid date"),
+        "estimated_completion_date": (is_date, "invalid date"),
+        "billing_rate": (is_money, "invalid amount"),
+    }),
+    TableSpec("case_participants", required=["case_id", "user_id", "role"]),
+    TableSpec("messages", required=["case_id", "sender_id", "content"], checks={
+        "message_type": (one_of(VALID_MESSAGE_TYPES), "unknown message type"),
+        "created_at": (is_timestamp, "invalid timestamp"),
+    }),
+    TableSpec("notes", required=["case_id", "user_id", "content"], checks={
+        "created_at": (is_timestamp, "invalid timestamp"),
+    }),
+    TableSpec("calendar_events", required=["case_id", "title", "start_time", "end_time"], checks={
+        "start_time": (is_timestamp, "invalid timestamp"),
+        "end_time": (is_timestamp, "invalid timestamp"),
+        "type": (one_of(VALID_EVENT_TYPES), "unknown event type"),
+    }),
+]}
+
+
+class ValidationReport:
+    """Errors found in one batch, keyed by row position in the batch."""
+
+    def __init__(self, table: str, rows: int):
+        self.table = table
+        self.rows = rows
+        self.errors: Dict[int, List[str]] = {}
+
+    def add(self, index: int, error: str) -> None:
+        self.errors.setdefault(index, []).append(error)
+
+    @property
+    def invalid(self) -> int:
+        return len(self.errors)
+
+    def summary(self, examples: int = 3) -> str:
+        counts = Counter(error.split(":", 1)[0] for errors in self.errors.values() for error in errors)
+        text = (f"{self.table}: {self.invalid} of {self.rows} rows invalid ("
+                + ", ".join(f"{column} {count}" for column, count in counts.most_common()) + ")")
+        for index in sorted(self.errors)[:examples]:
+            text += f"\n  row {index}: " + "; ".join(self.errors[index])
+        return text
+
+
+def _values(rows, column: str) -> List:
+    if isinstance(rows, RecordBatch):
+        return rows.column(column)
+    return [row.get(column) for row in rows]
+
+
+def _verdicts(check: Check, values: Sequence) -> Dict:
+    """Run `check` once per distinct value; enums and shared timestamps repeat a lot."""
+    # Keyed by type too, so that True, 1 and 1.0 are checked separately
+    verdicts = {}
+    for value in values:
+        key = (value.__class__, value)
+        if value is not None and key not in verdicts:
+            verdicts[key] = check(value)
+    return verdicts
+
+
+def validate_batch(spec: TableSpec, rows: Union[Sequence[Dict], RecordBatch]) -> ValidationReport:
+    """Check a batch column by column; one pass over the rows per checked column."""
+    report = ValidationReport(spec.table, len(rows))
+    for column in spec.required:
+        for index, value in enumerate(_values(rows, column)):
+            if value is None or value == "":
+                report.add(index, f"{column}: required")
+    for column, (check, message) in spec.checks.items():
+        values = _values(rows, column)
+        secret = column in SECRET_COLUMNS
+        try:
+            verdicts = _verdicts(check, values)
+        except TypeError:
+            # Unhashable values (e.g. JSON objects) are checked one by one
+            verdicts = None
+        for index, value in enumerate(values):
+            if value is None:
+                continue
+            if not (verdicts[(value.__class__, value)] if verdicts is not None else check(value)):
+                report.add(index, f"{column}: {message}" if secret else f"{column}: {message} {value!r}")
+    return report
+
+
+def split_valid(table: str, rows: Union[Sequence[Dict], RecordBatch],
+                exempt: Sequence[str] = ()) -> Tuple[Union[List[Dict], RecordBatch], ValidationReport]:
+    """Return the rows that pass the table's spec and the report for the rest.
+
+    Columns in `exempt` are not checked. A RecordBatch comes back as a
+    RecordBatch, anything else as a list.
+    """
+    batch = isinstance(rows, RecordBatch)
+    spec = TABLE_SPECS.get(table)
+    if spec is None:
+        return (rows if batch else list(rows)), ValidationReport(table, len(rows))
+    if exempt:
+        spec = TableSpec(spec.table, spec.required,
+                         {column: check for column, check in spec.checks.items() if column not in exempt})
+    report = validate_batch(spec, rows)
+    if not report.errors:
+        return (rows if batch else list(rows)), report
+    if batch:
+        return rows.take([index for index in range(len(rows)) if index not in report.errors]), report
+    return [row for index, row in enumerate(rows) if index not in report.errors], report
+
+
+def filter_valid(table: str, rows: Iterable[Dict], chunk_size: int = 5000) -> Iterator[Dict]:
+    """Stream the valid rows of `rows`, printing a summary for every batch with errors."""
+    for chunk in iter_chunks(rows, chunk_size):
+        valid, report = split_valid(table, chunk)
+        if report.errors:
+            print(f"Skipping invalid rows, {report.summary()}")
+        yield from valid
+
+
+def filter_valid_batches(table: str, batches: Iterable[RecordBatch]) -> Iterator[RecordBatch]:
+    """filter_valid for a stream of RecordBatches; yields each batch minus its invalid rows."""
+    for batch in batches:
+        valid, report = split_valid(table, batch)
+        if report.errors:
+            print(f"Skipping invalid rows, {report.summary()}")
+        if len(valid):
+            yield valid
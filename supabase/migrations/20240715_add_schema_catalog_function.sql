@@ -0,0 +1,33 @@
+-- Migration: Add schema_catalog() for the seed scripts' schema snapshot cache
+-- Returns every public table with its RLS flag, columns and policies in one call
+CREATE OR REPLACE FUNCTION public.schema_catalog()
+RETURNS jsonb
+LANGUAGE sql
+STABLE
+SECURITY DEFINER
+SET search_path = public, pg_catalog
+AS $$
+    SELECT jsonb_build_object(
+        'tables', COALESCE((
+            SELECT jsonb_agg(jsonb_build_object('table', c.relname, 'rls', c.relrowsecurity) ORDER BY c.relname)
+            FROM pg_class c
+            JOIN pg_namespace n ON n.oid = c.relnamespace
+            WHERE n.nspname = 'public' AND c.relkind IN ('r', 'p')
+        ), '[]'::jsonb),
+        'columns', COALESCE((
+            SELECT jsonb_agg(jsonb_build_object('table', table_name, 'column', column_name,
+                                                'type', data_type) ORDER BY table_name, ordinal_position)
+            FROM information_schema.columns
+            WHERE table_schema = 'public'
+        ), '[]'::jsonb),
+        'policies', COALESCE((
+            SELECT jsonb_agg(jsonb_build_object('table', tablename, 'name', policyname, 'command', cmd,
+                                                'using', qual, 'check', with_check) ORDER BY tablename, policyname)
+            FROM pg_policies
+            WHERE schemaname = 'public'
+        ), '[]'::jsonb)
+    );
+$$;
+
+REVOKE ALL ON FUNCTION public.schema_catalog() FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.schema_catalog() TO service_role;
@@ -0,0 +1,38 @@
+-- Migration: Add number_sequences and reserve_number_block() for case and invoice numbers
+-- Each series keeps the next unreserved value; callers reserve a block and hand numbers out locally
+CREATE TABLE IF NOT EXISTS public.number_sequences (
+    series text PRIMARY KEY,
+    next_value bigint NOT NULL DEFAULT 1,
+    updated_at timestamp with time zone NOT NULL DEFAULT now()
+);
+
+ALTER TABLE public.number_sequences ENABLE ROW LEVEL SECURITY;
+
+-- Reserve p_count consecutive values of p_series and return the first one.
+-- The upsert takes a row lock, so concurrent callers always get disjoint blocks.
+CREATE OR REPLACE FUNCTION public.reserve_number_block(p_series text, p_count integer)
+RETURNS bigint
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    block_end bigint;
+BEGIN
+    IF p_count IS NULL OR p_count < 1 THEN
+        RAISE EXCEPTION 'reserve_number_block: p_count must be positive, got %', p_count;
+    END IF;
+
+    INSERT INTO public.number_sequences AS s (series, next_value)
+    VALUES (p_series, 1 + p_count)
+    ON CONFLICT (series) DO UPDATE
+        SET next_value = s.next_value + p_count,
+            updated_at = now()
+    RETURNING s.next_value INTO block_end;
+
+    RETURN block_end - p_count;
+END;
+$$;
+
+REVOKE ALL ON FUNCTION public.reserve_number_block(text, integer) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.reserve_number_block(text, integer) TO service_role;
@@ -0,0 +1,35 @@
+-- Migration: Unique indexes on the natural keys bulk writes retry against
+-- A retried insert is sent as an upsert on these columns (scripts/bulk_writer.py NATURAL_KEYS),
+-- and PostgREST's on_conflict needs a unique index on exactly those columns.
+-- The seed script also upserts law_firms on name and case_participants on (case_id, user_id).
+-- Existing duplicates stop the migration with an error instead of being deleted.
+DO $$
+BEGIN
+    IF to_regclass('public.law_firms') IS NOT NULL THEN
+        IF EXISTS (SELECT 1 FROM public.law_firms WHERE name IS NOT NULL
+                   GROUP BY name HAVING count(*) > 1) THEN
+            RAISE EXCEPTION 'law_firms has duplicate names; merge them before adding law_firms_name_key';
+        END IF;
+        CREATE UNIQUE INDEX IF NOT EXISTS law_firms_name_key ON public.law_firms (name);
+    END IF;
+
+    IF to_regclass('public.case_participants') IS NOT NULL THEN
+        IF EXISTS (SELECT 1 FROM public.case_participants WHERE case_id IS NOT NULL
+                   GROUP BY case_id, user_id HAVING count(*) > 1) THEN
+            RAISE EXCEPTION 'case_participants has duplicate (case_id, user_id) rows; remove them first';
+        END IF;
+        CREATE UNIQUE INDEX IF NOT EXISTS case_participants_case_id_user_id_key
+            ON public.case_participants (case_id, user_id);
+    END IF;
+
+    IF EXISTS (SELECT 1 FROM information_schema.columns
+               WHERE table_schema = 'public' AND table_name = 'cases' AND column_name = 'case_number') THEN
+        CREATE UNIQUE INDEX IF NOT EXISTS cases_case_number_key ON public.cases (case_number);
+    END IF;
+
+    IF EXISTS (SELECT 1 FROM information_schema.columns
+               WHERE table_schema = 'public' AND table_name = 'invoices' AND column_name = 'invoice_number') THEN
+        CREATE UNIQUE INDEX IF NOT EXISTS invoices_invoice_number_key ON public.invoices (invoice_number);
+    END IF;
+END;
+$$;
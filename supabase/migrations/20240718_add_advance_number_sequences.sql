@@ -0,0 +1,26 @@
+-- Migration: Add advance_number_sequences() so numbers written outside reserve_number_block() are never reissued
+-- Seeded cases carry case numbers computed by the generator; the seed script moves each series past them
+CREATE OR REPLACE FUNCTION public.advance_number_sequences(p_series text[], p_last bigint[])
+RETURNS void
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+    IF coalesce(array_length(p_series, 1), 0) <> coalesce(array_length(p_last, 1), 0) THEN
+        RAISE EXCEPTION 'advance_number_sequences: got % series and % values',
+            array_length(p_series, 1), array_length(p_last, 1);
+    END IF;
+
+    -- Only ever moves a series forward, so concurrent callers and reruns are safe
+    INSERT INTO public.number_sequences AS s (series, next_value)
+    SELECT series, last_value + 1
+    FROM unnest(p_series, p_last) AS t(series, last_value)
+    ON CONFLICT (series) DO UPDATE
+        SET next_value = GREATEST(s.next_value, excluded.next_value),
+            updated_at = now();
+END;
+$$;
+
+REVOKE ALL ON FUNCTION public.advance_number_sequences(text[], bigint[]) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.advance_number_sequences(text[], bigint[]) TO service_role;